@@ -0,0 +1,63 @@
+"""
+Benchmark: XGBoost `predict_proba` vs. the compiled flat-array forest.
+
+Scores the same featurized synthetic profiles with the trained XGBClassifier
+and with its `CompiledForest` export, at batch sizes 1, 64 and 4096, and
+reports the median latency per call.
+
+Usage:
+    python benchmarks/benchmark_compiled_trees.py --features tfidf --repeats 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "src/models"))
+
+from benchmark_inference import make_records
+from models.compiled_trees import compile_booster
+from models.features import FEATURE_MODES, build_model_input, raw_matrix
+from models.model_loader import get_registry
+
+BATCH_SIZES = [1, 64, 4096]
+
+def median_latency(predict, X, repeats):
+    """Median seconds per `predict(X)` call over `repeats` calls (after one warm-up call)."""
+    predict(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled forest latency benchmark")
+    parser.add_argument("--features", choices=FEATURE_MODES, default="tfidf", help="Feature pipeline of the model")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per batch size")
+    args = parser.parse_args()
+
+    model, vectorizer, scaler = get_registry(args.features).get()
+    forest = compile_booster(model)
+
+    print(f"\n📊 Scoring latency ({args.features} model, {forest.n_trees} trees, depth {forest.max_depth}):")
+    print(f"   {'batch':>6} {'xgboost':>12} {'compiled':>12} {'speedup':>8} {'max |Δp|':>10}")
+
+    for batch_size in BATCH_SIZES:
+        X = build_model_input(raw_matrix(make_records(batch_size, seed=batch_size)), vectorizer, scaler)
+        max_diff = np.abs(model.predict_proba(X)[:, 1] - forest.predict_proba(X)[:, 1]).max()
+
+        xgboost_latency = median_latency(model.predict_proba, X, args.repeats)
+        compiled_latency = median_latency(forest.predict_proba, X, args.repeats)
+
+        print(f"   {batch_size:>6} {xgboost_latency * 1000:>10.3f}ms {compiled_latency * 1000:>10.3f}ms "
+              f"{xgboost_latency / compiled_latency:>7.1f}x {max_diff:>10.2e}")
+
+if __name__ == "__main__":
+    main()
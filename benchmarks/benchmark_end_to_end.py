@@ -0,0 +1,315 @@
+"""
+Benchmark: end-to-end crawl and analysis against the local Instagram stand-in.
+
+Crawls and scores synthetic `bench_<N>` accounts served by `fake_instagram.py`
+and reports, per account size:
+    - followers/sec over the whole run (login excluded, model loaded beforehand)
+    - p50/p99 latency of each stage: follower page (GraphQL), profile fetch,
+      avatar download + hash, and scoring (per batch)
+    - peak RSS of the client process
+
+Every size runs in a fresh process with empty caches, so peak RSS is per
+size. Results are appended to `benchmarks/results/end_to_end.ndjson` with the
+git commit, and compared with the last run of the same size and settings; a
+throughput drop or RSS growth beyond `--tolerance` is flagged as a regression.
+Only runs of a clean checkout are stored (the commit must identify the code
+measured); use `--no-save` to benchmark uncommitted changes.
+
+`--mode pipeline` runs `analyze_account` (concurrent stages), `--mode sequential`
+runs `get_followers_data` followed by `analyze_followers`. Client-side pacing is
+disabled (the stand-in answers as fast as it is asked), unless a server rate
+limit is set, in which case the scheduler's backoff is part of the measurement.
+
+Usage:
+    python benchmarks/benchmark_end_to_end.py --followers 1000 10000 100000
+    python benchmarks/benchmark_end_to_end.py --followers 1000000 --latency graphql=0.1 profile=0.05
+    python benchmarks/benchmark_end_to_end.py --followers 10000 --rate-limit 500 --client-rate 1000000
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "src/models"))
+
+from fake_instagram import ENDPOINTS, FakeInstagramServer, redirect_instagram
+
+RESULTS_PATH = os.path.join(BASE_DIR, "benchmarks/results/end_to_end.ndjson")
+STAGES = ("page", "profile", "avatar", "score")
+MODES = ("pipeline", "sequential")
+
+class LatencyHistogram:
+    """Thread-safe log-bucketed latency histogram (bounded memory, ~2.5% percentile resolution)."""
+
+    GROWTH = 1.05
+    MIN_SECONDS = 1e-6
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        bucket = int(math.log(max(seconds, self.MIN_SECONDS) / self.MIN_SECONDS, self.GROWTH))
+        with self._lock:
+            self._counts[bucket] = self._counts.get(bucket, 0) + 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q: float):
+        """Returns the `q`-th percentile (0-100) in seconds (bucket midpoint), or None if empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for bucket in sorted(self._counts):
+                seen += self._counts[bucket]
+                if seen >= rank:
+                    return self.MIN_SECONDS * self.GROWTH ** (bucket + 0.5)
+
+    def summary(self):
+        p50, p99 = self.percentile(50), self.percentile(99)
+        return {"count": self.count,
+                "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+                "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+                "p99_ms": round(p99 * 1000, 3) if p99 is not None else None}
+
+def _timed(histogram: LatencyHistogram, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.record(time.perf_counter() - start)
+    return wrapper
+
+def _instrument():
+    """Wraps the functions behind each stage with latency histograms (benchmark process only)."""
+    import instaloader
+    import api.bot_detector
+    import api.pipeline
+    import data.scraper
+    from data.image_hasher import ProfilePicHasher
+
+    histograms = {stage: LatencyHistogram() for stage in STAGES}
+    instaloader.InstaloaderContext.graphql_query = _timed(histograms["page"], instaloader.InstaloaderContext.graphql_query)
+    for module in (api.pipeline, data.scraper):
+        module.get_profile_fields = _timed(histograms["profile"], module.get_profile_fields)
+    ProfilePicHasher._download_and_hash = _timed(histograms["avatar"], ProfilePicHasher._download_and_hash)
+    for module in (api.pipeline, api.bot_detector):
+        module.score_chunk = _timed(histograms["score"], module.score_chunk)
+    return histograms
+
+def run_size(followers: int, server_url: str, mode: str, concurrency: int, client_rate: float, cooldown: float):
+    """
+    Crawls and analyzes `bench_<followers>` in this (fresh) process.
+
+    Returns:
+        dict: Throughput, per-stage latency summaries and peak RSS of the run.
+    """
+    # Empty caches and a client that only waits when the stand-in throttles it (set before the project imports)
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    os.environ.update({
+        "PROFILE_CACHE_PATH": os.path.join(workdir, "profiles.db"),
+        "CRAWL_STATE_PATH": os.path.join(workdir, "crawl_state.db"),
+        "FOLLOWER_STORE_DIR": workdir,
+        "PIPELINE_CONCURRENCY": str(concurrency),
+        "SCHEDULER_INSTALOADER_PACING": "0",
+        "SCHEDULER_RATE_PER_HOUR": str(client_rate),
+        "SCHEDULER_MAX_RATE_PER_HOUR": str(client_rate),
+        "SCHEDULER_BASE_COOLDOWN": str(cooldown),
+        "SCHEDULER_MAX_COOLDOWN": str(cooldown * 32),
+    })
+
+    from api.bot_detector import analyze_followers
+    from api.pipeline import analyze_account
+    from data.request_scheduler import get_scheduler
+    from data.scraper import get_followers_data
+    from models.inferencer import predict_batch
+
+    histograms = _instrument()
+    username, insta_user, insta_pass = f"bench_{followers}", "bench_viewer", "password"
+
+    with redirect_instagram(server_url, pool_size=max(16, concurrency * 2)):
+        # Warm up outside the measurement: model load and login
+        predict_batch([{"followers": 0, "following": 0, "bio_length": 0, "posts": 0, "has_profile_pic": 0,
+                        "is_private": 0, "digit_count": 0, "username_length": 8}])
+        get_scheduler().add_session(insta_user, insta_pass)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        start = time.perf_counter()
+        if mode == "pipeline":
+            bot_percentage, results = analyze_account(username, insta_user, insta_pass, concurrency=concurrency)
+        else:
+            usernames = get_followers_data(username, insta_user, insta_pass)
+            bot_percentage, results = analyze_followers(usernames)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "followers": followers,
+        "analyzed": len(results),
+        "bot_percentage": round(bot_percentage, 2),
+        "seconds": round(elapsed, 3),
+        "followers_per_sec": round(len(results) / elapsed, 1),
+        "stages": {stage: histogram.summary() for stage, histogram in histograms.items()},
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "throttle_events": get_scheduler().metrics()["throttle_events"]
+    }
+
+def git_version():
+    """Returns the short commit of the working tree (with `-dirty` if it has changes), or None."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def find_baseline(history: list, record: dict):
+    """Returns the last stored run with the same size and settings as `record`, or None."""
+    for previous in reversed(history):
+        if (previous["followers"], previous["mode"], previous["settings"]) == \
+                (record["followers"], record["mode"], record["settings"]):
+            return previous
+    return None
+
+def compare(record: dict, baseline: dict, tolerance: float):
+    """
+    Prints the change against `baseline` and returns the regressions found.
+
+    Throughput and peak RSS are checked against `tolerance`; stage p99s are only reported.
+    """
+    regressions = []
+    throughput_change = record["followers_per_sec"] / baseline["followers_per_sec"] - 1
+    rss_change = record["peak_rss_mb"] / baseline["peak_rss_mb"] - 1
+    if throughput_change < -tolerance:
+        regressions.append(f"throughput {throughput_change * 100:+.1f}%")
+    if rss_change > tolerance:
+        regressions.append(f"peak RSS {rss_change * 100:+.1f}%")
+
+    p99_changes = ", ".join(
+        f"{stage} {record['stages'][stage]['p99_ms'] / baseline['stages'][stage]['p99_ms'] * 100 - 100:+.0f}%"
+        for stage in STAGES
+        if record["stages"][stage]["p99_ms"] and (baseline["stages"].get(stage) or {}).get("p99_ms"))
+    print(f"   vs {baseline['version']} ({baseline['timestamp'][:10]}): throughput {throughput_change * 100:+.1f}%, "
+          f"peak RSS {rss_change * 100:+.1f}%, p99 {p99_changes or 'n/a'}"
+          f"{'  ❌ regression: ' + ', '.join(regressions) if regressions else '  ✅'}")
+    return regressions
+
+def print_run(record: dict):
+    print(f"\n📊 {record['followers']:,} followers ({record['mode']}): {record['followers_per_sec']:,.1f} followers/sec, "
+          f"{record['seconds']:.1f}s, peak RSS {record['peak_rss_mb']:.0f} MB "
+          f"(after warm-up {record['rss_before_mb']:.0f} MB), {record['analyzed']:,} analyzed, "
+          f"{record['throttle_events']} throttle events")
+    for stage in STAGES:
+        summary = record["stages"][stage]
+        if summary["count"]:
+            print(f"   - {stage:<8} {summary['count']:>9,} calls, p50 {summary['p50_ms']:>8.2f} ms, "
+                  f"p99 {summary['p99_ms']:>8.2f} ms")
+    requests_made = {endpoint: counters["requests"] for endpoint, counters in record["server"].items() if counters["requests"]}
+    throttled = sum(counters["throttled"] for counters in record["server"].values())
+    print(f"   - server: {requests_made}, {throttled} answered with 429")
+
+def parse_latency(values):
+    latency = {}
+    for value in values or []:
+        endpoint, _, seconds = value.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint class `{endpoint}` (expected one of {ENDPOINTS})")
+        latency[endpoint] = float(seconds)
+    return latency
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end crawl and analysis benchmark against a local Instagram stand-in")
+    parser.add_argument("--followers", type=int, nargs="+", default=[1000, 10000],
+                        help="Account sizes to benchmark (synthetic accounts, up to 1M and beyond)")
+    parser.add_argument("--mode", choices=MODES, default="pipeline",
+                        help="analyze_account (concurrent stages) or get_followers_data + analyze_followers")
+    parser.add_argument("--concurrency", type=int, default=8, help="Enrichment threads of the pipeline")
+    parser.add_argument("--latency", nargs="*", metavar="ENDPOINT=SECONDS",
+                        help=f"Server latency per endpoint class ({', '.join(ENDPOINTS)}), e.g. profile=0.05")
+    parser.add_argument("--rate-limit", type=float, help="Server-side API requests/second before answering 429")
+    parser.add_argument("--throttle-probability", type=float, default=0.0, help="Share of API requests answered with 429")
+    parser.add_argument("--full-nodes", action="store_true",
+                        help="Follower pages carry the profile counts (no profile request per follower)")
+    parser.add_argument("--client-rate", type=float, default=1e9, help="Client request budget per hour (scheduler)")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="Client backoff after a 429, in seconds (doubling)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="NDJSON file the results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Throughput drop / peak RSS growth (fraction) flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a regression is found")
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    settings = {"concurrency": args.concurrency, "latency": latency, "rate_limit": args.rate_limit,
+                "throttle_probability": args.throttle_probability, "full_nodes": args.full_nodes,
+                "client_rate": args.client_rate}
+    history = load_results(args.results)
+    version = git_version()
+    if not args.no_save and (version is None or version.endswith("-dirty")):
+        print(f"❌ Refusing to store results of {'a dirty working tree' if version else 'an unknown commit'}: "
+              f"commit your changes or run with --no-save.")
+        sys.exit(2)
+    regressions = []
+
+    with FakeInstagramServer(latency=latency, rate_limit=args.rate_limit, throttle_probability=args.throttle_probability,
+                             full_nodes=args.full_nodes) as server:
+        for followers in args.followers:
+            server_before = server.stats()
+            # A fresh process per size: empty caches and a peak RSS of this size only
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                run = executor.submit(run_size, followers, server.url, args.mode, args.concurrency,
+                                      args.client_rate, args.cooldown).result()
+            server_after = server.stats()
+
+            record = dict(run, mode=args.mode, settings=settings, version=version,
+                          timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                          server={endpoint: {key: server_after[endpoint][key] - server_before[endpoint][key]
+                                             for key in server_after[endpoint]}
+                                  for endpoint in server_after})
+            print_run(record)
+
+            baseline = find_baseline(history, record)
+            if baseline is not None:
+                regressions += [f"{followers:,} followers: {regression}"
+                                for regression in compare(record, baseline, args.tolerance)]
+            if not args.no_save:
+                os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+                with open(args.results, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(record) + "\n")
+                history.append(record)
+
+    if not args.no_save:
+        print(f"\n✅ Results appended to `{args.results}`")
+    if regressions:
+        print("❌ Regressions: " + "; ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
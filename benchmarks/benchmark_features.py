@@ -0,0 +1,92 @@
+"""
+Benchmark: TF-IDF feature pipeline vs. dense numeric features.
+
+1. Featurization throughput: profile records -> model input matrix, for the
+   TF-IDF path (render sentence, tokenize, vocabulary lookup, hstack) and the
+   dense path (records straight to a float32 matrix).
+2. Accuracy: trains an XGBoost classifier with the same fixed hyperparameters
+   on both feature sets (same train/test split) and reports test accuracy.
+
+Usage:
+    python benchmarks/benchmark_features.py --rows 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score, f1_score
+from xgboost import XGBClassifier
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "src/models"))
+
+from benchmark_inference import make_records
+from data.dataset_loader import load_dataset
+from models.features import build_model_input, dense_matrix, fit_scaler, raw_matrix, records_to_dense, render_texts
+
+# Fixed hyperparameters so both feature sets are compared like for like
+XGB_PARAMS = {"n_estimators": 200, "max_depth": 6, "learning_rate": 0.1, "subsample": 1.0, "colsample_bytree": 1.0}
+
+def featurize_tfidf(records, vectorizer, scaler):
+    return build_model_input(raw_matrix(records), vectorizer, scaler)
+
+def featurize_dense(records):
+    return records_to_dense(records)
+
+def time_featurization(records, batch_size, featurize):
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch_size):
+        featurize(records[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+def train_and_score(X_train, X_test, y_train, y_test):
+    """Returns (accuracy, f1, training seconds) of an XGBoost model with XGB_PARAMS."""
+    model = XGBClassifier(objective="binary:logistic", **XGB_PARAMS)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    elapsed = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    return accuracy_score(y_test, y_pred), f1_score(y_test, y_pred), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature pipeline benchmark")
+    parser.add_argument("--rows", type=int, default=20000, help="Number of synthetic profiles to featurize")
+    parser.add_argument("--batch-size", type=int, default=512, help="Records featurized per call")
+    parser.add_argument("--skip-accuracy", action="store_true", help="Only measure featurization throughput")
+    args = parser.parse_args()
+
+    # Accuracy on the real dataset (also fits the TF-IDF vectorizer used for the throughput test)
+    raw_train, raw_test, y_train, y_test = load_dataset()
+    scaler = fit_scaler(dense_matrix(raw_train))
+    vectorizer = TfidfVectorizer(max_features=10000).fit(render_texts(raw_train))
+    X_train_tfidf = build_model_input(raw_train, vectorizer, scaler)
+    X_test_tfidf = build_model_input(raw_test, vectorizer, scaler)
+
+    records = make_records(args.rows)
+    tfidf_elapsed = time_featurization(records, args.batch_size,
+                                       lambda batch: featurize_tfidf(batch, vectorizer, scaler))
+    dense_elapsed = time_featurization(records, args.batch_size, featurize_dense)
+
+    print(f"\n📊 Featurization throughput ({args.rows} rows, batches of {args.batch_size}):")
+    print(f"   - tfidf: {args.rows / tfidf_elapsed:>12,.0f} rows/sec ({tfidf_elapsed:.3f}s)")
+    print(f"   - dense: {args.rows / dense_elapsed:>12,.0f} rows/sec ({dense_elapsed:.3f}s)")
+    print(f"   - speedup: {tfidf_elapsed / dense_elapsed:.1f}x")
+
+    if args.skip_accuracy:
+        return
+
+    X_train_dense, X_test_dense = build_model_input(raw_train), build_model_input(raw_test)
+    tfidf_accuracy, tfidf_f1, tfidf_fit = train_and_score(X_train_tfidf, X_test_tfidf, y_train, y_test)
+    dense_accuracy, dense_f1, dense_fit = train_and_score(X_train_dense, X_test_dense, y_train, y_test)
+
+    print(f"\n📊 Test accuracy (XGBoost {XGB_PARAMS}):")
+    print(f"   - tfidf: accuracy {tfidf_accuracy * 100:.2f}%, F1 {tfidf_f1:.4f} "
+          f"({X_train_tfidf.shape[1]} features, fit {tfidf_fit:.2f}s)")
+    print(f"   - dense: accuracy {dense_accuracy * 100:.2f}%, F1 {dense_f1:.4f} "
+          f"({X_train_dense.shape[1]} features, fit {dense_fit:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: per-row `predict_user` loop vs. batched `predict_batch`.
+
+Scores the same synthetic profile records both ways and reports rows/sec.
+
+Usage:
+    python benchmarks/benchmark_inference.py --rows 5000 --batch-size 512
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "src/models"))
+
+from models.inferencer import build_numerical_features, build_text_features, predict_batch, predict_user
+
+def make_records(n, seed=42):
+    """Generates `n` synthetic profile records shaped like `get_instagram_data` output."""
+    rng = random.Random(seed)
+    return [{
+        "followers": rng.randint(0, 5000),
+        "following": rng.randint(0, 7500),
+        "bio_length": rng.randint(0, 150),
+        "posts": rng.randint(0, 800),
+        "has_profile_pic": rng.randint(0, 1),
+        "is_private": rng.randint(0, 1),
+        "digit_count": rng.randint(0, 6),
+        "username_length": rng.randint(4, 20)
+    } for _ in range(n)]
+
+def run_per_row(records):
+    for record in records:
+        predict_user(build_text_features(record), build_numerical_features(record))
+
+def run_batched(records, batch_size):
+    for start in range(0, len(records), batch_size):
+        predict_batch(records[start:start + batch_size])
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference throughput benchmark")
+    parser.add_argument("--rows", type=int, default=5000, help="Number of synthetic profiles to score")
+    parser.add_argument("--batch-size", type=int, default=512, help="Chunk size for predict_batch")
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+
+    start = time.perf_counter()
+    run_per_row(records)
+    per_row_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_batched(records, args.batch_size)
+    batched_elapsed = time.perf_counter() - start
+
+    print(f"\n📊 Inference throughput ({args.rows} rows):")
+    print(f"   - per-row predict_user:   {args.rows / per_row_elapsed:>12,.0f} rows/sec ({per_row_elapsed:.2f}s)")
+    print(f"   - predict_batch (n={args.batch_size}): {args.rows / batched_elapsed:>12,.0f} rows/sec ({batched_elapsed:.2f}s)")
+    print(f"   - speedup: {per_row_elapsed / batched_elapsed:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: memory of the scored follower results.
+
+Compares the previous representation (one dict per follower with a nested
+`profile_data` dict, turned into an object-column DataFrame) against the
+array-backed `FollowerResults` container, for the same synthetic followers.
+
+Usage:
+    python benchmarks/benchmark_results_memory.py --rows 200000 --batch-size 512
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "src/models"))
+
+from api.results import FollowerResults
+
+def make_batches(n, batch_size, seed=42):
+    """Yields (usernames, records, probabilities) batches shaped like the scoring stage output."""
+    rng = random.Random(seed)
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        # Fresh strings per batch, as they arrive from the JSON API
+        usernames = [f"follower_{rng.randint(0, 10 ** 9)}".encode().decode() for _ in range(size)]
+        records = [{
+            "followers": rng.randint(0, 5000),
+            "following": rng.randint(0, 7500),
+            "bio_length": rng.randint(0, 150),
+            "posts": rng.randint(0, 800),
+            "has_profile_pic": rng.randint(0, 1),
+            "is_private": rng.randint(0, 1),
+            "digit_count": rng.randint(0, 6),
+            "username_length": rng.randint(4, 20)
+        } for _ in range(size)]
+        probabilities = np.array([rng.random() for _ in range(size)], dtype=np.float32)
+        yield usernames, records, probabilities
+
+def build_dicts(batches):
+    """Previous representation: list of nested dicts, then an object-column DataFrame."""
+    follower_details = []
+    for usernames, records, probabilities in batches:
+        for username, record, probability in zip(usernames, records, probabilities):
+            follower_details.append({
+                "username": username,
+                "prediction": "Bot Detected" if probability >= 0.5 else "Real User",
+                "bot_probability": float(probability),
+                "profile_data": record
+            })
+    return follower_details, pd.DataFrame(follower_details)
+
+def build_columnar(batches):
+    results = FollowerResults()
+    for usernames, records, probabilities in batches:
+        results.append_batch(usernames, records, probabilities)
+    results.column("is_bot")  # Include the cost of consolidating a column
+    return results
+
+def measure(build, rows, batch_size):
+    """Returns (retained bytes, peak bytes) of the result built by `build`."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(make_batches(rows, batch_size))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Result container memory benchmark")
+    parser.add_argument("--rows", type=int, default=200000, help="Number of synthetic scored followers")
+    parser.add_argument("--batch-size", type=int, default=512, help="Followers per scored batch")
+    args = parser.parse_args()
+
+    dict_retained, dict_peak = measure(build_dicts, args.rows, args.batch_size)
+    columnar_retained, columnar_peak = measure(build_columnar, args.rows, args.batch_size)
+
+    print(f"\n📊 Result memory ({args.rows} followers):")
+    print(f"   - dicts + DataFrame: {dict_retained / args.rows:>8.0f} B/follower retained, "
+          f"peak {dict_peak / 2 ** 20:.1f} MB")
+    print(f"   - FollowerResults:   {columnar_retained / args.rows:>8.0f} B/follower retained, "
+          f"peak {columnar_peak / 2 ** 20:.1f} MB")
+    print(f"   - reduction: {dict_retained / columnar_retained:.1f}x retained, {dict_peak / columnar_peak:.1f}x peak")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Local stand-in for the Instagram endpoints used by the scraper.
+
+Serves the login flow, `web_profile_info`, the GraphQL follower pagination and
+the profile-picture CDN for synthetic accounts, so the whole scrape-and-score
+path runs offline:
+
+- `bench_<N>` is a target account with N followers (e.g. `bench_1000000`).
+  Followers are generated from their index and a seed, nothing is stored, so
+  1M-follower accounts cost no memory. Targets share their first followers,
+  which gives overlapping audiences.
+- Follower nodes only carry what Instagram returns in the follower list (id,
+  username, picture...), so every follower costs a `web_profile_info` request
+  like against the live site (`full_nodes=True` includes the counts as well).
+- Avatars are served as JPEGs; default-avatar followers get a picture whose
+  hash matches `DEFAULT_PROFILE_PIC_HASHES`.
+- Every endpoint class (`home`, `login`, `profile`, `graphql`, `avatar`) can be
+  given a latency, and API requests can be answered with 429s above a request
+  rate or at random.
+
+Requests are routed by `redirect_instagram(url)`, which hands every requests
+session an adapter sending Instagram URLs to the local server (instaloader
+creates new sessions all the time, so mounting an adapter is not enough).
+
+Usage:
+    with FakeInstagramServer(latency={"profile": 0.05}, rate_limit=200) as server:
+        with redirect_instagram(server.url):
+            get_followers_data("bench_1000", "viewer", "password")
+"""
+import base64
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from PIL import Image, ImageDraw
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar, extract_cookies_to_jar
+
+# Hosts answered by the stand-in (and their subdomains)
+INSTAGRAM_HOSTS = ("instagram.com", "cdninstagram.com", "fbcdn.net")
+
+ENDPOINTS = ("home", "login", "profile", "graphql", "avatar")
+RATE_LIMITED_ENDPOINTS = ("profile", "graphql")
+
+FOLLOWERS_QUERY_HASH = "37479f2b8209594dde7facb0d904896a"  # `Profile.get_followers()`
+TARGET_PATTERN = re.compile(r"^bench_(\d+)$")
+TARGET_ID_BASE = 10 ** 12
+FOLLOWER_ID_BASE = 10 ** 9
+MAX_PAGE_SIZE = 50
+
+BOT_FRACTION = 0.3
+AVATAR_POOL = 1000  # Distinct avatar assets (bytes are shared between a few rendered images)
+AVATAR_IMAGES = 16
+DEFAULT_AVATAR_HASH = "ffffc3c3e7e78181"  # `DEFAULT_PROFILE_PIC_HASHES["instagram_light"]`
+DEFAULT_AVATAR_ASSET = "44884218_345707102882519_2446069589734326272_n.jpg"
+CDN_URL = "https://scontent-fra5-1.cdninstagram.com/v/t51.2885-19/{asset}?stp=dst-jpg_s150x150&_nc_ht=cdninstagram.com"
+
+STATS_PATH = "/__stats__"
+
+def is_instagram_url(url: str):
+    host = urlsplit(url).hostname or ""
+    return any(host == suffix or host.endswith("." + suffix) for suffix in INSTAGRAM_HOSTS)
+
+def _letters(index: int):
+    """Encodes a follower index in lowercase letters (usernames keep their digits for the features)."""
+    letters = ""
+    while True:
+        index, remainder = divmod(index, 26)
+        letters = chr(ord("a") + remainder) + letters
+        if index == 0:
+            return letters
+
+def _index_of(letters: str):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("a")
+    return index
+
+def _cursor(offset: int):
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode()
+
+def _offset(cursor: str):
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode().split(":")[1])
+
+def _render_avatars(seed: int):
+    """Renders the custom avatar JPEGs and the default avatar (8x8 blocks of its average hash)."""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(AVATAR_IMAGES):
+        image = Image.new("RGB", (150, 150), tuple(rng.randint(0, 255) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y = rng.randint(0, 120), rng.randint(0, 120)
+            draw.ellipse((x, y, x + rng.randint(20, 80), y + rng.randint(20, 80)),
+                         fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        images.append(buffer.getvalue())
+
+    bits = bin(int(DEFAULT_AVATAR_HASH, 16))[2:].zfill(64)
+    default = Image.new("L", (8, 8))
+    default.putdata([255 if bit == "1" else 0 for bit in bits])
+    buffer = BytesIO()
+    default.resize((160, 160), Image.NEAREST).save(buffer, "JPEG", quality=95)
+    return images, buffer.getvalue()
+
+class FakeInstagram:
+    """
+    Request handling, synthetic data and throttling of the stand-in (independent of the HTTP server).
+
+    Args:
+        latency (dict): Endpoint class -> seconds slept before answering.
+        rate_limit (float): API requests/second (profile + graphql) answered normally; above it, 429s.
+        throttle_probability (float): Share of API requests answered with a 429 regardless of the rate.
+        full_nodes (bool): Include the profile counts in follower nodes (no `web_profile_info` per follower).
+        seed (int): Seed of the synthetic followers.
+    """
+
+    def __init__(self, latency: dict = None, rate_limit: float = None, throttle_probability: float = 0.0,
+                 full_nodes: bool = False, seed: int = 42):
+        unknown = set(latency or {}) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"❌ Unknown endpoint classes {sorted(unknown)}, expected some of {ENDPOINTS}")
+        self.latency = dict.fromkeys(ENDPOINTS, 0.0)
+        self.latency.update(latency or {})
+        self.rate_limit = rate_limit
+        self.throttle_probability = throttle_probability
+        self.full_nodes = full_nodes
+        self.seed = seed
+        self.avatars, self.default_avatar = _render_avatars(seed)
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._tokens = rate_limit or 0.0
+        self._updated = time.monotonic()
+        self._stats = {endpoint: {"requests": 0, "throttled": 0, "bytes": 0} for endpoint in ENDPOINTS}
+
+    # Synthetic accounts
+
+    def follower(self, index: int):
+        """Returns the full profile node of follower `index`."""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        bot = rng.random() < BOT_FRACTION
+        stem = rng.choice(["anna", "leo", "mia", "noah", "ella", "finn", "lena", "paul", "sara", "tom"])
+        digits = str(rng.randint(100, 99999)) if bot or rng.random() < 0.2 else ""
+        username = f"{stem}{digits}_{_letters(index)}"
+
+        if bot:
+            counts = rng.randint(0, 50), rng.randint(500, 7500), rng.randint(0, 5)
+            biography = "" if rng.random() < 0.8 else "follow4follow"
+            default_pic = rng.random() < 0.7
+        else:
+            counts = rng.randint(50, 5000), rng.randint(50, 1500), rng.randint(10, 800)
+            biography = " ".join(rng.choice(["travel", "coffee", "photography", "music", "art", "life"])
+                                 for _ in range(rng.randint(0, 12)))
+            default_pic = rng.random() < 0.05
+
+        avatar = index % AVATAR_POOL + 1
+        asset = DEFAULT_AVATAR_ASSET if default_pic else f"{avatar}_{self.seed}_{avatar % AVATAR_IMAGES}_n.jpg"
+        return self._user_node(FOLLOWER_ID_BASE + index, username, counts, biography, rng.random() < 0.4,
+                               CDN_URL.format(asset=asset))
+
+    def target(self, followers: int):
+        """Returns the profile node of the `bench_<followers>` target account."""
+        return self._user_node(TARGET_ID_BASE + followers, f"bench_{followers}", (followers, 100, 50),
+                               "Synthetic benchmark account", False, CDN_URL.format(asset=f"1_{self.seed}_0_n.jpg"))
+
+    def profile(self, username: str):
+        """Returns the profile node of a target or follower username, or None if it does not exist."""
+        match = TARGET_PATTERN.match(username)
+        if match:
+            return self.target(int(match.group(1)))
+        _, separator, letters = username.rpartition("_")
+        if not separator or not letters.isalpha():
+            return None
+        node = self.follower(_index_of(letters))
+        return node if node["username"] == username else None
+
+    @staticmethod
+    def _user_node(user_id: int, username: str, counts: tuple, biography: str, is_private: bool, pic_url: str):
+        followers, following, posts = counts
+        return {
+            "id": str(user_id),
+            "username": username,
+            "full_name": username.split("_")[0].title(),
+            "biography": biography,
+            "edge_followed_by": {"count": followers},
+            "edge_follow": {"count": following},
+            "edge_owner_to_timeline_media": {"count": posts, "edges": [],
+                                             "page_info": {"has_next_page": False, "end_cursor": None}},
+            "is_private": is_private,
+            "is_verified": False,
+            "profile_pic_url": pic_url,
+            "profile_pic_url_hd": pic_url
+        }
+
+    def followers_page(self, variables: dict):
+        """GraphQL `edge_followed_by` page of a target, following the `first` / `after` variables."""
+        total = max(0, int(variables["id"]) - TARGET_ID_BASE) if int(variables["id"]) >= TARGET_ID_BASE else 0
+        start = _offset(variables["after"]) if variables.get("after") else 0
+        end = min(total, start + min(int(variables.get("first", 12)), MAX_PAGE_SIZE))
+
+        edges = []
+        for index in range(start, end):
+            node = self.follower(index)
+            if not self.full_nodes:
+                node = {key: node[key] for key in ("id", "username", "full_name", "profile_pic_url",
+                                                   "is_private", "is_verified")}
+                node.update(followed_by_viewer=False, requested_by_viewer=False)
+            edges.append({"node": node})
+
+        has_next = end < total
+        return {"count": total, "page_info": {"has_next_page": has_next, "end_cursor": _cursor(end) if has_next else None},
+                "edges": edges}
+
+    # Request handling
+
+    def _throttled(self, endpoint: str):
+        if endpoint not in RATE_LIMITED_ENDPOINTS:
+            return False
+        with self._lock:
+            if self.throttle_probability and self._rng.random() < self.throttle_probability:
+                return True
+            if not self.rate_limit:
+                return False
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def route(self, method: str, url: str, body: bytes = b""):
+        """
+        Answers one request.
+
+        Args:
+            method (str): "GET" or "POST".
+            url (str): Local path, `/<instagram host>/<path>?<query>`.
+            body (bytes): Request body.
+
+        Returns:
+            tuple: (endpoint class or None, status, headers dict, body bytes)
+        """
+        parts = urlsplit(url)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if host.endswith(("cdninstagram.com", "fbcdn.net")):
+            endpoint = "avatar"
+        elif path == "" and method == "GET":
+            endpoint = "home"
+        elif path.startswith("api/v1/web/accounts/login/ajax") and method == "POST":
+            endpoint = "login"
+        elif path.rstrip("/") == "api/v1/users/web_profile_info":
+            endpoint = "profile"
+        elif path.rstrip("/") == "graphql/query":
+            endpoint = "graphql"
+        else:
+            return None, 404, {"Content-Type": "application/json"}, b'{"status": "fail", "message": "Not found"}'
+
+        if self.latency[endpoint]:
+            time.sleep(self.latency[endpoint])
+
+        if self._throttled(endpoint):
+            status, headers = 429, {"Content-Type": "application/json"}
+            payload = json.dumps({"message": "Please wait a few minutes before you try again.", "status": "fail"}).encode()
+        else:
+            status, headers, payload = self._answer(endpoint, path, query, body)
+
+        with self._lock:
+            self._stats[endpoint]["requests"] += 1
+            self._stats[endpoint]["throttled"] += status == 429
+            self._stats[endpoint]["bytes"] += len(payload)
+        return endpoint, status, headers, payload
+
+    def _answer(self, endpoint: str, path: str, query: dict, body: bytes):
+        json_headers = {"Content-Type": "application/json; charset=utf-8"}
+        cookie = "{}={}; Domain=.instagram.com; Path=/"
+
+        if endpoint == "avatar":
+            asset = path.rsplit("/", 1)[-1]
+            if asset == DEFAULT_AVATAR_ASSET:
+                return 200, {"Content-Type": "image/jpeg"}, self.default_avatar
+            return 200, {"Content-Type": "image/jpeg"}, self.avatars[int(asset.split("_")[2]) % AVATAR_IMAGES]
+
+        if endpoint == "home":
+            return 200, {"Content-Type": "text/html", "Set-Cookie": cookie.format("csrftoken", "fakecsrftoken")}, b"<html></html>"
+
+        if endpoint == "login":
+            form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+            payload = {"authenticated": True, "user": True, "userId": str(FOLLOWER_ID_BASE - 1),
+                       "username": form.get("username"), "oneTapPrompt": False, "status": "ok"}
+            return 200, dict(json_headers, **{"Set-Cookie": cookie.format("csrftoken", "fakecsrftoken")}), \
+                json.dumps(payload).encode()
+
+        if endpoint == "profile":
+            node = self.profile(query.get("username", ""))
+            return 200, json_headers, json.dumps({"data": {"user": node}, "status": "ok"}).encode()
+
+        # graphql
+        if query.get("query_hash") != FOLLOWERS_QUERY_HASH:
+            return 400, json_headers, b'{"status": "fail", "message": "Unsupported query"}'
+        page = self.followers_page(json.loads(query["variables"]))
+        return 200, json_headers, json.dumps({"data": {"user": {"edge_followed_by": page}}, "status": "ok"}).encode()
+
+    def stats(self):
+        """Returns per-endpoint request, 429 and byte counters."""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self._stats.items()}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the pooled client sessions
+    wbufsize = 1 << 16  # Headers and body in one write (no delayed-ACK stalls)
+    disable_nagle_algorithm = True
+
+    def _handle(self, method: str):
+        app = self.server.app
+        if self.path == STATS_PATH:
+            status, headers, payload = 200, {"Content-Type": "application/json"}, json.dumps(app.stats()).encode()
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            _, status, headers, payload = app.route(method, self.path, self.rfile.read(length) if length else b"")
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve(options: dict, host: str, port: int, connection):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.app = FakeInstagram(**options)
+    connection.send(server.server_address[1])
+    server.serve_forever()
+
+class FakeInstagramServer:
+    """
+    Runs the stand-in in its own process (so it does not compete with the client for the GIL).
+
+    Takes the keyword arguments of `FakeInstagram`. Use as a context manager,
+    or call `start()` / `stop()`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        self.host = host
+        self.port = port
+        self.options = options
+        self._process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_serve, args=(self.options, self.host, self.port, sender),
+                                        name="fake-instagram", daemon=True)
+        self._process.start()
+        if not receiver.poll(30):
+            self.stop()
+            raise RuntimeError("❌ The fake Instagram server did not start.")
+        self.port = receiver.recv()
+        return self
+
+    def stats(self):
+        """Returns the server's per-endpoint counters."""
+        return requests.get(self.url + STATS_PATH, timeout=10).json()
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class _RedirectAdapter(HTTPAdapter):
+    """Sends Instagram requests to the stand-in, as `/<host>/<path>`, and attributes the responses to Instagram."""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        parts = urlsplit(request.url)
+        local = request.copy()
+        local.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        local.headers.pop("Host", None)
+        response = super().send(local, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies={})
+
+        # Cookies are set for .instagram.com: store them as coming from the requested Instagram URL
+        response.request = request
+        response.url = request.url
+        response.cookies = RequestsCookieJar()
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        return response
+
+@contextmanager
+def redirect_instagram(base_url: str, pool_size: int = 64):
+    """
+    Routes every Instagram request of this process (any `requests.Session`) to the stand-in at `base_url`.
+
+    All sessions share one connection pool to the stand-in.
+    """
+    adapter = _RedirectAdapter(base_url, pool_connections=1, pool_maxsize=pool_size)
+    original_get_adapter = requests.Session.get_adapter
+
+    def get_adapter(session, url):
+        if is_instagram_url(url):
+            return adapter
+        return original_get_adapter(session, url)
+
+    requests.Session.get_adapter = get_adapter
+    try:
+        yield adapter
+    finally:
+        requests.Session.get_adapter = original_get_adapter
+        adapter.close()
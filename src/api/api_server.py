@@ -1,16 +1,19 @@
 import os
 import sys
+import json
 import logging
-from flask import Flask, jsonify, request
+import re
+import time
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 
 # ✅ Explicitly ensure `src/` is in Python's path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../models")))
 
-# Import load_model function from model_loader.py
-from api.bot_detector import analyze_followers
-from data.scraper import get_followers_data
-from models.model_loader import load_model
+# The analysis modules (instaloader, PIL, scikit-learn...) are imported by the endpoints
+# that use them, so the server starts (and `main.py --api` boots) without loading them
+from api.jobs import JobManager, QueueFullError
+from monitoring.metrics import get_metrics, increment, observe
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,16 +21,250 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Load XGBoost model and TF-IDF vectorizer at startup
-logger.info("🔄 Loading XGBoost model and TF-IDF vectorizer...")
-model, vectorizer = load_model()
-logger.info("✅ Model loaded successfully!")
+# Instagram usernames: letters, digits, periods and underscores, at most 30 characters
+USERNAME_PATTERN = re.compile(r"^[A-Za-z0-9._]{1,30}$")
+
+# The XGBoost model and TF-IDF vectorizer are loaded lazily on the first prediction.
+# Set PRELOAD_MODEL=1 (e.g. with `gunicorn --preload`) to load them once in the
+# parent process so forked workers share the pages copy-on-write.
+if os.environ.get("PRELOAD_MODEL") == "1":
+    from models.model_loader import get_registry
+    logger.info("🔄 Preloading XGBoost model and TF-IDF vectorizer...")
+    get_registry().preload()
+    logger.info("✅ Model loaded successfully!")
+
+def build_analysis_response(username: str, bot_percentage: float, results):
+    """Builds the JSON-serializable analysis result for a user."""
+    return {
+        "username": username,
+        "bot_percentage": f"{bot_percentage:.2f}%",
+        "followers_analyzed": len(results),
+        "follower_predictions": results.to_records()
+    }
+
+def build_incremental_response(username: str, report: dict, results):
+    """Builds the JSON-serializable result of an incremental analysis, with its churn statistics."""
+    return dict(build_analysis_response(username, report["bot_percentage"], results), churn={
+        "previous_followers": report["previous_followers"],
+        "previous_bot_percentage": f"{report['previous_bot_percentage']:.2f}%",
+        "followers_added": report["added"],
+        "followers_removed": report["removed"],
+        "churn_percentage": f"{report['churn_percentage']:.2f}%",
+        "scores_reused": report["reused_scores"],
+        "scores_refreshed": report["rescored"]
+    })
+
+def build_sample_response(username: str, estimate: dict, results):
+    """Builds the JSON-serializable result of a sampled analysis."""
+    return {
+        "username": username,
+        "sampled": True,
+        "bot_percentage": f"{estimate['bot_percentage']:.2f}%",
+        "confidence_interval": {
+            "low": f"{estimate['ci_low']:.2f}%",
+            "high": f"{estimate['ci_high']:.2f}%",
+            "confidence": estimate["confidence"],
+            "target_width_reached": estimate["ci_width_reached"]
+        },
+        "followers_total": estimate["population"],
+        "followers_analyzed": estimate["sample_size"],
+        "follower_predictions": results.to_records()
+    }
+
+def is_valid_username(username):
+    """Whether `username` is a string made of Instagram's username characters."""
+    return isinstance(username, str) and USERNAME_PATTERN.match(username) is not None
+
+def parse_sample_options(options):
+    """
+    Reads the sampling options (`sample`, `ci_width`, `confidence`, `max_sample`) from a mapping.
+
+    Returns:
+        dict: Keyword arguments for `sample_account`, or None if sampling was not requested.
+
+    Raises:
+        ValueError: If an option is out of range.
+    """
+    from api.sampling import DEFAULT_CI_WIDTH, DEFAULT_CONFIDENCE, DEFAULT_MAX_SAMPLE
+
+    if str(options.get("sample", "")).lower() not in ("1", "true", "yes"):
+        return None
+
+    ci_width = float(options.get("ci_width", DEFAULT_CI_WIDTH))
+    confidence = float(options.get("confidence", DEFAULT_CONFIDENCE))
+    max_sample = int(options.get("max_sample", DEFAULT_MAX_SAMPLE))
+    if not 0 < ci_width < 1 or not 0 < confidence < 1 or max_sample < 1:
+        raise ValueError("ci_width and confidence must be in (0, 1) and max_sample positive.")
+
+    return {"ci_width": ci_width, "confidence": confidence, "max_sample": max_sample}
+
+def run_analysis_job(job, insta_user: str, insta_pass: str, sample_options: dict = None):
+    """Runs a full (or sampled) follower crawl and bot analysis for a job, reporting progress on it."""
+    from api.pipeline import analyze_account
+    from api.sampling import sample_account
+
+    username = job.username
+
+    if sample_options is not None:
+        job.update_progress(stage="sampling", followers_analyzed=0)
+        estimate, results = sample_account(
+            username, insta_user, insta_pass, **sample_options,
+            progress_callback=lambda analyzed, bot_fraction: job.update_progress(
+                followers_analyzed=analyzed, bot_percentage=round(bot_fraction * 100, 2))
+        )
+        if results.empty:
+            raise ValueError(f"User {username} not found or private.")
+        return build_sample_response(username, estimate, results)
+
+    # Enumeration, enrichment and scoring run concurrently, so both counters advance together
+    job.update_progress(stage="analyzing", followers_fetched=0, followers_analyzed=0)
+    bot_percentage, results = analyze_account(
+        username, insta_user, insta_pass,
+        progress_callback=lambda analyzed, enumerated: job.update_progress(followers_analyzed=analyzed),
+        crawl_progress_callback=lambda fetched, total: job.update_progress(followers_fetched=fetched,
+                                                                           followers_total=total)
+    )
+    if results.empty:
+        raise ValueError(f"User {username} not found or private.")
+
+    return build_analysis_response(username, bot_percentage, results)
+
+# Background analysis jobs (bounded pool with a queue-depth limit)
+job_manager = JobManager(
+    run_analysis_job,
+    max_workers=int(os.environ.get("JOB_WORKERS", 2)),
+    max_queue_depth=int(os.environ.get("JOB_QUEUE_DEPTH", 16))
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Counts every answered request and records its latency (streams: until the first byte)."""
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    increment("http_requests_total", endpoint=endpoint, method=request.method, status=response.status_code)
+    observe("http_request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
+
+def collect_metrics():
+    """Reads the counters and state kept by the caches, the scheduler, the model registry and the jobs."""
+    from data.image_hasher import get_image_hasher
+    from data.profile_cache import get_profile_cache
+    from data.request_scheduler import get_scheduler
+    from data.scraper import profile_fetch_stats
+    from models.model_loader import get_registry
+
+    profile_cache = get_profile_cache().stats()
+    hasher = get_image_hasher().stats()
+    scheduler = get_scheduler().metrics()
+    model = get_registry().stats()
+
+    collected = {
+        "profile_cache_events_total": ("counter", "Profile cache lookups by outcome, and evictions.", {
+            (("event", event),): profile_cache[event]
+            for event in ("memory_hits", "disk_hits", "misses", "expired", "evictions")}),
+        "profile_cache_entries": ("gauge", "Profile records held per cache tier.", {
+            (("tier", "memory"),): profile_cache["memory_entries"], (("tier", "disk"),): profile_cache["disk_entries"]}),
+        "image_hash_events_total": ("counter", "Profile-picture hash requests by outcome.", {
+            (("event", event),): hasher[event] for event in ("hits", "downloads", "coalesced", "errors")}),
+        "profile_fetches_total": ("counter", "Follower profiles read from the follower list or fetched in full.", {
+            (("kind", "reused"),): profile_fetch_stats["profiles_reused"],
+            (("kind", "full"),): profile_fetch_stats["full_fetches"]}),
+        "scheduler_requests_per_minute": ("gauge", "Instagram requests issued over the last minute.", {
+            (): scheduler["current_rate_per_minute"]}),
+        "scheduler_queue_length": ("gauge", "Requests waiting for a token or a cooldown.", {
+            (): scheduler["queue_length"]}),
+        "scheduler_throttle_events_total": ("counter", "429s and connection errors seen by the scheduler.", {
+            (): scheduler["throttle_events"]}),
+        "scheduler_session_rate_per_hour": ("gauge", "Current request budget of each scraping session.", {
+            (("session", name),): session["rate_per_hour"] for name, session in scheduler["sessions"].items()}),
+        "jobs_queue_depth": ("gauge", "Analysis jobs waiting for a worker.", {(): job_manager.queue_depth()}),
+        "process_resident_memory_bytes": ("gauge", "Resident set size of this process.", {
+            (): model["current_rss_bytes"]}),
+    }
+    if model["loaded"]:
+        collected["model_info"] = ("gauge", "The model being served (always 1).", {
+            (("feature_mode", model["feature_mode"]), ("backend", model["backend"]),
+             ("version", model.get("bundle_version", "pickle"))): 1})
+    return collected
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus scrape endpoint (text exposition format).
+
+    Per-stage timings (`botdetector_stage_seconds{stage=...}`: pagination, profile fetches,
+    avatar downloads, image hashing, featurization, scoring), model load times, API request
+    counts and latencies, plus the cache, scheduler and job counters. Values are per process.
+    """
+    return Response(get_metrics().render(collect_metrics()), mimetype="text/plain; version=0.0.4")
 
 @app.route("/")
 def root():
     """Root endpoint to verify API status."""
     return jsonify({"message": "Instagram Bot Detector API is running."})
 
+@app.route("/model/stats", methods=["GET"])
+def model_stats():
+    """Returns load-time and memory statistics of the shared model registry."""
+    from models.model_loader import get_registry
+
+    return jsonify(get_registry().stats())
+
+@app.route("/model/reload", methods=["POST"])
+def reload_model():
+    """
+    Hot-swaps the served model to a bundle version without dropping in-flight requests.
+
+    Args:
+    - version (str): Bundle version to make current (optional; default reloads the current version).
+    - features (str): Feature pipeline of the bundle (optional; defaults to MODEL_FEATURES).
+
+    Other worker processes switch to the new current version within MODEL_RELOAD_INTERVAL seconds.
+    """
+    from models.bundle import list_versions
+    from models.model_loader import get_registry
+
+    data = request.get_json(silent=True) or {}
+    version = data.get("version")
+    try:
+        registry = get_registry(data.get("features"))
+        # Only an existing bundle name: the version is joined into a path under the bundle directory
+        if version is not None and (not isinstance(version, str) or "/" in version or "\\" in version
+                                    or version not in list_versions(registry.bundle_dir or "")):
+            return jsonify({"error": f"Unknown model bundle version {version!r}."}), 400
+        stats = registry.reload(version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"❌ Model reload failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    logger.info(f"✅ Serving model bundle {stats['bundle_version']}")
+    return jsonify(stats)
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Returns hit/miss/eviction counters of the profile and profile-picture caches."""
+    from data.image_hasher import get_image_hasher
+    from data.profile_cache import get_profile_cache
+
+    return jsonify({
+        "profiles": get_profile_cache().stats(),
+        "profile_pictures": get_image_hasher().stats()
+    })
+
+@app.route("/scheduler/stats", methods=["GET"])
+def scheduler_stats():
+    """Returns the request scheduler's current rate, queue length and throttle events."""
+    from data.request_scheduler import get_scheduler
+
+    return jsonify(get_scheduler().metrics())
+
 @app.route("/analyze/<username>", methods=["GET"])
 def analyze_user(username: str):
     """
@@ -37,10 +274,21 @@ def analyze_user(username: str):
     - username (str): Instagram username to analyze.
     - insta_user (str): Instagram login username (provided in request).
     - insta_pass (str): Instagram login password (provided in request).
+    - sample (bool): Estimate from a random sample instead of analyzing every follower (optional).
+    - ci_width, confidence, max_sample: Sampling stopping rule and budget (optional).
+    - incremental (bool): Only analyze the followers changed since the previous stored crawl (optional).
 
     Returns:
-    - dict: Analysis results including bot percentage and follower predictions.
+    - dict: Analysis results including bot percentage and follower predictions
+      (and the confidence interval when sampling, the churn statistics when incremental).
     """
+    from api.incremental import analyze_account_incremental
+    from api.pipeline import analyze_account
+    from api.sampling import sample_account
+
+    if not is_valid_username(username):
+        return jsonify({"error": "Invalid target username."}), 400
+
     try:
         logger.info(f"🔍 Fetching followers of {username}...")
 
@@ -53,28 +301,193 @@ def analyze_user(username: str):
             logger.error("❌ Missing Instagram credentials in request.")
             return jsonify({"error": "Instagram username and password are required."}), 400
 
-        # ✅ Fetch followers using login credentials
-        followers = get_followers_data(username, insta_user, insta_pass)
-        if not followers:
+        try:
+            sample_options = parse_sample_options(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid sampling options: {str(e)}"}), 400
+
+        # ✅ Estimate from a random sample of followers until the interval is narrow enough
+        if sample_options is not None:
+            estimate, results = sample_account(username, insta_user, insta_pass, **sample_options)
+            if results.empty:
+                logger.error(f"❌ Error fetching followers for {username}.")
+                return jsonify({"error": "User not found or private."}), 404
+
+            logger.info(f"✅ Sampled {len(results)} of {estimate['population']} followers of {username}.")
+            return jsonify(build_sample_response(username, estimate, results))
+
+        # ✅ Reuse the scores of the previous crawl and only analyze the followers that changed
+        if str(request.args.get("incremental", "")).lower() in ("1", "true", "yes"):
+            report, results = analyze_account_incremental(username, insta_user, insta_pass)
+            if results.empty:
+                logger.error(f"❌ Error fetching followers for {username}.")
+                return jsonify({"error": "User not found or private."}), 404
+
+            logger.info(f"✅ Analyzed {report['added'] + report['rescored']} changed followers of {username} "
+                        f"({report['reused_scores']} stored scores reused).")
+            return jsonify(build_incremental_response(username, report, results))
+
+        # ✅ Fetch and analyze followers concurrently using login credentials
+        bot_percentage, results = analyze_account(username, insta_user, insta_pass)
+        if results.empty:
             logger.error(f"❌ Error fetching followers for {username}.")
             return jsonify({"error": "User not found or private."}), 404
 
-        logger.info(f"✅ Retrieved {len(followers)} followers for {username}. Analyzing bot percentage...")
-
-        # ✅ Analyze followers to detect bots
-        bot_percentage, df = analyze_followers(followers)
+        logger.info(f"✅ Analyzed {len(results)} followers of {username}.")
 
-        return jsonify({
-            "username": username,
-            "bot_percentage": f"{bot_percentage:.2f}%",
-            "followers_analyzed": len(df),
-            "follower_predictions": df.to_dict(orient="records")
-        })
+        return jsonify(build_analysis_response(username, bot_percentage, results))
 
     except Exception as e:
         logger.error(f"❌ Error analyzing {username}: {str(e)}")
         return jsonify({"error": "Internal server error."}), 500
 
+# Streaming responses: followers per NDJSON batch frame, and the longest gap between two progress frames
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 64))
+STREAM_PROGRESS_INTERVAL = float(os.environ.get("STREAM_PROGRESS_INTERVAL", 5))
+
+def _ndjson_frame(frame: dict):
+    return json.dumps(frame, separators=(",", ":")) + "\n"
+
+def _progress_frame(progress: dict):
+    return _ndjson_frame({
+        "type": "progress",
+        "followers_fetched": progress["enumerated"],
+        "followers_processed": progress["processed"],
+        "followers_analyzed": progress["analyzed"],
+        "bots_detected": progress["bots"],
+        "bot_percentage": round(progress["bot_percentage"], 2)
+    })
+
+@app.route("/analyze/<username>/stream", methods=["GET"])
+def analyze_user_stream(username: str):
+    """
+    Streaming variant of `/analyze/<username>`, answered as NDJSON (`application/x-ndjson`).
+
+    Each line is one frame:
+    - `{"type": "followers", "followers": [...]}`: a batch of scored followers, sent as soon as it is scored.
+    - `{"type": "progress", ...}`: follower counts and the running bot percentage, after every batch
+      and at least every STREAM_PROGRESS_INTERVAL seconds.
+    - `{"type": "result", ...}` or `{"type": "error", ...}`: the final frame.
+
+    The server never holds more than one batch of results; a client disconnect cancels the crawl.
+    """
+    from api.pipeline import iter_account_analysis
+
+    if not is_valid_username(username):
+        return jsonify({"error": "Invalid target username."}), 400
+
+    insta_user = request.args.get("insta_user")
+    insta_pass = request.args.get("insta_pass")
+
+    if not insta_user or not insta_pass:
+        logger.error("❌ Missing Instagram credentials in request.")
+        return jsonify({"error": "Instagram username and password are required."}), 400
+
+    def generate():
+        progress = None
+        try:
+            logger.info(f"🔍 Streaming analysis of {username}...")
+            batches = iter_account_analysis(username, insta_user, insta_pass, batch_size=STREAM_BATCH_SIZE,
+                                            progress_interval=STREAM_PROGRESS_INTERVAL)
+            for batch, progress in batches:
+                if len(batch):
+                    yield _ndjson_frame({"type": "followers", "followers": batch.to_records()})
+                yield _progress_frame(progress)
+
+            if progress is None or progress["analyzed"] == 0:
+                logger.error(f"❌ Error fetching followers for {username}.")
+                yield _ndjson_frame({"type": "error", "error": "User not found or private."})
+                return
+
+            logger.info(f"✅ Streamed {progress['analyzed']} followers of {username}.")
+            yield _ndjson_frame({
+                "type": "result",
+                "username": username,
+                "bot_percentage": f"{progress['bot_percentage']:.2f}%",
+                "followers_analyzed": progress["analyzed"]
+            })
+
+        except Exception as e:
+            logger.error(f"❌ Error analyzing {username}: {str(e)}")
+            yield _ndjson_frame({"type": "error", "error": "Internal server error."})
+
+    # Disable proxy buffering so frames reach the client as they are produced
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"})
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Submits an asynchronous analysis job for an Instagram user.
+
+    Expects a JSON body with `username`, `insta_user` and `insta_pass`, and optionally
+    `sample` (with `ci_width`, `confidence`, `max_sample`) for a sampled estimate.
+    If a job of the same kind for the same username is already queued or running,
+    that job is returned instead.
+
+    Returns:
+    - dict: The job status (202 if a new job was queued, 200 if an in-flight job was reused).
+    """
+    payload = request.get_json(silent=True) or {}
+    username = payload.get("username")
+    insta_user = payload.get("insta_user")
+    insta_pass = payload.get("insta_pass")
+
+    if not username:
+        return jsonify({"error": "Target username is required."}), 400
+    if not is_valid_username(username):
+        return jsonify({"error": "Invalid target username."}), 400
+    if not insta_user or not insta_pass:
+        logger.error("❌ Missing Instagram credentials in request.")
+        return jsonify({"error": "Instagram username and password are required."}), 400
+
+    try:
+        sample_options = parse_sample_options(payload)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid sampling options: {str(e)}"}), 400
+
+    key = username.lower()
+    if sample_options is not None:
+        key += ":sample:{ci_width}:{confidence}:{max_sample}".format(**sample_options)
+
+    try:
+        job, created = job_manager.submit(username, insta_user, insta_pass, sample_options, key=key)
+    except QueueFullError as e:
+        logger.warning(f"⚠️ Rejecting job for {username}: {str(e)}")
+        return jsonify({"error": "Too many pending jobs, retry later."}), 429, {"Retry-After": "60"}
+
+    if created:
+        logger.info(f"📥 Queued job {job.id} for {username}.")
+    else:
+        logger.info(f"🔗 Attached request for {username} to in-flight job {job.id}.")
+
+    return jsonify(job.to_dict()), 202 if created else 200, {"Location": f"/jobs/{job.id}"}
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    """Returns the status and progress of an analysis job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id: str):
+    """
+    Returns the result of an analysis job.
+
+    Returns 202 with the job status while the job is still queued or running,
+    and 500 with the error if it failed.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    if job.error is not None:
+        return jsonify({"error": job.error, "job_id": job.id}), 500
+    return jsonify(job.result)
+
 def start_api():
     """Function to start FastAPI server with Uvicorn."""
     logger.info("🚀 Starting API server at http://0.0.0.0:8000")
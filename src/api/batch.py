@@ -0,0 +1,195 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import closing
+from multiprocessing import get_context
+import instaloader
+from api.bot_detector import DEFAULT_BATCH_SIZE
+from api.pipeline import DEFAULT_CONCURRENCY, iter_enriched
+from api.results import FollowerResults
+from data.follower_store import FollowerStoreWriter, new_session_path
+from data.scraper import get_followers_data
+from models.inferencer import predict_batch
+from models.model_loader import get_registry
+from monitoring.metrics import increment
+
+# Processes scoring the batches of a multi-target analysis (0 scores in the calling process)
+SCORING_WORKERS = int(os.environ.get("BATCH_SCORING_WORKERS", os.cpu_count() or 1))
+
+# Batches submitted per scoring process before the consumer waits for the oldest one
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+def read_targets(path: str):
+    """
+    Reads target usernames from a text file: one per line, `#` starts a comment.
+
+    Returns:
+        list(str): The usernames in file order, without duplicates.
+    """
+    targets = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            username = line.split("#", 1)[0].strip().lstrip("@")
+            if username and username not in targets:
+                targets.append(username)
+    return targets
+
+def _load_scoring_model():
+    """Scoring process initializer: loads the model once, before the first batch arrives."""
+    get_registry().get()
+
+def _score_records(records):
+    """Scores one batch in a scoring process and returns its bot probabilities."""
+    _, probabilities = predict_batch(records)
+    return probabilities
+
+def _start_scoring_pool(workers: int):
+    if workers <= 0:
+        return None
+    # Spawned, not forked: the parent already runs the scheduler, hashing and enrichment threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=_load_scoring_model)
+
+def _submit_batch(pool, records):
+    if pool is not None:
+        return pool.submit(_score_records, records)
+    future = Future()
+    future.set_result(predict_batch(records)[1])
+    return future
+
+def analyze_targets(targets, insta_user: str, insta_pass: str, concurrency: int = DEFAULT_CONCURRENCY,
+                    batch_size: int = DEFAULT_BATCH_SIZE, workers: int = SCORING_WORKERS, progress_callback=None):
+    """
+    Analyzes the followers of several accounts, enriching and scoring each unique follower once.
+
+    The targets are crawled one after the other into a single pipeline: a follower
+    already enumerated for an earlier target is only added to that target's
+    audience, not fetched, hashed or scored again. Scoring runs on a pool of
+    `workers` processes (featurization and `predict_proba` hold the GIL, so
+    threads would compete with the enrichment stage). Once every target is
+    crawled, the scores are fanned back out to per-target bot percentages.
+
+    Args:
+        targets (list): Instagram usernames to analyze.
+        insta_user (str): Your Instagram username.
+        insta_pass (str): Your Instagram password.
+        concurrency (int): Number of enrichment threads.
+        batch_size (int): Number of followers scored per model call.
+        workers (int): Number of scoring processes (0 scores in this process).
+        progress_callback (callable): Optional `callback(processed, enumerated)` called after each unique follower.
+
+    Returns:
+        tuple: (report dict with a `targets` dict of per-target `followers`, `analyzed`, `bots`,
+        `bot_percentage` and `error`, and the `memberships`, `unique_followers`, `analyzed` and `bots`
+        totals, FollowerResults of the unique followers)
+    """
+    targets = list(dict.fromkeys(targets))
+    audiences = {}  # username -> bit mask of the targets it follows
+    errors = {}
+    enumerated = [0]
+
+    def produce(put):
+        for index, target in enumerate(targets):
+            bit = 1 << index
+
+            def add(username, follower):
+                mask = audiences.get(username)
+                audiences[username] = bit if mask is None else mask | bit
+                if mask is None:  # ✅ First time this follower is seen across all targets
+                    enumerated[0] += 1
+                    put(follower)
+
+            try:
+                usernames = get_followers_data(target, insta_user, insta_pass, store=store,
+                                               follower_callback=lambda follower: add(follower.username, follower))
+            except instaloader.exceptions.InstaloaderException as e:
+                print(f"❌ Could not fetch the followers of {target}: {e}")
+                errors[target] = str(e)
+                continue
+
+            # Followers retrieved by an interrupted earlier run are not passed to the callback
+            for username in usernames:
+                if not audiences.get(username, 0) & bit:
+                    add(username, username)
+
+    results = FollowerResults()
+    in_flight = deque()
+    processed = 0
+    chunk_usernames, chunk_records = [], []
+    pool = _start_scoring_pool(workers)
+
+    def collect():
+        usernames, records, future = in_flight.popleft()
+        probabilities = future.result()
+        bots = results.append_batch(usernames, records, probabilities)
+        if pool is not None:  # Counted by `predict_batch` in this process otherwise
+            increment("followers_scored_total", len(records))
+            increment("bots_detected_total", bots)
+
+    def submit():
+        in_flight.append((chunk_usernames, chunk_records, _submit_batch(pool, chunk_records)))
+        while len(in_flight) > max(workers, 1) * BATCHES_IN_FLIGHT_PER_WORKER:
+            collect()
+
+    try:
+        with FollowerStoreWriter(new_session_path(f"batch-{len(targets)}-targets")) as store, \
+                closing(iter_enriched(produce, concurrency, store)) as followers:
+            for username, record in followers:
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, enumerated[0])
+
+                if record is None:
+                    continue  # Skip if data retrieval fails
+
+                chunk_usernames.append(username)
+                chunk_records.append(record)
+                if len(chunk_records) >= batch_size:
+                    submit()
+                    chunk_usernames, chunk_records = [], []
+
+            if not errors:
+                store.complete()
+
+        if chunk_records:
+            submit()
+        while in_flight:
+            collect()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # ✅ Fan the scores out to every target each follower follows
+    audience_sizes = [0] * len(targets)
+    analyzed = [0] * len(targets)
+    bots = [0] * len(targets)
+    for mask in audiences.values():
+        while mask:
+            low = mask & -mask
+            audience_sizes[low.bit_length() - 1] += 1
+            mask ^= low
+    for username, is_bot in zip(results.usernames, results.column("is_bot").tolist()):
+        mask = audiences[username]
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            analyzed[index] += 1
+            bots[index] += is_bot
+            mask ^= low
+
+    report = {
+        "targets": {
+            target: {
+                "followers": audience_sizes[index],
+                "analyzed": analyzed[index],
+                "bots": bots[index],
+                "bot_percentage": (bots[index] / audience_sizes[index]) * 100 if audience_sizes[index] else 0,
+                "error": errors.get(target)
+            }
+            for index, target in enumerate(targets)
+        },
+        "memberships": sum(audience_sizes),
+        "unique_followers": len(audiences),
+        "analyzed": len(results),
+        "bots": results.bot_count()
+    }
+    return report, results
@@ -1,62 +1,80 @@
-import pandas as pd
-from models.model_loader import load_model
-from data.scraper import get_instagram_data
-from models.inferencer import predict_user
+from api.results import FollowerResults
+from data.follower_store import iter_record_batches
+from models.inferencer import predict_batch
 
-# Load the trained XGBoost model and vectorizer
-model, vectorizer = load_model()
+# Number of followers scored per model call
+DEFAULT_BATCH_SIZE = 512
 
-def analyze_followers(followers):
+def score_chunk(usernames, records, results: FollowerResults):
+    """Scores a chunk of profile records and appends them to `results`. Returns the bots found."""
+    _, probabilities = predict_batch(records)
+    return results.append_batch(usernames, records, probabilities)
+
+def analyze_followers(followers, batch_size: int = DEFAULT_BATCH_SIZE, progress_callback=None):
     """
     Analyzes a list of Instagram followers and calculates the percentage of bots.
 
+    Profiles are scored in chunks of `batch_size` through `predict_batch`.
+
     Args:
         followers (list): List of Instagram usernames.
+        batch_size (int): Number of followers scored per model call.
+        progress_callback (callable): Optional `callback(processed, total)` called after each follower.
 
     Returns:
-        tuple: (bot_percentage, DataFrame with follower predictions)
+        tuple: (bot_percentage, FollowerResults with follower predictions and probabilities)
     """
+    from data.scraper import get_instagram_data  # Scraping only; scoring stored records does not load instaloader
+
     bot_count = 0
-    follower_details = []
+    results = FollowerResults()
+    chunk_usernames, chunk_records = [], []
 
-    for follower in followers:
+    for processed, follower in enumerate(followers, start=1):
         follower_data = get_instagram_data(follower)  # Extract profile info
 
+        if progress_callback:
+            progress_callback(processed, len(followers))
+
         if not follower_data:
             continue  # Skip if data retrieval fails
 
-        # Generate text features for TF-IDF
-        text_features = f"User has {follower_data['followers']} followers, follows {follower_data['following']} accounts, " \
-                        f"has a biography of {follower_data['bio_length']} characters, posted {follower_data['posts']} media items, " \
-                        f"{'has' if follower_data['has_profile_pic'] else 'does not have'} a profile picture, " \
-                        f"{'has' if follower_data['is_private'] else 'does not have'} a private account, " \
-                        f"username contains {follower_data['digit_count']} digits and has {follower_data['username_length']} characters."
-
-        # Extract numerical features
-        numerical_features = [
-            follower_data["followers"] / (follower_data["following"] + 1),  # Follower-to-Following Ratio
-            1 if follower_data["digit_count"] > 0 else 0,  # Has numbers in username
-            (follower_data["posts"] + 1) / (follower_data["followers"] + 1)  # Engagement Score
-        ]
-
-        # Make a prediction using the model
-        prediction = predict_user(text_features, numerical_features)
-
-        # Track bot count
-        if prediction == "Bot Detected":
-            bot_count += 1
-
-        # Store follower details
-        follower_details.append({
-            "username": follower,
-            "prediction": prediction,
-            "profile_data": follower_data
-        })
-
-    # Convert follower details into a DataFrame
-    df = pd.DataFrame(follower_details)
+        chunk_usernames.append(follower)
+        chunk_records.append(follower_data)
+
+        if len(chunk_records) >= batch_size:
+            bot_count += score_chunk(chunk_usernames, chunk_records, results)
+            chunk_usernames, chunk_records = [], []
+
+    # Score the remaining partial chunk
+    if chunk_records:
+        bot_count += score_chunk(chunk_usernames, chunk_records, results)
 
     # Calculate bot percentage
     bot_percentage = (bot_count / len(followers)) * 100 if followers else 0
 
-    return bot_percentage, df
+    return bot_percentage, results
+
+def analyze_stored_followers(path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Analyzes follower records stored by a crawl session without scraping them again.
+
+    Records are read lazily from the NDJSON session file and scored in chunks.
+
+    Args:
+        path (str): NDJSON session file written by `get_followers_data`.
+        batch_size (int): Number of followers scored per model call.
+
+    Returns:
+        tuple: (bot_percentage, FollowerResults with follower predictions and probabilities)
+    """
+    bot_count = 0
+    results = FollowerResults()
+
+    for records in iter_record_batches(path, batch_size):
+        usernames = [record.pop("username", None) for record in records]
+        bot_count += score_chunk(usernames, records, results)
+
+    bot_percentage = (bot_count / len(results)) * 100 if len(results) else 0
+
+    return bot_percentage, results
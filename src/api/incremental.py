@@ -0,0 +1,194 @@
+import os
+import time
+from contextlib import closing
+import numpy as np
+from api.bot_detector import DEFAULT_BATCH_SIZE
+from api.pipeline import DEFAULT_CONCURRENCY, iter_enriched
+from api.results import PROFILE_COLUMN_TYPES, FollowerResults
+from data.follower_store import FollowerStoreWriter, find_latest_session, iter_record_batches, new_session_path
+from data.scraper import get_followers_data
+from models.inferencer import predict_batch
+
+# Seconds a stored score is reused before the follower is fetched and scored again
+SCORE_TTL = float(os.environ.get("INCREMENTAL_SCORE_TTL", 7 * 24 * 3600))
+
+def load_snapshot(path: str, started: float, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Loads the scored followers of a crawl session file column-wise.
+
+    Records stored without a score (sessions of a full analysis) are scored
+    from their stored fields, without touching the network.
+
+    Args:
+        path (str): NDJSON session file.
+        started (float): Session start (epoch seconds), the score time of records stored without one.
+        batch_size (int): Number of records scored per model call.
+
+    Returns:
+        tuple: (FollowerResults, np.ndarray of score times, dict of username -> row)
+    """
+    results = FollowerResults()
+    scored_at = []
+
+    for records in iter_record_batches(path, batch_size):
+        records = [record for record in records if record.get("username")]
+        usernames = [record.pop("username") for record in records]
+        probabilities = [record.pop("bot_probability", None) for record in records]
+        scored_at += [record.pop("scored_at", started) for record in records]
+
+        unscored = [i for i, probability in enumerate(probabilities) if probability is None]
+        if unscored:
+            _, scores = predict_batch([records[i] for i in unscored])
+            for i, score in zip(unscored, scores.tolist()):
+                probabilities[i] = score
+
+        results.append_batch(usernames, records, probabilities)
+
+    rows = {username: row for row, username in enumerate(results.usernames)}
+    return results, np.asarray(scored_at, dtype=np.float64), rows
+
+def _write_scored(store: FollowerStoreWriter, results: FollowerResults, scored_at):
+    """Appends scored followers to a session file, with their score and its time."""
+    columns = {name: results.column(name).tolist() for name in PROFILE_COLUMN_TYPES}
+    probabilities = results.column("bot_probability").tolist()
+    for i, username in enumerate(results.usernames):
+        record = {name: values[i] for name, values in columns.items()}
+        store.write(dict(record, username=username, bot_probability=probabilities[i], scored_at=scored_at[i]))
+
+def analyze_account_incremental(username: str, insta_user: str, insta_pass: str, ttl: float = SCORE_TTL,
+                                concurrency: int = DEFAULT_CONCURRENCY, batch_size: int = DEFAULT_BATCH_SIZE,
+                                progress_callback=None, crawl_progress_callback=None):
+    """
+    Re-analyzes an account against its previous crawl session, scoring only what changed.
+
+    The follower list is paginated as usual (one request per page), and diffed
+    against the latest stored session of `username`:
+    - Added followers are fetched, hashed and scored.
+    - Retained followers keep their stored score while it is younger than `ttl`;
+      older ones are fetched and scored again (their old score is kept if that fails).
+    - Removed followers are dropped.
+
+    The run is stored as a new session holding every current follower with its
+    score, so the next run diffs against it. Without a previous session every
+    follower counts as added.
+
+    Args:
+        username (str): The target Instagram username.
+        insta_user (str): Your Instagram username.
+        insta_pass (str): Your Instagram password.
+        ttl (float): Seconds a stored score is reused.
+        concurrency (int): Number of enrichment threads.
+        batch_size (int): Number of followers scored per model call.
+        progress_callback (callable): Optional `callback(processed, enumerated)` for the followers being scored.
+        crawl_progress_callback (callable): Optional `callback(retrieved, total)` for the enumeration stage.
+
+    Returns:
+        tuple: (report dict with `bot_percentage`, `followers`, `analyzed`, `bots`, the churn statistics
+        `previous_followers`, `previous_bot_percentage`, `added`, `removed`, `retained`, `churn_percentage`,
+        `reused_scores`, `rescored` and the `previous_snapshot` and `snapshot` paths,
+        FollowerResults of every current follower)
+    """
+    previous_path, previous_started = find_latest_session(username)
+    if previous_path is not None:
+        print(f"🔍 Diffing against the snapshot of {previous_started:%Y-%m-%d %H:%M} ({previous_path})")
+        previous, scored_at, rows = load_snapshot(previous_path, previous_started.timestamp(), batch_size)
+    else:
+        print(f"⚠️ No previous snapshot of {username}, analyzing every follower.")
+        previous, scored_at, rows = FollowerResults(), np.empty(0, dtype=np.float64), {}
+
+    now = time.time()
+    reusable = scored_at >= now - ttl
+    retained = np.zeros(len(previous), dtype=np.bool_)   # Still a follower
+    refreshed = np.zeros(len(previous), dtype=np.bool_)  # Stale score replaced in this run
+    added = set()
+    enumerated = [0]
+
+    def produce(put):
+        def add(name, follower):
+            row = rows.get(name)
+            if row is None:
+                if name in added:
+                    return
+                added.add(name)
+            else:
+                if retained[row]:
+                    return
+                retained[row] = True
+                if reusable[row]:
+                    return  # ✅ Stored score is still fresh
+            enumerated[0] += 1
+            put(follower)
+
+        usernames = get_followers_data(username, insta_user, insta_pass, progress_callback=crawl_progress_callback,
+                                       store=store, follower_callback=lambda follower: add(follower.username, follower))
+
+        # Followers retrieved by an interrupted earlier run are not passed to the callback
+        for name in usernames:
+            add(name, name)
+
+    scored = FollowerResults()
+    processed = 0
+    chunk_usernames, chunk_records = [], []
+
+    def score():
+        batch = FollowerResults()
+        _, probabilities = predict_batch(chunk_records)
+        batch.append_batch(chunk_usernames, chunk_records, probabilities)
+        _write_scored(store, batch, [time.time()] * len(batch))
+        scored.extend(batch)
+        for name in chunk_usernames:
+            row = rows.get(name)
+            if row is not None:
+                refreshed[row] = True
+
+    with FollowerStoreWriter(new_session_path(username)) as store:
+        with closing(iter_enriched(produce, concurrency)) as followers:
+            for name, record in followers:
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, enumerated[0])
+
+                if record is None:
+                    continue  # Skip if data retrieval fails
+
+                chunk_usernames.append(name)
+                chunk_records.append(record)
+                if len(chunk_records) >= batch_size:
+                    score()
+                    chunk_usernames, chunk_records = [], []
+
+        if chunk_records:
+            score()
+
+        # ✅ Carry the retained followers over with their stored scores
+        carried_rows = np.flatnonzero(retained & ~refreshed)
+        carried = previous.take(carried_rows)
+        _write_scored(store, carried, scored_at[carried_rows].tolist())
+        store.complete()
+        snapshot_path = store.path
+
+    results = FollowerResults()
+    results.extend(carried)
+    results.extend(scored)
+
+    previous_count = len(rows)
+    followers_count = int(retained.sum()) + len(added)
+    removed = previous_count - int(retained.sum())
+    bots = results.bot_count()
+    report = {
+        "bot_percentage": (bots / followers_count) * 100 if followers_count else 0,
+        "followers": followers_count,
+        "analyzed": len(results),
+        "bots": bots,
+        "previous_followers": previous_count,
+        "previous_bot_percentage": (previous.bot_count() / len(previous)) * 100 if len(previous) else 0,
+        "added": len(added),
+        "removed": removed,
+        "retained": int(retained.sum()),
+        "churn_percentage": ((len(added) + removed) / previous_count) * 100 if previous_count else 0,
+        "reused_scores": len(carried),
+        "rescored": int(refreshed.sum()),
+        "previous_snapshot": previous_path,
+        "snapshot": snapshot_path
+    }
+    return report, results
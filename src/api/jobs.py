@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Finished jobs are kept this long (seconds) so clients can fetch their results
+FINISHED_JOB_TTL = 3600
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached its depth limit."""
+
+class Job:
+    """A single analysis job and its progress."""
+
+    def __init__(self, username: str):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.status = QUEUED
+        self.progress = {"stage": QUEUED}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def update_progress(self, **progress):
+        """Merges the given keys into the job's progress report."""
+        self.progress = dict(self.progress, **progress)
+
+    @property
+    def finished(self):
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "username": self.username,
+            "status": self.status,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+class JobManager:
+    """
+    Runs analysis jobs on a bounded worker pool.
+
+    - At most `max_workers` jobs run at once and at most `max_queue_depth` more
+      wait for a worker; further submissions raise `QueueFullError`.
+    - Submissions for a target username that already has a queued or running
+      job are attached to that job instead of starting a duplicate crawl.
+    """
+
+    def __init__(self, runner, max_workers: int = 2, max_queue_depth: int = 16):
+        """
+        Args:
+            runner (callable): `runner(job, *args)` performing the analysis and returning its result.
+            max_workers (int): Number of jobs that run concurrently.
+            max_queue_depth (int): Number of jobs allowed to wait for a worker.
+        """
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # target username -> in-flight job
+
+    def submit(self, username: str, *args, key: str = None):
+        """
+        Submits an analysis of `username`, or attaches to the in-flight one.
+
+        Args:
+            username (str): Target Instagram username.
+            *args: Extra arguments passed to the runner.
+            key (str): Coalescing key, defaults to the lowercased username. Jobs
+                with different keys for the same username (e.g. a sampled and a
+                full analysis) do not share results.
+
+        Returns:
+            tuple: (Job, created) where `created` is False if an existing job was reused.
+
+        Raises:
+            QueueFullError: If the queue depth limit has been reached.
+        """
+        key = key or username.lower()
+
+        with self._lock:
+            self._evict_finished()
+
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+
+            if len(self._active) >= self.max_workers + self.max_queue_depth:
+                raise QueueFullError(f"Job queue is full ({len(self._active)} jobs pending).")
+
+            job = Job(username)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, key, job, *args)
+        return job, True
+
+    def get(self, job_id: str):
+        """Returns the job with the given id, or None."""
+        return self._jobs.get(job_id)
+
+    def queue_depth(self):
+        """Returns the number of queued jobs waiting for a worker."""
+        with self._lock:
+            return sum(1 for job in self._active.values() if job.status == QUEUED)
+
+    def _run(self, key: str, job: Job, *args):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.update_progress(stage=RUNNING)
+
+        status = FAILED
+        try:
+            job.result = self.runner(job, *args)
+            status = COMPLETED
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} for {job.username} failed: {str(e)}")
+            job.error = str(e)
+        finally:
+            # The finish time is set before the terminal status, so every finished job has one
+            job.finished_at = time.time()
+            job.status = status
+            job.update_progress(stage=status)
+            with self._lock:
+                if self._active.get(key) is job:
+                    del self._active[key]
+
+    def _evict_finished(self):
+        """Drops finished jobs older than FINISHED_JOB_TTL. Caller must hold the lock."""
+        cutoff = time.time() - FINISHED_JOB_TTL
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,334 @@
+import os
+import queue
+import threading
+import time
+from contextlib import closing
+from api.bot_detector import DEFAULT_BATCH_SIZE, score_chunk
+from api.results import FollowerResults
+from data.follower_store import FollowerStoreWriter, new_session_path
+from data.image_hasher import get_image_hasher
+from data.profile_cache import get_profile_cache
+from data.scraper import build_follower_record, get_followers_data, get_profile_fields, is_custom_profile_pic_hash
+
+# Number of concurrent profile fetches (the request scheduler still paces them)
+DEFAULT_CONCURRENCY = int(os.environ.get("PIPELINE_CONCURRENCY", 8))
+
+# Items buffered between two stages, per enrichment worker
+QUEUE_SIZE_PER_WORKER = 4
+
+_DONE = object()
+
+class PipelineCancelled(Exception):
+    """Raised in the producer when the pipeline's consumer has stopped reading."""
+
+class _ResolvedFuture:
+    """Stand-in for a hash future when no picture needs hashing."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+def _username_of(follower):
+    return follower if isinstance(follower, str) else follower.username
+
+def _enrich(follower):
+    """
+    Fetches the profile fields of one follower and hands its picture to the hashing pool.
+
+    Returns:
+        tuple: (username, record or fields or None if retrieval failed, hash future or None)
+    """
+    username = _username_of(follower)
+    cached = get_profile_cache().get(username)
+    if cached is not None:
+        return username, cached, None
+
+    fields = get_profile_fields(follower)
+    if fields is None:
+        return username, None, None  # Retrieval failed, still counts as processed
+
+    # Hashing stage: runs on the hasher's own bounded pool while we fetch the next profile
+    profile_pic_url = fields["profile_pic_url"]
+    hash_future = get_image_hasher().submit(profile_pic_url) if profile_pic_url else _ResolvedFuture(None)
+    return username, fields, hash_future
+
+def _enrich_worker(follower_queue: queue.Queue, scored_queue: queue.Queue, cancelled: threading.Event):
+    """
+    Enrichment stage: fetches profile fields and hands the picture to the hashing pool.
+
+    Cached records skip both the fetch and the hashing. A follower whose enrichment
+    raises counts as a failed retrieval, and the worker always signals its exit,
+    so the consumer never waits on a dead worker.
+    """
+    try:
+        while True:
+            follower = follower_queue.get()
+            if follower is _DONE:
+                return
+            if cancelled.is_set():
+                continue  # Drain the queue without fetching
+
+            username = None
+            try:
+                username = _username_of(follower)
+                item = _enrich(follower)
+            except Exception as e:
+                print(f"❌ Could not enrich follower {username}: {e}")
+                item = (username, None, None)
+            scored_queue.put(item)
+    finally:
+        scored_queue.put(_DONE)
+
+def _drain(scored_queue: queue.Queue, workers_left: int):
+    """Consumes the scored queue until every enrichment worker has exited."""
+    while workers_left:
+        if scored_queue.get() is _DONE:
+            workers_left -= 1
+
+def iter_enriched(produce, concurrency: int = DEFAULT_CONCURRENCY, store=None, timeout: float = None):
+    """
+    Runs the enumerate, enrich and hash stages, yielding each follower as soon as its record is complete.
+
+    Stages are connected by bounded queues:
+        enumerate (`produce`, own thread) -> enrich (`concurrency` threads) -> hash (image hasher pool).
+
+    New records are added to the profile cache. Closing the generator early
+    (e.g. a disconnected client) cancels the crawl and the pending fetches.
+
+    Args:
+        produce (callable): `produce(put)` calling `put(follower)` for every follower (Profile or username).
+        concurrency (int): Number of enrichment threads.
+        store (FollowerStoreWriter): Optional writer receiving every enriched follower record.
+        timeout (float): If set, None is yielded whenever this many seconds pass without a follower.
+
+    Yields:
+        tuple: (username, profile record or None if its retrieval failed)
+    """
+    follower_queue = queue.Queue(maxsize=concurrency * QUEUE_SIZE_PER_WORKER)
+    scored_queue = queue.Queue(maxsize=concurrency * QUEUE_SIZE_PER_WORKER)
+    cancelled = threading.Event()
+    producer_error = []
+
+    def put(follower):
+        if cancelled.is_set():
+            raise PipelineCancelled("Analysis cancelled by the consumer.")
+        follower_queue.put(follower)
+
+    def enumerate_followers():
+        try:
+            produce(put)
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            producer_error.append(e)
+        finally:
+            for _ in range(concurrency):
+                follower_queue.put(_DONE)
+
+    threads = [threading.Thread(target=enumerate_followers, name="pipeline-enumerate", daemon=True)]
+    threads += [
+        threading.Thread(target=_enrich_worker, args=(follower_queue, scored_queue, cancelled),
+                         name=f"pipeline-enrich-{i}", daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+
+    cache = get_profile_cache()
+    workers_done = 0
+
+    try:
+        while workers_done < concurrency:
+            try:
+                item = scored_queue.get(timeout=timeout)
+            except queue.Empty:
+                yield None
+                continue
+
+            if item is _DONE:
+                workers_done += 1
+                continue
+
+            username, record, hash_future = item
+            if hash_future is not None:  # Freshly fetched, None for cached records and failed retrievals
+                record = build_follower_record(username, record, is_custom_profile_pic_hash(hash_future.result()))
+                try:
+                    cache.put(username, record)
+                except Exception as e:
+                    print(f"⚠️ Could not cache the profile of {username}: {e}")
+
+            if record is not None and store is not None:
+                store.write(dict(record, username=username))
+
+            yield username, record
+
+    finally:
+        if workers_done < concurrency:
+            # Closed early: stop the producer and let the workers drain in the background
+            cancelled.set()
+            threading.Thread(target=_drain, args=(scored_queue, concurrency - workers_done),
+                             name="pipeline-drain", daemon=True).start()
+
+    for thread in threads:
+        thread.join()
+    if producer_error:
+        raise producer_error[0]
+
+def iter_pipeline(produce, concurrency: int = DEFAULT_CONCURRENCY, batch_size: int = DEFAULT_BATCH_SIZE,
+                  progress_callback=None, store=None, progress_interval: float = None):
+    """
+    Runs the staged analysis pipeline, yielding each batch of scored followers as soon as it is scored.
+
+    The followers completed by `iter_enriched` (enumerate -> enrich -> hash) are
+    scored by the consumer thread in batches of `batch_size`. Only the batch being
+    scored is held in memory. Closing the generator early cancels the crawl and
+    the pending fetches.
+
+    Args:
+        produce (callable): `produce(put)` calling `put(follower)` for every follower (Profile or username).
+        concurrency (int): Number of enrichment threads.
+        batch_size (int): Number of followers scored per model call.
+        progress_callback (callable): Optional `callback(processed, enumerated)` called after each follower.
+        store (FollowerStoreWriter): Optional writer receiving every enriched follower record.
+        progress_interval (float): If set, an empty batch is also yielded when this many seconds
+            have passed without one, so consumers can report progress between batches.
+
+    Yields:
+        tuple: (FollowerResults of the scored batch, progress dict with `enumerated`, `processed`,
+        `analyzed`, `bots` and `bot_percentage` so far; the percentage is over the followers already
+        scored or failed, so it does not drop while enumeration runs ahead of scoring)
+    """
+    enumerated = [0]
+
+    def produce_counted(put):
+        def counted_put(follower):
+            enumerated[0] += 1
+            put(follower)
+
+        produce(counted_put)
+
+    bot_count, processed, analyzed = 0, 0, 0
+    chunk_usernames, chunk_records = [], []
+    last_yield = time.monotonic()
+
+    def progress():
+        # Over the followers already scored or failed, not those still waiting in the chunk or being enumerated
+        settled = processed - len(chunk_records)
+        return {
+            "enumerated": enumerated[0],
+            "processed": processed,
+            "analyzed": analyzed,
+            "bots": bot_count,
+            "bot_percentage": (bot_count / settled) * 100 if settled else 0
+        }
+
+    # Scoring stage
+    with closing(iter_enriched(produce_counted, concurrency, store, progress_interval)) as followers:
+        for item in followers:
+            if item is None:
+                last_yield = time.monotonic()
+                yield FollowerResults(), progress()
+                continue
+
+            username, record = item
+            processed += 1
+            if progress_callback:
+                progress_callback(processed, enumerated[0])
+
+            if record is not None:  # Skip if data retrieval fails
+                chunk_usernames.append(username)
+                chunk_records.append(record)
+
+            if len(chunk_records) >= batch_size:
+                batch = FollowerResults()
+                bot_count += score_chunk(chunk_usernames, chunk_records, batch)
+                analyzed += len(batch)
+                chunk_usernames, chunk_records = [], []
+                last_yield = time.monotonic()
+                yield batch, progress()
+            elif progress_interval is not None and time.monotonic() - last_yield >= progress_interval:
+                last_yield = time.monotonic()
+                yield FollowerResults(), progress()
+
+    # Score the remaining partial chunk
+    batch = FollowerResults()
+    if chunk_records:
+        bot_count += score_chunk(chunk_usernames, chunk_records, batch)
+        analyzed += len(batch)
+        chunk_usernames, chunk_records = [], []
+    yield batch, progress()
+
+def collect_results(batches):
+    """
+    Consumes the batches of `iter_pipeline` into a single result.
+
+    Returns:
+        tuple: (bot_percentage, FollowerResults with follower predictions and probabilities)
+    """
+    results = FollowerResults()
+    progress = {"bot_percentage": 0}
+    for batch, progress in batches:
+        results.extend(batch)
+
+    return progress["bot_percentage"], results
+
+def run_pipeline(produce, concurrency: int = DEFAULT_CONCURRENCY, batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress_callback=None, store=None):
+    """
+    Runs the staged analysis pipeline over the followers produced by `produce` (see `iter_pipeline`).
+
+    Returns:
+        tuple: (bot_percentage, FollowerResults with follower predictions and probabilities)
+    """
+    return collect_results(iter_pipeline(produce, concurrency, batch_size, progress_callback, store))
+
+def analyze_followers_concurrently(followers, concurrency: int = DEFAULT_CONCURRENCY,
+                                   batch_size: int = DEFAULT_BATCH_SIZE, progress_callback=None):
+    """Concurrent counterpart of `analyze_followers` for an existing list of followers."""
+    def produce(put):
+        for follower in followers:
+            put(follower)
+
+    return run_pipeline(produce, concurrency, batch_size, progress_callback)
+
+def iter_account_analysis(username: str, insta_user: str, insta_pass: str, concurrency: int = DEFAULT_CONCURRENCY,
+                          batch_size: int = DEFAULT_BATCH_SIZE, progress_callback=None, crawl_progress_callback=None,
+                          progress_interval: float = None):
+    """
+    Crawls and analyzes the followers of `username`, yielding scored batches as they are produced.
+
+    Streaming counterpart of `analyze_account`; see `iter_pipeline` for what is yielded.
+    """
+    with FollowerStoreWriter(new_session_path(username)) as store:
+        def produce(put):
+            # Followers retrieved by an interrupted earlier run are replayed as usernames
+            get_followers_data(username, insta_user, insta_pass, progress_callback=crawl_progress_callback,
+                               store=store, follower_callback=put, replay_resumed=True)
+
+        yield from iter_pipeline(produce, concurrency, batch_size, progress_callback, store, progress_interval)
+        store.complete()  # Not reached if the crawl fails or the consumer stops early
+
+def analyze_account(username: str, insta_user: str, insta_pass: str, concurrency: int = DEFAULT_CONCURRENCY,
+                    batch_size: int = DEFAULT_BATCH_SIZE, progress_callback=None, crawl_progress_callback=None):
+    """
+    Crawls and analyzes the followers of `username` with all stages running concurrently.
+
+    Follower enumeration feeds the enrichment workers directly, so profiles are
+    fetched, hashed and scored while pagination is still in progress.
+
+    Args:
+        username (str): The target Instagram username.
+        insta_user (str): Your Instagram username.
+        insta_pass (str): Your Instagram password.
+        concurrency (int): Number of enrichment threads.
+        batch_size (int): Number of followers scored per model call.
+        progress_callback (callable): Optional `callback(processed, enumerated)` for the scoring stage.
+        crawl_progress_callback (callable): Optional `callback(retrieved, total)` for the enumeration stage.
+
+    Returns:
+        tuple: (bot_percentage, FollowerResults with follower predictions and probabilities)
+    """
+    return collect_results(iter_account_analysis(username, insta_user, insta_pass, concurrency, batch_size,
+                                                 progress_callback, crawl_progress_callback))
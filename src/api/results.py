@@ -0,0 +1,161 @@
+import sys
+import numpy as np
+import pandas as pd
+from models.inferencer import BOT_THRESHOLD
+
+# Fixed-width column types of the scored follower results
+PROFILE_COLUMN_TYPES = {
+    "followers": np.uint32,
+    "following": np.uint32,
+    "bio_length": np.uint16,
+    "posts": np.uint32,
+    "has_profile_pic": np.uint8,
+    "is_private": np.uint8,
+    "digit_count": np.uint8,
+    "username_length": np.uint8
+}
+RESULT_COLUMN_TYPES = dict(PROFILE_COLUMN_TYPES, is_bot=np.bool_, bot_probability=np.float32)
+
+BOT_LABEL = "Bot Detected"
+REAL_LABEL = "Real User"
+
+def _to_column(values, dtype):
+    """Converts a sequence of numbers to `dtype`, clipping to its range instead of overflowing."""
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return np.clip(np.asarray(values, dtype=np.int64), info.min, info.max).astype(dtype)
+    return np.asarray(values, dtype=dtype)
+
+class FollowerResults:
+    """
+    Array-backed container for scored followers.
+
+    Each scored batch is stored as one fixed-width NumPy array per column
+    (see RESULT_COLUMN_TYPES, about 23 bytes per follower) plus a list of
+    interned usernames, instead of one dict per follower with a nested
+    `profile_data` dict. Batches are concatenated lazily when a column is read,
+    and exported to Arrow as chunked arrays without copying the numeric data.
+    """
+
+    def __init__(self):
+        self.usernames = []
+        self._chunks = {name: [] for name in RESULT_COLUMN_TYPES}
+
+    def append_batch(self, usernames, records, probabilities, threshold: float = BOT_THRESHOLD):
+        """
+        Appends a scored batch.
+
+        Args:
+            usernames (list): Follower usernames.
+            records (list): Profile records (see `build_follower_record`), in the same order.
+            probabilities (np.ndarray): Bot probabilities from `predict_batch`.
+            threshold (float): Probability at or above which a follower is labelled a bot.
+
+        Returns:
+            int: Number of bots in the batch.
+        """
+        if not records:
+            return 0
+
+        self.usernames.extend(sys.intern(username) if username else "" for username in usernames)
+        for name, dtype in PROFILE_COLUMN_TYPES.items():
+            self._chunks[name].append(_to_column([record[name] for record in records], dtype))
+
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        is_bot = probabilities >= threshold
+        self._chunks["bot_probability"].append(probabilities)
+        self._chunks["is_bot"].append(is_bot)
+        return int(is_bot.sum())
+
+    def extend(self, other: "FollowerResults"):
+        """Appends every batch of another result set (the arrays are shared, not copied)."""
+        self.usernames.extend(other.usernames)
+        for name in RESULT_COLUMN_TYPES:
+            self._chunks[name].extend(other._chunks[name])
+
+    def take(self, indices):
+        """Returns a new result set with the followers at `indices`, in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        taken = FollowerResults()
+        taken.usernames = [self.usernames[i] for i in indices.tolist()]
+        if len(indices):
+            for name in RESULT_COLUMN_TYPES:
+                taken._chunks[name].append(self.column(name)[indices])
+        return taken
+
+    def __len__(self):
+        return len(self.usernames)
+
+    @property
+    def empty(self):
+        return not self.usernames
+
+    def column(self, name: str):
+        """Returns one column as a single contiguous array."""
+        chunks = self._chunks[name]
+        if not chunks:
+            return np.empty(0, dtype=RESULT_COLUMN_TYPES[name])
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]  # Consolidate once, later reads are free
+        return chunks[0]
+
+    def bot_count(self):
+        return int(self.column("is_bot").sum())
+
+    def iter_records(self):
+        """Yields each follower as the JSON-serializable dict served by the API."""
+        offset = 0
+        batches = zip(*(self._chunks[name] for name in RESULT_COLUMN_TYPES))
+        for batch in batches:
+            columns = dict(zip(RESULT_COLUMN_TYPES, (chunk.tolist() for chunk in batch)))
+            for i in range(len(columns["is_bot"])):
+                yield {
+                    "username": self.usernames[offset + i],
+                    "prediction": BOT_LABEL if columns["is_bot"][i] else REAL_LABEL,
+                    "bot_probability": columns["bot_probability"][i],
+                    "profile_data": {name: columns[name][i] for name in PROFILE_COLUMN_TYPES}
+                }
+            offset += len(columns["is_bot"])
+
+    def to_records(self):
+        """Returns every follower as the JSON-serializable dicts served by the API."""
+        return list(self.iter_records())
+
+    def to_pandas(self):
+        """Returns a DataFrame with one typed column per field and a categorical `prediction` column."""
+        df = pd.DataFrame({"username": self.usernames})
+        df["prediction"] = pd.Categorical.from_codes(self.column("is_bot").astype(np.int8),
+                                                     categories=[REAL_LABEL, BOT_LABEL])
+        for name in ["bot_probability"] + list(PROFILE_COLUMN_TYPES):
+            df[name] = self.column(name)
+        return df
+
+    def to_arrow(self):
+        """
+        Returns a `pyarrow.Table` of the results.
+
+        Numeric columns wrap the stored batch arrays as chunked arrays (zero-copy);
+        only the usernames are converted to an Arrow string column and `is_bot`
+        is bit-packed.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow/Parquet export requires `pip install pyarrow`.") from e
+
+        columns = {"username": pa.array(self.usernames, type=pa.string())}
+        for name, dtype in RESULT_COLUMN_TYPES.items():
+            chunks = self._chunks[name]
+            columns[name] = pa.chunked_array(chunks, type=pa.from_numpy_dtype(dtype)) if chunks \
+                else pa.array([], type=pa.from_numpy_dtype(dtype))
+        return pa.table(columns)
+
+    def to_parquet(self, path: str):
+        """Writes the results to a Parquet file (requires pyarrow)."""
+        table = self.to_arrow()
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+        return path
+
+    def __repr__(self):
+        return repr(self.to_pandas())
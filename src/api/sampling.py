@@ -0,0 +1,148 @@
+import math
+import random
+from statistics import NormalDist
+from api.pipeline import DEFAULT_CONCURRENCY, analyze_followers_concurrently
+from api.results import FollowerResults
+from data.scraper import get_followers_data
+
+# Sampling defaults
+DEFAULT_CI_WIDTH = 0.05  # Full width of the interval on the bot fraction (0.05 = ±2.5 points)
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MAX_SAMPLE = 5000  # Reservoir size: enough for ±1.4 points at 95% in the worst case
+SAMPLE_ROUND_SIZE = 100  # Followers enriched and scored between two stopping checks
+
+class Reservoir:
+    """
+    Uniform random sample of up to `k` items from a stream of unknown length (Algorithm R).
+
+    Memory stays O(k) however many items are added.
+    """
+
+    def __init__(self, k: int, rng: random.Random = None):
+        self.k = k
+        self.seen = 0
+        self._rng = rng or random.Random()
+        self._items = []
+
+    def add(self, item):
+        if self.seen < self.k:
+            self._items.append(item)
+        else:
+            j = self._rng.randint(0, self.seen)
+            if j < self.k:
+                self._items[j] = item
+        self.seen += 1
+
+    def sample(self):
+        """Returns the sample shuffled, so any prefix of it is itself a uniform random sample."""
+        items = list(self._items)
+        self._rng.shuffle(items)
+        return items
+
+def reservoir_sample(iterable, k: int, rng: random.Random = None):
+    """Draws a shuffled uniform random sample of up to `k` items from an iterable."""
+    reservoir = Reservoir(k, rng)
+    for item in iterable:
+        reservoir.add(item)
+    return reservoir.sample()
+
+def wilson_interval(successes: int, n: int, confidence: float = DEFAULT_CONFIDENCE, population: int = None):
+    """
+    Wilson score interval for a binomial proportion.
+
+    When the population size is known, the finite population correction
+    (sampling without replacement) is applied as a larger effective sample
+    size, so scoring the whole population gives the exact proportion.
+
+    Returns:
+        tuple: (estimate, low, high) as fractions in [0, 1], with low <= estimate <= high.
+    """
+    if n == 0:
+        return 0.0, 0.0, 1.0
+
+    p = successes / n
+    if population and population > 1:
+        if n >= population:
+            return p, p, p  # The whole population was scored
+        n = n * (population - 1) / (population - n)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+
+    # Clamped to the estimate as well: at p = 0 or 1 rounding can put a bound a hair past it
+    return p, max(0.0, min(p, center - half_width)), min(1.0, max(p, center + half_width))
+
+def estimate_bot_percentage(sample, ci_width: float = DEFAULT_CI_WIDTH, confidence: float = DEFAULT_CONFIDENCE,
+                            population: int = None, concurrency: int = DEFAULT_CONCURRENCY, progress_callback=None):
+    """
+    Scores a shuffled follower sample round by round until the confidence interval is narrow enough.
+
+    Args:
+        sample (list): Uniformly sampled followers, in random order (see `reservoir_sample`).
+        ci_width (float): Target full width of the interval on the bot fraction.
+        confidence (float): Confidence level of the interval.
+        population (int): Total number of followers, for the finite population correction.
+        concurrency (int): Number of concurrent profile fetches.
+        progress_callback (callable): Optional `callback(scored, estimate)` called after each round.
+
+    Returns:
+        tuple: (dict with the estimate and its interval, FollowerResults of the scored followers)
+    """
+    results = FollowerResults()
+    bots, scored = 0, 0
+    estimate, low, high = 0.0, 0.0, 1.0
+
+    for start in range(0, len(sample), SAMPLE_ROUND_SIZE):
+        _, round_results = analyze_followers_concurrently(sample[start:start + SAMPLE_ROUND_SIZE],
+                                                          concurrency=concurrency)
+        results.extend(round_results)
+        bots += round_results.bot_count()
+        scored += len(round_results)
+
+        estimate, low, high = wilson_interval(bots, scored, confidence, population)
+        if progress_callback:
+            progress_callback(scored, estimate)
+        if scored and high - low <= ci_width:
+            break
+
+    result = {
+        "bot_percentage": estimate * 100,
+        "ci_low": low * 100,
+        "ci_high": high * 100,
+        "confidence": confidence,
+        "sample_size": scored,
+        "bots_in_sample": bots,
+        "population": population,
+        "ci_width_reached": bool(scored) and high - low <= ci_width
+    }
+    return result, results
+
+def sample_account(username: str, insta_user: str, insta_pass: str, ci_width: float = DEFAULT_CI_WIDTH,
+                   confidence: float = DEFAULT_CONFIDENCE, max_sample: int = DEFAULT_MAX_SAMPLE,
+                   concurrency: int = DEFAULT_CONCURRENCY, seed: int = None, progress_callback=None):
+    """
+    Estimates the bot percentage of an account from a uniform random sample of its followers.
+
+    Follower pagination still walks the whole list (it is cheap: one request per page),
+    but only the reservoir is kept in memory, only the sample is enriched and scored,
+    and scoring stops as soon as the confidence interval is `ci_width` wide.
+
+    Returns:
+        tuple: (dict with the estimate and its interval, FollowerResults of the scored followers)
+    """
+    # ✅ Reservoir-sample the followers as they are paginated, without enriching them. Those retrieved by an
+    # interrupted earlier run are replayed as usernames, and the full follower list is never built
+    reservoir = Reservoir(max_sample, random.Random(seed))
+
+    def add(follower):
+        reservoir.add(follower if isinstance(follower, str) else follower.username)
+
+    get_followers_data(username, insta_user, insta_pass, follower_callback=add, replay_resumed=True)
+
+    sample = reservoir.sample()
+    print(f"🎲 Sampled {len(sample)} of {reservoir.seen} followers of {username}.")
+
+    return estimate_bot_percentage(sample, ci_width, confidence, population=reservoir.seen,
+                                   concurrency=concurrency, progress_callback=progress_callback)
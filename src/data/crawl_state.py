@@ -0,0 +1,187 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from instaloader import FrozenNodeIterator
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+CRAWL_STATE_PATH = os.environ.get("CRAWL_STATE_PATH", os.path.join(BASE_DIR, "src/data/cache/crawl_state.db"))
+
+# Seen followers are written at least this often, even without a cursor checkpoint
+COMMIT_EVERY = 1000
+
+# Seconds a write waits for another crawl's transaction before failing
+BUSY_TIMEOUT = 30
+
+def _owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _owner_alive(owner: str):
+    """Whether the process holding a crawl is still running (assumed for other hosts)."""
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except (ProcessLookupError, ValueError):
+        return False
+    except PermissionError:
+        pass  # Running under another user
+    return True
+
+class CrawlState:
+    """
+    Persistent state of one follower crawl: the followers already seen and the resume cursor.
+
+    Every crawl gets its own row in the shared SQLite database, held by the
+    running process: concurrent crawls (of the same target or not) never share
+    state, and a new crawl of a target resumes the latest crawl left unfinished
+    by a process that is no longer running it.
+
+    Seen follower ids live in an SQLite table (primary key lookups, so dedupe
+    is O(1)-ish and memory stays bounded for millions of followers). New ids are
+    buffered and written in one short transaction with each cursor checkpoint
+    (the frozen `NodeIterator` of `get_followers()`), so a resumed crawl continues
+    at the last saved page, and other crawls only wait for the write lock briefly.
+    """
+
+    def __init__(self, target: str, path: str = CRAWL_STATE_PATH):
+        self.target = target.lower()
+        self.path = path
+        self._pending = {}  # user id -> username, not written yet
+        self._cleared = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit mode: every write below runs in an explicit, short transaction
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}")
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawls ("
+                "crawl_id INTEGER PRIMARY KEY AUTOINCREMENT, target TEXT NOT NULL, owner TEXT, "
+                "frozen TEXT, saved_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_followers ("
+                "crawl_id INTEGER NOT NULL, user_id INTEGER NOT NULL, username TEXT NOT NULL, "
+                "PRIMARY KEY (crawl_id, user_id)) WITHOUT ROWID"
+            )
+        self.crawl_id = self._claim()
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _claim(self):
+        """Takes over the latest abandoned crawl of the target, or starts a new one. Returns its id."""
+        with self._transaction():
+            crawls = self._conn.execute(
+                "SELECT crawl_id, owner FROM crawls WHERE target = ? ORDER BY saved_at DESC", (self.target,)
+            ).fetchall()
+            abandoned = [crawl_id for crawl_id, owner in crawls if owner is None or not _owner_alive(owner)]
+
+            if not abandoned:
+                return self._conn.execute(
+                    "INSERT INTO crawls (target, owner, saved_at) VALUES (?, ?, ?)",
+                    (self.target, _owner_id(), time.time())
+                ).lastrowid
+
+            crawl_id = abandoned[0]
+            self._conn.execute("UPDATE crawls SET owner = ? WHERE crawl_id = ?", (_owner_id(), crawl_id))
+            # Older abandoned crawls of the target are superseded by the one resumed
+            for superseded in abandoned[1:]:
+                self._conn.execute("DELETE FROM crawl_followers WHERE crawl_id = ?", (superseded,))
+                self._conn.execute("DELETE FROM crawls WHERE crawl_id = ?", (superseded,))
+            return crawl_id
+
+    def mark_seen(self, user_id: int, username: str):
+        """
+        Records a follower as seen (written with the next checkpoint).
+
+        Returns:
+            bool: True if the follower had not been seen before in this crawl.
+        """
+        user_id = int(user_id)
+        if user_id in self._pending:
+            return False
+        if self._conn.execute(
+            "SELECT 1 FROM crawl_followers WHERE crawl_id = ? AND user_id = ?", (self.crawl_id, user_id)
+        ).fetchone():
+            return False
+
+        self._pending[user_id] = username
+        if len(self._pending) >= COMMIT_EVERY:
+            self.commit()
+        return True
+
+    def commit(self, frozen: FrozenNodeIterator = None):
+        """Writes the pending seen followers, and the resume cursor if given, in one transaction."""
+        if not self._pending and frozen is None:
+            return
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO crawl_followers (crawl_id, user_id, username) VALUES (?, ?, ?)",
+                ((self.crawl_id, user_id, username) for user_id, username in self._pending.items())
+            )
+            if frozen is not None:
+                self._conn.execute(
+                    "UPDATE crawls SET frozen = ?, saved_at = ? WHERE crawl_id = ?",
+                    (json.dumps(frozen._asdict()), time.time(), self.crawl_id)
+                )
+        self._pending = {}
+
+    def seen_count(self):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM crawl_followers WHERE crawl_id = ?", (self.crawl_id,)
+        ).fetchone()[0] + len(self._pending)
+
+    def iter_usernames(self):
+        """Yields the usernames of every follower seen so far."""
+        self.commit()
+        cursor = self._conn.execute("SELECT username FROM crawl_followers WHERE crawl_id = ?", (self.crawl_id,))
+        for (username,) in cursor:
+            yield username
+
+    def save_cursor(self, frozen: FrozenNodeIterator):
+        """Persists the iterator's resume cursor together with the followers seen so far."""
+        self.commit(frozen)
+
+    def load_cursor(self):
+        """
+        Returns the saved resume cursor, or None if there is none or it has expired.
+        """
+        row = self._conn.execute("SELECT frozen FROM crawls WHERE crawl_id = ?", (self.crawl_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        frozen = FrozenNodeIterator(**json.loads(row[0]))
+        if frozen.best_before and frozen.best_before < time.time():
+            print(f"⚠️ Resume cursor for {self.target} has expired, starting from the first page.")
+            return None
+        return frozen
+
+    def clear(self):
+        """Deletes the cursor and the seen followers once the crawl has completed."""
+        with self._transaction():
+            self._conn.execute("DELETE FROM crawl_followers WHERE crawl_id = ?", (self.crawl_id,))
+            self._conn.execute("DELETE FROM crawls WHERE crawl_id = ?", (self.crawl_id,))
+        self._pending = {}
+        self._cleared = True
+
+    def close(self):
+        """Writes the pending followers and releases the crawl, so a later run can resume it."""
+        if not self._cleared:
+            self.commit()
+            with self._transaction():
+                self._conn.execute("UPDATE crawls SET owner = NULL WHERE crawl_id = ?", (self.crawl_id,))
+        self._conn.close()
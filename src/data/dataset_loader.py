@@ -1,34 +1,45 @@
 import os
 import pandas as pd
 import numpy as np
+from data.follower_store import iter_follower_records
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 
-def convert_to_text(row):
-    """Convert numerical features into a structured text format for TF-IDF transformation."""
-    return f"User has {row['userFollowerCount']} followers, follows {row['userFollowingCount']} accounts, " \
-           f"has a biography of {row['userBiographyLength']} characters, posted {row['userMediaCount']} media items, " \
-           f"{'has' if row['userHasProfilPic'] else 'does not have'} a profile picture, " \
-           f"{'has' if row['userIsPrivate'] else 'does not have'} a private account, " \
-           f"username contains {row['usernameDigitCount']} digits and has {row['usernameLength']} characters."
+# Labeled training datasets (InstaFake format)
+FAKE_DATA_PATH = os.path.join(BASE_DIR, "src/data/datasets/fake_users.json")
+REAL_DATA_PATH = os.path.join(BASE_DIR, "src/data/datasets/genuine_users.json")
 
-def load_dataset():
-    """Load and preprocess the dataset with both numerical and text-based features."""
+# Scraped follower record keys -> dataset column names
+RECORD_TO_DATASET_COLUMNS = {
+    "followers": "userFollowerCount",
+    "following": "userFollowingCount",
+    "bio_length": "userBiographyLength",
+    "posts": "userMediaCount",
+    "has_profile_pic": "userHasProfilPic",
+    "is_private": "userIsPrivate",
+    "digit_count": "usernameDigitCount",
+    "username_length": "usernameLength"
+}
+
+# Raw dataset columns, in the order of `models.features.RAW_FEATURE_KEYS`
+RAW_DATASET_COLUMNS = list(RECORD_TO_DATASET_COLUMNS.values())
 
-    fake_data_path = os.path.join(BASE_DIR, "src/data/datasets/fake_users.json")
-    real_data_path = os.path.join(BASE_DIR, "src/data/datasets/genuine_users.json")
+# Label of a scraped follower record (1 = Bot, 0 = Real User); `isFake` as in the datasets is accepted too
+LABEL_KEYS = ("is_bot", "isFake")
+
+def load_labeled_frame():
+    """Load the fake and genuine user datasets into one DataFrame labeled with `isFake` (1 = Bot)."""
 
     # Ensure the dataset files exist
-    if not os.path.exists(fake_data_path):
-        raise FileNotFoundError(f"❌ Dataset not found: {fake_data_path}")
-    if not os.path.exists(real_data_path):
-        raise FileNotFoundError(f"❌ Dataset not found: {real_data_path}")
+    if not os.path.exists(FAKE_DATA_PATH):
+        raise FileNotFoundError(f"❌ Dataset not found: {FAKE_DATA_PATH}")
+    if not os.path.exists(REAL_DATA_PATH):
+        raise FileNotFoundError(f"❌ Dataset not found: {REAL_DATA_PATH}")
 
     # Load JSON into DataFrames
-    df_fake = pd.read_json(fake_data_path)
-    df_real = pd.read_json(real_data_path)
+    df_fake = pd.read_json(FAKE_DATA_PATH)
+    df_real = pd.read_json(REAL_DATA_PATH)
 
     # Assign labels (1 = Bot, 0 = Real User)
     df_fake["isFake"] = 1
@@ -37,60 +48,75 @@ def load_dataset():
     # Combine datasets
     df = pd.concat([df_fake, df_real], ignore_index=True)
 
-    # Define numerical feature columns
-    feature_columns = [
-        "userFollowerCount", "userFollowingCount", "userBiographyLength", "userMediaCount",
-        "userHasProfilPic", "userIsPrivate", "usernameDigitCount", "usernameLength"
-    ]
-
     # Ensure no missing values before processing
-    df = df.dropna(subset=feature_columns + ["isFake"])
-    
+    df = df.dropna(subset=RAW_DATASET_COLUMNS + ["isFake"])
+
     # Convert labels to integers
     df["isFake"] = df["isFake"].astype(int)
+    return df
+
+def load_dataset():
+    """
+    Load the dataset as raw profile feature rows and labels, split into train and test sets.
+
+    Derived columns, scaling and text rendering are applied by `models.features.build_model_input`,
+    the same function used at inference, so training and serving see identical features.
 
-    ### 🚀 Add New Numerical Features 🚀 ###
-    
-    # 1️⃣ **Follower-to-Following Ratio**
-    df["follower_following_ratio"] = df["userFollowerCount"] / (df["userFollowingCount"] + 1)  # Avoid division by zero
+    Returns:
+        tuple: (raw_train, raw_test, y_train, y_test) where the raw arrays have shape (n, 8),
+        columns ordered like `models.features.RAW_FEATURE_KEYS`.
+    """
+    df = load_labeled_frame()
+    raw = df[RAW_DATASET_COLUMNS].to_numpy(dtype=np.float64)
+    labels = df["isFake"].to_numpy().reshape(-1)  # Labels as 1D arrays for XGBoost
 
-    # 2️⃣ **Binary Feature: Does the username contain numbers?**
-    df["has_numbers_in_username"] = df["usernameDigitCount"].apply(lambda x: 1 if x > 0 else 0)
+    raw_train, raw_test, y_train, y_test = train_test_split(raw, labels, test_size=0.2, random_state=42)
 
-    # 3️⃣ **Engagement Score (Posts per Follower)**
-    df["engagement_score"] = (df["userMediaCount"] + 1) / (df["userFollowerCount"] + 1)  # Avoid division by zero
+    # 🚀 Debugging: Print dataset shapes before returning
+    print("\n✅ Final dataset shapes:")
+    print(f"   - raw_train: {raw_train.shape}")
+    print(f"   - y_train: {y_train.shape}")
+    print(f"   - raw_test: {raw_test.shape}")
+    print(f"   - y_test: {y_test.shape}")
 
-    # Update feature columns to include new ones
-    feature_columns += ["follower_following_ratio", "has_numbers_in_username", "engagement_score"]
+    return raw_train, raw_test, y_train, y_test
 
-    # Normalize numerical features (Scale between 0 and 1)
-    scaler = MinMaxScaler()
-    df[feature_columns] = scaler.fit_transform(df[feature_columns])
+def load_follower_records(paths):
+    """
+    Load scraped follower records from NDJSON session files into a DataFrame.
 
-    # Convert dataset into structured text format (for TF-IDF transformation)
-    df["text"] = df.apply(convert_to_text, axis=1)
+    Records are read lazily from each file and renamed to the dataset column
+    names used by `load_dataset`, so scraped data can be labeled and used for training.
 
-    # Split dataset into training and testing sets
-    X_train_text, X_test_text, y_train, y_test = train_test_split(df["text"], df["isFake"], test_size=0.2, random_state=42)
-    X_train_num, X_test_num, _, _ = train_test_split(df[feature_columns], df["isFake"], test_size=0.2, random_state=42)
+    Args:
+        paths (list): Paths of NDJSON files written by `FollowerStoreWriter`.
 
-    # Drop any remaining NaN values (just in case)
-    X_train_text.dropna(inplace=True)
-    X_test_text.dropna(inplace=True)
-    y_train = y_train.dropna()
-    y_test = y_test.dropna()
+    Returns:
+        pd.DataFrame: One row per stored follower record.
+    """
+    records = (record for path in paths for record in iter_follower_records(path))
+    return pd.DataFrame.from_records(records).rename(columns=RECORD_TO_DATASET_COLUMNS)
 
-    # Ensure labels are 1D arrays for XGBoost
-    y_train = np.array(y_train).reshape(-1)
-    y_test = np.array(y_test).reshape(-1)
+def load_labeled_records(paths):
+    """
+    Load labeled scraped follower records as raw profile feature rows and labels.
 
-    # 🚀 Debugging: Print dataset shapes before returning
-    print(f"\n✅ Final dataset shapes:")
-    print(f"   - X_train_text: {X_train_text.shape}")
-    print(f"   - X_train_num: {X_train_num.shape}")
-    print(f"   - y_train: {y_train.shape}")
-    print(f"   - X_test_text: {X_test_text.shape}")
-    print(f"   - X_test_num: {X_test_num.shape}")
-    print(f"   - y_test: {y_test.shape}")
+    Each record needs the fields written by the crawl plus a label (`is_bot`
+    or `isFake`, 1 = Bot); unlabeled records are skipped.
+
+    Args:
+        paths (list): Paths of NDJSON files of labeled follower records.
+
+    Returns:
+        tuple: (raw, labels) where raw has shape (n, 8), columns ordered like
+        `models.features.RAW_FEATURE_KEYS`.
+    """
+    df = load_follower_records(paths)
+    label_column = next((key for key in LABEL_KEYS if key in df.columns), None)
+    if label_column is None:
+        raise ValueError(f"❌ No labeled records in {paths} (expected a {' or '.join(LABEL_KEYS)} field).")
 
-    return X_train_text, X_test_text, X_train_num, X_test_num, y_train, y_test
+    df = df.dropna(subset=RAW_DATASET_COLUMNS + [label_column])
+    raw = df[RAW_DATASET_COLUMNS].to_numpy(dtype=np.float64)
+    labels = df[label_column].astype(int).to_numpy()
+    return raw, labels
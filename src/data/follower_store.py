@@ -0,0 +1,189 @@
+import glob
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+DATASETS_DIR = os.environ.get("FOLLOWER_STORE_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "datasets")))
+
+# Timestamp suffix of the session file names
+SESSION_TIME_FORMAT = "%d-%m-%YT%H-%M-%S"
+
+# Buffered records are written every FLUSH_EVERY records and fsynced every CHECKPOINT_EVERY
+FLUSH_EVERY = 100
+CHECKPOINT_EVERY = 1000
+
+# Key of the footer line closing the session file of a crawl that went through the whole follower list
+COMPLETE_KEY = "_session_complete"
+
+# Bytes read from the end of a session file to find its footer
+FOOTER_READ_SIZE = 4096
+
+def _check_session_name(username: str):
+    """Raises ValueError unless `username` is a plain file name prefix (no directory part)."""
+    separators = [sep for sep in (os.sep, os.altsep, "/") if sep]
+    if not username or username in (".", "..") or any(sep in username for sep in separators):
+        raise ValueError(f"Invalid session name {username!r}.")
+
+def new_session_path(username: str, directory: str = DATASETS_DIR):
+    """
+    Returns the NDJSON file path for a new crawl session of `username` (never an existing session's).
+
+    Raises:
+        ValueError: If the name would place the file outside `directory`.
+    """
+    _check_session_name(username)
+    directory = os.path.abspath(directory)
+    started = datetime.now()
+    while True:
+        path = os.path.join(directory, f"{username}-{started.strftime(SESSION_TIME_FORMAT)}.ndjson")
+        if os.path.dirname(os.path.abspath(path)) != directory:
+            raise ValueError(f"Invalid session name {username!r}.")
+        if not os.path.exists(path):
+            return path
+        started += timedelta(seconds=1)  # Another session started within the same second
+
+def read_session_footer(path: str):
+    """
+    Reads the completion footer of a session file (see `FollowerStoreWriter.complete`).
+
+    Returns:
+        dict: The footer with the number of `records`, or None if the crawl did not finish.
+    """
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        file.seek(max(0, file.tell() - FOOTER_READ_SIZE))
+        last_line = file.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    try:
+        footer = json.loads(last_line)
+    except ValueError:
+        return None
+    return footer if isinstance(footer, dict) and footer.get(COMPLETE_KEY) else None
+
+def find_latest_session(username: str, directory: str = DATASETS_DIR):
+    """
+    Finds the most recent complete, non-empty crawl session file of `username`.
+
+    Sessions of interrupted or failed crawls have no completion footer and are skipped.
+
+    Returns:
+        tuple: (path, datetime the session started), or (None, None) if the account was never fully crawled.
+    """
+    _check_session_name(username)
+    sessions = []
+    for path in glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(username)}-*.ndjson")):
+        timestamp = os.path.basename(path)[len(username) + 1:-len(".ndjson")]
+        try:
+            sessions.append((datetime.strptime(timestamp, SESSION_TIME_FORMAT), path))
+        except ValueError:
+            continue  # Not a session file of this account
+
+    for started, path in sorted(sessions, reverse=True):
+        footer = read_session_footer(path)
+        if footer is not None and footer.get("records"):
+            return path, started
+    return None, None
+
+class FollowerStoreWriter:
+    """
+    Append-only NDJSON writer for the follower records of one crawl session.
+
+    Records are buffered and appended in batches of `flush_every`; every
+    `checkpoint_every` records (and on close) the file is fsynced. A crash can
+    at worst lose the unflushed buffer and leave a truncated last line, which
+    `iter_follower_records` skips. Once the crawl has gone through the whole
+    follower list, `complete()` appends a footer marking the session as usable
+    for later diffs.
+    """
+
+    def __init__(self, path: str, flush_every: int = FLUSH_EVERY, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.checkpoint_every = checkpoint_every
+        self.records_written = 0
+        self._buffer = []
+        self._since_checkpoint = 0
+        self._lock = threading.RLock()  # The crawl thread checkpoints while the pipeline writes
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict):
+        """Buffers one follower record."""
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        """Appends the buffered records to the file."""
+        with self._lock:
+            if not self._buffer:
+                return
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self.records_written += len(self._buffer)
+            self._since_checkpoint += len(self._buffer)
+            self._buffer = []
+
+            if self._since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+
+    def checkpoint(self):
+        """Flushes the buffer and fsyncs the file so everything written so far is durable."""
+        with self._lock:
+            if self._buffer:
+                self.flush()
+            os.fsync(self._file.fileno())
+            self._since_checkpoint = 0
+
+    def complete(self):
+        """Appends the completion footer and closes the file."""
+        with self._lock:
+            self.flush()
+            self._file.write(json.dumps({COMPLETE_KEY: True, "records": self.records_written}) + "\n")
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self.checkpoint()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def iter_follower_records(path: str):
+    """
+    Lazily yields the follower records stored in an NDJSON session file.
+
+    A truncated line (e.g. left by a crash mid-write) and the completion footer are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping truncated record in {os.path.basename(path)}")
+                continue
+            if not record.get(COMPLETE_KEY):
+                yield record
+
+def iter_record_batches(path: str, batch_size: int):
+    """Lazily yields the stored follower records in lists of up to `batch_size`."""
+    batch = []
+    for record in iter_follower_records(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
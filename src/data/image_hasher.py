@@ -0,0 +1,185 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+import imagehash
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from data.profile_cache import PROFILE_CACHE_PATH
+from monitoring.metrics import stage_timer
+
+# Hashing configuration (overridable through environment variables)
+IMAGE_HASH_WORKERS = int(os.environ.get("IMAGE_HASH_WORKERS", 8))
+IMAGE_HASH_MEMORY_SIZE = int(os.environ.get("IMAGE_HASH_MEMORY_SIZE", 50000))  # Entries
+IMAGE_HASH_SIZE = 8  # average_hash works on an 8x8 thumbnail
+
+# Instagram CDN file names look like `123_456_789_n.jpg`; the query string only carries signatures
+CDN_ASSET_PATTERN = re.compile(r"^\d+_\d+_\d+_n\.\w+$")
+
+def image_cache_key(image_url: str):
+    """
+    Returns the cache key of a profile-picture URL.
+
+    Instagram CDN URLs are keyed by their asset file name, so the same picture
+    served from another edge host or with a new signature maps to the same key.
+    Any other URL is keyed by its scheme, host and path.
+    """
+    parts = urlsplit(image_url)
+    asset = os.path.basename(parts.path)
+    if CDN_ASSET_PATTERN.match(asset):
+        return f"ig:{asset}"
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+def decode_image_hash(content: bytes):
+    """
+    Decodes image bytes and returns their average hash.
+
+    The image is decoded at full size: JPEG draft (downscaled) decoding changes
+    some hashes, and `DEFAULT_PROFILE_PIC_HASHES` are compared exactly.
+    """
+    img = Image.open(BytesIO(content))
+    return str(imagehash.average_hash(img.convert("L"), hash_size=IMAGE_HASH_SIZE))
+
+class ProfilePicHasher:
+    """
+    Content-addressed cache and bounded download/hash pool for profile pictures.
+
+    - Hashes are cached by `image_cache_key` in memory (LRU) and in SQLite, so a
+      repeated avatar is never downloaded or decoded twice.
+    - Uncached pictures are fetched over one pooled HTTP session and hashed on a
+      pool of `workers` threads; concurrent requests for the same key share one download.
+    """
+
+    def __init__(self, db_path: str = PROFILE_CACHE_PATH, workers: int = IMAGE_HASH_WORKERS,
+                 memory_size: int = IMAGE_HASH_MEMORY_SIZE):
+        self.workers = workers
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # cache key -> hash
+        self._in_flight = {}  # cache key -> Future
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "downloads": 0, "coalesced": 0, "errors": 0}
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-hash")
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Hashes of the former `image_hashes` table were computed from draft (downscaled) decodes
+        self._conn.execute("DROP TABLE IF EXISTS image_hashes")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS picture_hashes ("
+            "asset_key TEXT PRIMARY KEY, hash TEXT NOT NULL, hashed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _lookup(self, key: str):
+        """Returns the cached hash for `key`, or None. Caller must hold the lock."""
+        image_hash = self._memory.get(key)
+        if image_hash is not None:
+            self._memory.move_to_end(key)
+            return image_hash
+
+        row = self._conn.execute("SELECT hash FROM picture_hashes WHERE asset_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def _remember(self, key: str, image_hash: str):
+        """Stores a hash in the LRU tier. Caller must hold the lock."""
+        self._memory[key] = image_hash
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _download_and_hash(self, key: str, image_url: str):
+        try:
+            with stage_timer("avatar_download"):
+                response = self._session.get(image_url, timeout=10)
+                response.raise_for_status()
+            with stage_timer("image_hash"):
+                image_hash = decode_image_hash(response.content)
+        except Exception as e:
+            print(f"❌ Error fetching image: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+                self._in_flight.pop(key, None)
+            return None
+
+        with self._lock:
+            self._counters["downloads"] += 1
+            self._remember(key, image_hash)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO picture_hashes (asset_key, hash, hashed_at) VALUES (?, ?, ?)",
+                (key, image_hash, time.time())
+            )
+            self._conn.commit()
+            self._in_flight.pop(key, None)
+        return image_hash
+
+    def submit(self, image_url: str):
+        """
+        Schedules hashing of `image_url` and returns a Future with the hash (None on failure).
+
+        Cached hashes resolve immediately; a download already in flight for the
+        same key is shared instead of being repeated.
+        """
+        key = image_cache_key(image_url)
+
+        with self._lock:
+            image_hash = self._lookup(key)
+            if image_hash is not None:
+                self._counters["hits"] += 1
+                future = Future()
+                future.set_result(image_hash)
+                return future
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future
+
+            future = self._executor.submit(self._download_and_hash, key, image_url)
+            self._in_flight[key] = future
+            return future
+
+    def get_hash(self, image_url: str):
+        """Returns the average hash of `image_url`, downloading it only if uncached."""
+        return self.submit(image_url).result()
+
+    def hash_many(self, image_urls):
+        """
+        Hashes a batch of URLs on the worker pool.
+
+        Returns:
+            dict: URL -> hash (None for pictures that could not be retrieved).
+        """
+        futures = {image_url: self.submit(image_url) for image_url in set(image_urls)}
+        return {image_url: future.result() for image_url, future in futures.items()}
+
+    def stats(self):
+        """Returns hit/download/coalescing counters."""
+        with self._lock:
+            return dict(self._counters, memory_entries=len(self._memory))
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_image_hasher():
+    """Returns the process-wide profile-picture hasher, creating it on first use."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = ProfilePicHasher()
+    return _hasher
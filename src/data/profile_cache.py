@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+# Cache configuration (overridable through environment variables)
+PROFILE_CACHE_PATH = os.environ.get("PROFILE_CACHE_PATH", os.path.join(BASE_DIR, "src/data/cache/profiles.db"))
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", 7 * 24 * 3600))  # Seconds
+PROFILE_CACHE_MEMORY_SIZE = int(os.environ.get("PROFILE_CACHE_MEMORY_SIZE", 10000))  # Entries
+
+class ProfileCache:
+    """
+    Two-tier cache of scraped profile records keyed by username.
+
+    - An in-memory LRU tier holds the most recently used `memory_size` records.
+    - An SQLite table persists every record with the time it was fetched.
+
+    Records older than `ttl` seconds are treated as missing in both tiers.
+    """
+
+    def __init__(self, path: str = PROFILE_CACHE_PATH, ttl: float = PROFILE_CACHE_TTL,
+                 memory_size: int = PROFILE_CACHE_MEMORY_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # username -> (record, fetched_at)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "username TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_profiles_fetched_at ON profiles (fetched_at)")
+        self._conn.commit()
+
+    def _is_fresh(self, fetched_at: float):
+        return time.time() - fetched_at < self.ttl
+
+    def _remember(self, username: str, record: dict, fetched_at: float):
+        """Stores a record in the LRU tier, evicting the least recently used one if full."""
+        self._memory[username] = (record, fetched_at)
+        self._memory.move_to_end(username)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, username: str):
+        """
+        Returns the cached record for `username` if it is still fresh, otherwise None.
+        """
+        key = username.lower()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                record, fetched_at = entry
+                if self._is_fresh(fetched_at):
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return dict(record)
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM profiles WHERE username = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+
+            data, fetched_at = row
+            if not self._is_fresh(fetched_at):
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            record = json.loads(data)
+            self._remember(key, record, fetched_at)
+            self._counters["disk_hits"] += 1
+            return dict(record)
+
+    def put(self, username: str, record: dict):
+        """Stores a freshly scraped record for `username` in both tiers."""
+        key = username.lower()
+        fetched_at = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (username, data, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(record), fetched_at)
+            )
+            self._conn.commit()
+            self._remember(key, dict(record), fetched_at)
+
+    def purge_expired(self):
+        """Deletes expired records from disk and returns how many were removed."""
+        cutoff = time.time() - self.ttl
+
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM profiles WHERE fetched_at < ?", (cutoff,))
+            self._conn.commit()
+            for key in [key for key, (_, fetched_at) in self._memory.items() if fetched_at < cutoff]:
+                del self._memory[key]
+            return cursor.rowcount
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_profile_cache = None
+_profile_cache_lock = threading.Lock()
+
+def get_profile_cache():
+    """Returns the process-wide profile cache, opening it on first use."""
+    global _profile_cache
+    if _profile_cache is None:
+        with _profile_cache_lock:
+            if _profile_cache is None:
+                _profile_cache = ProfileCache()
+    return _profile_cache
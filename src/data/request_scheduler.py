@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from collections import deque
+import instaloader
+
+# Per-session request budget (requests/hour), adapted between the floor and the ceiling
+DEFAULT_RATE_PER_HOUR = float(os.environ.get("SCHEDULER_RATE_PER_HOUR", 900))
+MIN_RATE_PER_HOUR = 60.0
+MAX_RATE_PER_HOUR = float(os.environ.get("SCHEDULER_MAX_RATE_PER_HOUR", 1200))
+BURST_SIZE = 10
+
+# Adaptive backoff: multiplicative decrease on throttling, additive increase after clean streaks
+RATE_DECREASE_FACTOR = 0.5
+RATE_INCREASE_STEP = 30.0
+CLEAN_STREAK_FOR_INCREASE = 100
+BASE_COOLDOWN = float(os.environ.get("SCHEDULER_BASE_COOLDOWN", 60))  # Seconds
+MAX_COOLDOWN = float(os.environ.get("SCHEDULER_MAX_COOLDOWN", 900))  # Seconds
+
+# Instaloader's own pacing (a random sleep before every request and per-query-type limits) on top of
+# the token buckets. Only disable it against a local stand-in (see `benchmarks/fake_instagram.py`).
+INSTALOADER_PACING = os.environ.get("SCHEDULER_INSTALOADER_PACING", "1") != "0"
+
+# Window (seconds) over which the current request rate is measured
+RATE_WINDOW = 60.0
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def reserve(self):
+        """
+        Takes one token and returns the seconds the caller has to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+class ScheduledSession:
+    """One Instaloader session with its own token bucket and backoff state."""
+
+    def __init__(self, name: str, loader: instaloader.Instaloader, rate_per_hour: float):
+        self.name = name
+        self.loader = loader
+        self.rate_per_hour = rate_per_hour
+        self.bucket = TokenBucket(rate_per_hour / 3600, BURST_SIZE)
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+        self.clean_streak = 0
+        self.requests = 0
+        self.throttles = 0
+
+    def next_available(self):
+        """Seconds until this session can issue its next request."""
+        return max(self.cooldown_until - time.monotonic(), -self.bucket.available() * 3600 / self.rate_per_hour, 0.0)
+
+class SchedulerRateController(instaloader.RateController):
+    """Instaloader rate controller routing every request of a session through the scheduler."""
+
+    def __init__(self, context, scheduler: "RequestScheduler", session_name: str):
+        super().__init__(context)
+        self._scheduler = scheduler
+        self._session_name = session_name
+
+    def wait_before_query(self, query_type: str) -> None:
+        self._scheduler.before_request(self._session_name)
+        if INSTALOADER_PACING:
+            super().wait_before_query(query_type)
+
+    def handle_429(self, query_type: str) -> None:
+        self.sleep(self._scheduler.record_throttle(self._session_name))
+
+class RequestScheduler:
+    """
+    Central scheduler for every Instagram-bound request of the scraper.
+
+    - Each logged-in session has a token bucket; requests wait for a token.
+    - Observed 429s / connection errors halve the session's rate and put it in
+      an exponentially growing cooldown; clean streaks raise the rate again.
+    - Work is spread across the pool by `acquire_session()`, which returns the
+      session able to issue a request the soonest.
+    """
+
+    def __init__(self, rate_per_hour: float = DEFAULT_RATE_PER_HOUR):
+        self.rate_per_hour = rate_per_hour
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._throttle_events = 0
+        self._recent_requests = deque()
+
+    def _new_loader(self, name: str):
+        return instaloader.Instaloader(sleep=INSTALOADER_PACING,
+                                       rate_controller=lambda ctx: SchedulerRateController(ctx, self, name))
+
+    def add_session(self, insta_user: str = None, insta_pass: str = None):
+        """
+        Adds a session to the pool (logged in if credentials are given) and returns it.
+
+        Adding an account that is already in the pool returns the existing session.
+        """
+        name = insta_user or "anonymous"
+        # Register before logging in: the login requests go through the scheduler too
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = ScheduledSession(name, self._new_loader(name), self.rate_per_hour)
+                self._sessions[name] = session
+
+        if insta_user and not session.loader.context.is_logged_in:
+            session.loader.login(insta_user, insta_pass)
+        return session
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def acquire_session(self, authenticated: bool = True):
+        """
+        Returns the session that can issue a request the soonest.
+
+        Anonymous sessions are only used when no authenticated session exists
+        (or `authenticated` is False). One is created if the pool is empty.
+        """
+        sessions = self.sessions()
+        if authenticated:
+            logged_in = [session for session in sessions if session.loader.context.is_logged_in]
+            sessions = logged_in or sessions
+        if not sessions:
+            return self.add_session()
+        return min(sessions, key=lambda session: (session.next_available(), -session.bucket.available()))
+
+    def before_request(self, name: str):
+        """Blocks until session `name` may issue a request (token available, no cooldown)."""
+        session = self._sessions[name]
+        wait = max(session.bucket.reserve(), session.cooldown_until - time.monotonic())
+
+        if wait > 0:
+            with self._lock:
+                self._waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+        with self._lock:
+            now = time.monotonic()
+            session.requests += 1
+            session.clean_streak += 1
+            self._recent_requests.append(now)
+
+            if session.clean_streak >= CLEAN_STREAK_FOR_INCREASE:
+                session.clean_streak = 0
+                session.consecutive_throttles = 0
+                self._set_rate(session, session.rate_per_hour + RATE_INCREASE_STEP)
+
+    def record_throttle(self, name: str):
+        """
+        Records a 429 / connection error on session `name` and backs it off.
+
+        Returns:
+            float: The cooldown (seconds) before the session should be used again.
+        """
+        with self._lock:
+            session = self._sessions[name]
+            session.throttles += 1
+            session.clean_streak = 0
+            session.consecutive_throttles += 1
+            self._throttle_events += 1
+
+            cooldown = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (session.consecutive_throttles - 1))
+            session.cooldown_until = time.monotonic() + cooldown
+            self._set_rate(session, session.rate_per_hour * RATE_DECREASE_FACTOR)
+
+        print(f"⚠️ Session {name} throttled, backing off {cooldown:.0f}s "
+              f"(rate now {session.rate_per_hour:.0f} req/h).")
+        return cooldown
+
+    def record_error(self, name: str, error: Exception):
+        """
+        Backs session `name` off after a request failed with a connection error.
+
+        Instaloader retries 429s itself and reports each of them through the rate
+        controller's `handle_429`, so a failure caused by a 429 is not recorded a
+        second time: the session keeps the backoff it already has.
+
+        Returns:
+            float: The cooldown (seconds) before the session should be used again.
+        """
+        if isinstance(error.__cause__, instaloader.exceptions.TooManyRequestsException):
+            with self._lock:
+                session = self._sessions[name]
+                return min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** max(session.consecutive_throttles - 1, 0))
+        return self.record_throttle(name)
+
+    def _set_rate(self, session: ScheduledSession, rate_per_hour: float):
+        """Clamps and applies a new rate to a session. Caller must hold the lock."""
+        session.rate_per_hour = min(MAX_RATE_PER_HOUR, max(MIN_RATE_PER_HOUR, rate_per_hour))
+        session.bucket.set_rate(session.rate_per_hour / 3600)
+
+    def metrics(self):
+        """Returns the current request rate, queue length and throttle events."""
+        with self._lock:
+            cutoff = time.monotonic() - RATE_WINDOW
+            while self._recent_requests and self._recent_requests[0] < cutoff:
+                self._recent_requests.popleft()
+
+            return {
+                "current_rate_per_minute": len(self._recent_requests) * 60 / RATE_WINDOW,
+                "queue_length": self._waiting,
+                "throttle_events": self._throttle_events,
+                "sessions": {
+                    session.name: {
+                        "logged_in": session.loader.context.is_logged_in,
+                        "rate_per_hour": session.rate_per_hour,
+                        "requests": session.requests,
+                        "throttles": session.throttles,
+                        "cooldown_seconds": max(0.0, session.cooldown_until - time.monotonic())
+                    }
+                    for session in self._sessions.values()
+                }
+            }
+
+_scheduler = RequestScheduler()
+
+def get_scheduler():
+    """Returns the process-wide request scheduler."""
+    return _scheduler
@@ -1,16 +1,15 @@
-import datetime
-import math
 import os
-import random
+import threading
 import time
-from flask import json
 import instaloader
 import re
-import requests
-from PIL import Image
-import imagehash
-from io import BytesIO
 from tqdm import tqdm
+from data.crawl_state import CrawlState
+from data.follower_store import FollowerStoreWriter, new_session_path
+from data.image_hasher import get_image_hasher
+from data.profile_cache import get_profile_cache
+from data.request_scheduler import get_scheduler
+from monitoring.metrics import stage_timer, timed_iter
 
 # Default Instagram profile picture URLs (Common placeholders)
 DEFAULT_PROFILE_PIC_HASHES = {
@@ -19,61 +18,163 @@ DEFAULT_PROFILE_PIC_HASHES = {
 }
 
 def get_image_hash(image_url):
-    """Downloads an image and returns its hash for comparison."""
-    try:
-        response = requests.get(image_url, stream=True, timeout=10)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert("L")  # Convert to grayscale
-        return str(imagehash.average_hash(img))  # Generate a hash of the image
-    except Exception as e:
-        print(f"❌ Error fetching image: {e}")
-        return None
+    """
+    Returns the hash of an image for comparison.
 
-def has_custom_profile_pic(profile_pic_url):
-    """Checks if a user has a custom profile picture by comparing against Instagram's default."""
-    image_hash = get_image_hash(profile_pic_url)
+    Hashes are cached by picture URL / CDN asset id, so repeated avatars are only downloaded once.
+    """
+    return get_image_hasher().get_hash(image_url)
 
+def is_custom_profile_pic_hash(image_hash):
+    """Checks whether an image hash differs from Instagram's default profile pictures."""
     if image_hash is None:
         return False  # Assume no custom picture if the image couldn't be retrieved
-    print(f"image hash: {image_hash}")
     return image_hash not in DEFAULT_PROFILE_PIC_HASHES.values()  # Check if it's different from default
 
-def get_instagram_data(user: instaloader.Profile):
+def has_custom_profile_pic(profile_pic_url):
+    """Checks if a user has a custom profile picture by comparing against Instagram's default."""
+    return is_custom_profile_pic_hash(get_image_hash(profile_pic_url))
+
+# Profile node fields needed for a follower record: record key -> key path in the GraphQL node
+PROFILE_NODE_FIELDS = {
+    "followers": ("edge_followed_by", "count"),
+    "following": ("edge_follow", "count"),
+    "biography": ("biography",),
+    "posts": ("edge_owner_to_timeline_media", "count"),
+    "is_private": ("is_private",),
+    "profile_pic_url": ("profile_pic_url",)
+}
+
+# Retry attempts for rate-limited crawls and how often the resume cursor is saved
+MAX_ATTEMPTS = 5
+CURSOR_CHECKPOINT_EVERY = 50
+
+# Request accounting for profile extraction
+profile_fetch_stats = {"profiles_reused": 0, "full_fetches": 0, "requests_saved": 0}
+_profile_fetch_stats_lock = threading.Lock()
+
+def _count_fetch(key: str):
+    with _profile_fetch_stats_lock:
+        profile_fetch_stats[key] += 1
+
+def fetch_stats_since(snapshot: dict):
+    """Returns the profile fetch counters accumulated since `snapshot` (a copy of `profile_fetch_stats`)."""
+    with _profile_fetch_stats_lock:
+        return {key: value - snapshot.get(key, 0) for key, value in profile_fetch_stats.items()}
+
+# Additional accounts ("user:pass,user2:pass2") whose sessions share the scraping work
+EXTRA_ACCOUNTS = os.environ.get("INSTAGRAM_EXTRA_ACCOUNTS", "")
+
+def parse_accounts(accounts: str):
+    """Parses a "user:pass,user2:pass2" string into (user, pass) tuples."""
+    return [tuple(account.split(":", 1)) for account in accounts.split(",") if ":" in account]
+
+def _node_value(node: dict, path: tuple):
+    for key in path:
+        node = node[key]
+    return node
+
+def _node_fields(profile: instaloader.Profile):
     """
-    Extracts Instagram profile data using Instaloader, including checking if the profile picture is custom.
+    Reads the fields of a follower record from the profile's GraphQL node.
+
+    This is the only place relying on instaloader internals (`Profile._node` and
+    `Profile._has_full_metadata`, which instaloader does not guarantee): if they
+    are missing or changed, the fields are read through the public properties instead.
+
+    Returns:
+        tuple: (fields dict keyed like `PROFILE_NODE_FIELDS` or None if the node lacks one,
+        whether the node holds the full profile metadata)
+    """
+    node = getattr(profile, "_node", None)
+    has_full_metadata = getattr(profile, "_has_full_metadata", False) is True
+    if not isinstance(node, dict):
+        return None, has_full_metadata
+    try:
+        fields = {key: _node_value(node, path) for key, path in PROFILE_NODE_FIELDS.items() if key != "profile_pic_url"}
+    except (KeyError, TypeError):
+        return None, has_full_metadata
+    # Read from the node: `Profile.profile_pic_url` costs an extra iPhone API request when logged in
+    fields["profile_pic_url"] = node.get("profile_pic_url_hd") or node.get("profile_pic_url")
+    return fields, has_full_metadata
+
+def _public_fields(profile: instaloader.Profile):
+    """Reads the fields of a follower record through instaloader's public `Profile` properties."""
+    return {
+        "followers": profile.followers,
+        "following": profile.followees,
+        "biography": profile.biography,
+        "posts": profile.mediacount,
+        "is_private": profile.is_private,
+        "profile_pic_url": profile.profile_pic_url
+    }
+
+def extract_profile_fields(profile: instaloader.Profile):
     """
-    loader = instaloader.Instaloader()
+    Reads the fields needed for a follower record from an `instaloader.Profile`.
 
+    Profiles yielded by `get_followers()` are used as they are when their node
+    carries every field; otherwise the full profile is fetched with
+    `Profile.from_username` on the least-loaded authenticated session of the
+    request scheduler (one `web_profile_info` request).
+
+    Returns:
+        dict: Raw profile fields keyed like `PROFILE_NODE_FIELDS`.
+    """
+    fields, has_full_metadata = _node_fields(profile)
+    if fields is not None:
+        if not has_full_metadata:  # Otherwise already fetched by the caller (e.g. `Profile.from_username`)
+            _count_fetch("profiles_reused")
+            _count_fetch("requests_saved")  # No web_profile_info request at all
+        return fields
+    if has_full_metadata:
+        return _public_fields(profile)
+
+    session = get_scheduler().acquire_session()
     try:
-        print(f"🔍 Fetching data for {user.username}...")
-        profile = instaloader.Profile.from_username(loader.context, user.username)
-
-        # Extract profile details
-        followers = profile.followers
-        following = profile.followees
-        bio_length = len(profile.biography) if profile.biography else 0
-        posts = profile.mediacount
-        profile_pic_url = profile.profile_pic_url  # Profile picture URL
-        is_private = int(profile.is_private)  # Convert to 0/1
-        username_digit_count = len(re.findall(r"\d", user.username))  # Count digits in username
-        username_length = len(user.username)
-
-        # Check if the profile has a custom picture
-        has_profile_pic = int(has_custom_profile_pic(profile_pic_url))
-
-        return {
-            "followers": followers,
-            "following": following,
-            "bio_length": bio_length,
-            "posts": posts,
-            "has_profile_pic": has_profile_pic,
-            "is_private": is_private,
-            "digit_count": username_digit_count,
-            "username_length": username_length
-        }
+        with stage_timer("profile_fetch"):
+            profile = instaloader.Profile.from_username(session.loader.context, profile.username)
+    except instaloader.exceptions.ConnectionException as e:
+        get_scheduler().record_error(session.name, e)
+        raise
+    _count_fetch("full_fetches")
+
+    fields, _ = _node_fields(profile)
+    return fields if fields is not None else _public_fields(profile)
+
+def get_profile_fields(user: instaloader.Profile):
+    """
+    Fetches the raw profile fields of a follower (no caching, no picture hashing).
+
+    When given a `Profile` (e.g. yielded by `get_followers()`), its fields are read
+    directly and the full profile is only fetched if something is missing.
+    A plain username is fetched through the least-loaded session of the request scheduler.
+
+    Args:
+        user (instaloader.Profile | str): The profile (or username) to extract.
+
+    Returns:
+        dict: Raw fields as returned by `extract_profile_fields`, or None if retrieval failed.
+    """
+    username = user if isinstance(user, str) else user.username
+
+    try:
+        if isinstance(user, str):
+            print(f"🔍 Fetching data for {username}...")
+            session = get_scheduler().acquire_session()
+            try:
+                with stage_timer("profile_fetch"):
+                    profile = instaloader.Profile.from_username(session.loader.context, username)
+            except instaloader.exceptions.ConnectionException as e:
+                get_scheduler().record_error(session.name, e)
+                raise
+        else:
+            profile = user
+
+        return extract_profile_fields(profile)
 
     except instaloader.exceptions.ProfileNotExistsException:
-        print(f"❌ Error: Profile '{user.username}' does not exist.")
+        print(f"❌ Error: Profile '{username}' does not exist.")
         return None
     except instaloader.exceptions.ConnectionException as e:
         print(f"❌ Connection error: {e}")
@@ -82,94 +183,204 @@ def get_instagram_data(user: instaloader.Profile):
         print(f"❌ Unexpected error: {e}")
         return None
 
-def get_followers_data(username: str, insta_user: str, insta_pass: str, attempt: int = 1, retrieved_followers: list = None):
+def build_follower_record(username: str, fields: dict, has_profile_pic: bool):
+    """Builds the follower record used for inference from raw profile fields."""
+    return {
+        "followers": fields["followers"],
+        "following": fields["following"],
+        "bio_length": len(fields["biography"]) if fields["biography"] else 0,
+        "posts": fields["posts"],
+        "has_profile_pic": int(has_profile_pic),
+        "is_private": int(fields["is_private"]),  # Convert to 0/1
+        "digit_count": len(re.findall(r"\d", username)),  # Count digits in username
+        "username_length": len(username)
+    }
+
+def get_instagram_data(user: instaloader.Profile):
     """
-    Fetches the list of followers for a given Instagram username while handling rate limits.
-    
-    - Resumes fetching if interrupted.
-    - Uses exponential backoff for delays.
+    Extracts Instagram profile data using Instaloader, including checking if the profile picture is custom.
+
+    Fresh records found in the profile cache are returned without touching the network.
+    Otherwise the fields are fetched with `get_profile_fields`.
 
     Args:
-        username (str): The target Instagram username.
-        insta_user (str): Your Instagram username.
-        insta_pass (str): Your Instagram password.
-        attempt (int): Retry attempt count.
-        retrieved_followers (list): Followers collected so far.
+        user (instaloader.Profile | str): The profile (or username) to extract.
+    """
+    username = user if isinstance(user, str) else user.username
 
-    Returns:
-        list(str): A list of follower usernames.
+    # ✅ Serve from the profile cache when a fresh record exists
+    cache = get_profile_cache()
+    cached = cache.get(username)
+    if cached is not None:
+        return cached
+
+    fields = get_profile_fields(user)
+    if fields is None:
+        return None
+
+    # Check if the profile has a custom picture
+    profile_pic_url = fields["profile_pic_url"]
+    has_profile_pic = has_custom_profile_pic(profile_pic_url) if profile_pic_url else False
+
+    follower_data = build_follower_record(username, fields, has_profile_pic)
+    cache.put(username, follower_data)
+    return follower_data
+
+class CrawlIncompleteError(instaloader.exceptions.ConnectionException):
+    """Raised when a follower crawl gives up before the end; its progress is saved for the next run."""
+
+    def __init__(self, message: str, retrieved: int):
+        super().__init__(message)
+        self.retrieved = retrieved
+
+def _crawl_followers(loader: instaloader.Instaloader, username: str, state: CrawlState, store: FollowerStoreWriter,
+                     progress_callback=None, follower_callback=None):
     """
-    loader = instaloader.Instaloader()
+    Walks the target's followers once, resuming from the saved cursor if there is one.
 
-    try:
-        # ✅ Login to Instagram
-        loader.login(insta_user, insta_pass)
+    The iterator's cursor is saved every CURSOR_CHECKPOINT_EVERY new followers and when
+    the walk is interrupted, so the next attempt continues from the last page.
+    """
+    print(f"🔍 Fetching followers of {username}...")
+    profile = instaloader.Profile.from_username(loader.context, username)
+
+     # ✅ Get total number of followers
+    total_followers = profile.followers
 
-        print(f"🔍 Fetching followers of {username} (Attempt {attempt})...")
-        profile = instaloader.Profile.from_username(loader.context, username)
+    followers_iterator = profile.get_followers()
 
-        # ✅ Initialize list if first call
-        if retrieved_followers is None:
-            retrieved_followers = []
+    # ✅ Resume from the last saved page instead of re-paginating
+    frozen = state.load_cursor()
+    if frozen is not None:
+        try:
+            followers_iterator.thaw(frozen)
+            print(f"⏩ Resuming {username} after {state.seen_count()} followers.")
+        except instaloader.exceptions.InvalidArgumentException as e:
+            print(f"⚠️ Cannot resume crawl of {username}: {e}")
 
-         # ✅ Get total number of followers
-        total_followers = profile.followers
+    new_since_checkpoint = 0
 
+    try:
         # ✅ Initialize tqdm progress bar
-        with tqdm(total=total_followers, desc="Fetching followers", unit="follower") as pbar:
-            # ✅ Get followers and resume from last retrieved follower
-            for follower in profile.get_followers():
-                if follower.username in retrieved_followers:
+        with tqdm(total=total_followers, initial=state.seen_count(), desc="Fetching followers", unit="follower") as pbar:
+            for follower in timed_iter(followers_iterator, "pagination"):
+                if not state.mark_seen(follower.userid, follower.username):
                     continue  # ✅ Skip already retrieved followers
-                
-                retrieved_followers.append(follower.username)
 
-                # ✅ Get follower data and save to JSON
-                follower_data = get_instagram_data(follower)
-                if follower_data:
-                    save_follower_data(username, follower_data)
+                if follower_callback:
+                    follower_callback(follower)  # ✅ Enrichment is done by the caller
+                else:
+                    # ✅ Get follower data and append it to the session file
+                    follower_data = get_instagram_data(follower)
+                    if follower_data:
+                        store.write(dict(follower_data, username=follower.username))
+
+                # ✅ Persist the resume cursor periodically
+                new_since_checkpoint += 1
+                if new_since_checkpoint >= CURSOR_CHECKPOINT_EVERY:
+                    if store is not None:
+                        store.checkpoint()
+                    state.save_cursor(followers_iterator.freeze())
+                    new_since_checkpoint = 0
 
                 # ✅ Update progress bar
                 pbar.update(1)
+                if progress_callback:
+                    progress_callback(pbar.n, total_followers)
+    except (instaloader.exceptions.ConnectionException, KeyboardInterrupt):
+        # ✅ Persist what we have so the next attempt resumes from here
+        if store is not None:
+            store.checkpoint()
+        state.save_cursor(followers_iterator.freeze())
+        raise
 
-            # ✅ Add random delay to prevent detection
-            time.sleep(random.uniform(3, 10))  
-
-        print(f"✅ Retrieved {len(retrieved_followers)} followers.")
-        return retrieved_followers  # ✅ Return the full list
-
-    except instaloader.exceptions.ConnectionException:
-        wait_time = min(300, math.pow(2, attempt) * 60)  # ✅ Exponential backoff (max 5 min)
-        print(f"❌ Rate limit reached. Waiting {wait_time / 60:.1f} minutes before retrying...")
-        time.sleep(wait_time)
-
-        # ✅ Retry while keeping already retrieved followers
-        return get_followers_data(username, attempt + 1, retrieved_followers)
-
-def save_follower_data(username: str, follower_data: dict):
+def get_followers_data(username: str, insta_user: str, insta_pass: str, max_attempts: int = MAX_ATTEMPTS,
+                       progress_callback=None, store: FollowerStoreWriter = None, extra_accounts: list = None,
+                       follower_callback=None, replay_resumed: bool = False):
     """
-    Saves follower data to a JSON file in the src/data/datasets directory.
+    Fetches the list of followers for a given Instagram username while handling rate limits.
     
+    - Resumes from the last saved page if interrupted (also across runs).
+    - Dedupes followers by user id through the persistent crawl state.
+    - Paces every request through the rate-limit-aware request scheduler.
+
     Args:
         username (str): The target Instagram username.
-        follower_data (dict): Data of the follower to save.
+        insta_user (str): Your Instagram username.
+        insta_pass (str): Your Instagram password.
+        max_attempts (int): Number of attempts before giving up on rate limits.
+        progress_callback (callable): Optional `callback(retrieved, total)` called after each follower.
+        store (FollowerStoreWriter): Session writer for the follower records (if omitted, a new session file
+            unless `follower_callback` is given).
+        extra_accounts (list): Additional (user, password) pairs whose sessions share the profile fetches.
+        follower_callback (callable): If given, called with each new follower `Profile` instead of
+            enriching and storing it inline (used by the concurrent analysis pipeline).
+        replay_resumed (bool): If True, the followers retrieved by an interrupted earlier run are also
+            passed to `follower_callback` (as usernames, before the crawl continues), and only their
+            number is returned, so no list of the whole crawl is built.
+
+    Returns:
+        list(str): A list of follower usernames, including those retrieved by an interrupted earlier run
+        (which are not passed to `follower_callback` unless `replay_resumed`).
+        int: The number of followers retrieved, if `replay_resumed`.
+
+    Raises:
+        CrawlIncompleteError: If the crawl is still rate limited after `max_attempts` attempts.
     """
-    timestamp = datetime.now().strftime("%d-%m-%YT%H-%M-%S")
-    filename = f"{username}-{timestamp}.json"
-    filepath = os.path.abspath(os.path.join(os.path.dirname(__file__), "datasets", filename))
+    scheduler = get_scheduler()
+    state = CrawlState(username)
+
+    # ✅ One append-only session file per crawl (the caller stores the records it enriches itself)
+    owns_store = store is None and follower_callback is None
+    if owns_store:
+        store = FollowerStoreWriter(new_session_path(username))
+    # A resumed crawl's earlier followers are stored in the earlier session, so this one is not complete
+    fresh_crawl = state.seen_count() == 0
+    fetches_before = fetch_stats_since({})
+
+    try:
+        if replay_resumed:
+            for name in state.iter_usernames():
+                follower_callback(name)
+
+        # ✅ Extra accounts share the profile fetches (their login failures are not fatal)
+        for extra_user, extra_pass in (extra_accounts or []) + parse_accounts(EXTRA_ACCOUNTS):
+            try:
+                scheduler.add_session(extra_user, extra_pass)
+            except instaloader.exceptions.InstaloaderException as e:
+                print(f"⚠️ Could not log in extra account {extra_user}: {e}")
+
+        for attempt in range(1, max_attempts + 1):
+            # ✅ Login to Instagram (the follower cursor is bound to this session)
+            try:
+                session = scheduler.add_session(insta_user, insta_pass)
+                _crawl_followers(session.loader, username, state, store, progress_callback, follower_callback)
+                break
+
+            except instaloader.exceptions.ConnectionException as e:
+                if attempt == max_attempts:
+                    print(f"❌ Giving up on {username} after {attempt} attempts. Progress saved for the next run.")
+                    raise CrawlIncompleteError(f"Gave up on the followers of {username} after {attempt} attempts "
+                                               f"({state.seen_count()} retrieved)", state.seen_count()) from e
 
-    # Load existing data if the file exists
-    if os.path.exists(filepath):
-        with open(filepath, "r") as file:
-            data = json.load(file)
-    else:
-        data = []
+                # ✅ Adaptive backoff from the scheduler (grows with consecutive throttles)
+                wait_time = scheduler.record_error(insta_user, e)
+                print(f"❌ Rate limit reached (attempt {attempt}). Waiting {wait_time / 60:.1f} minutes before retrying...")
+                time.sleep(wait_time)
 
-    # Append new follower data
-    data.append(follower_data)
+        retrieved_count = state.seen_count()
+        retrieved_followers = None if replay_resumed else list(state.iter_usernames())
+        state.clear()  # ✅ Crawl complete, the next run starts fresh
+        if owns_store and fresh_crawl:
+            store.complete()
 
-    # Save updated data to the file
-    with open(filepath, "w") as file:
-        json.dump(data, file, indent=4)
+        print(f"✅ Retrieved {retrieved_count} followers." + (f" Data saved to {store.path}" if store else ""))
+        fetches = fetch_stats_since(fetches_before)
+        print(f"✅ Reused {fetches['profiles_reused']} follower profiles without refetching "
+              f"({fetches['requests_saved']} requests saved, {fetches['full_fetches']} full fetches).")
+        return retrieved_count if replay_resumed else retrieved_followers  # ✅ Return the full list
 
-    print(f"✅ Saved data for follower {follower_data['username']} to {filename}")
\ No newline at end of file
+    finally:
+        state.close()
+        if owns_store:
+            store.close()
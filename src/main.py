@@ -1,37 +1,145 @@
 import argparse
 import logging
-from api.api_server import app
-from data.scraper import get_followers_data
-from api.bot_detector import analyze_followers
+import os
+from contextlib import nullcontext
+from datetime import datetime
+from monitoring.metrics import stage_totals
+from monitoring.profiler import SamplingProfiler
+
+# Each command imports the modules it runs (Flask, instaloader, scikit-learn...), so `--help`
+# and argument errors return immediately and scoring stored records never loads the scraper.
+# Options left unset (None) fall back to the defaults of the function they are passed to.
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_api():
-    """Boots up the API server."""
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+
+# Default `--profile` report path (`.txt` and `.folded` are appended)
+PROFILE_DIR = os.path.join(BASE_DIR, "logs")
+
+def _given(**options):
+    """Keeps the options set on the command line."""
+    return {name: value for name, value in options.items() if value is not None}
+
+def run_api(debug: bool = True):
+    """Boots up the API server (`debug` also enables the auto-reloader, which runs it in a child process)."""
+    from api.api_server import app
+
     logger.info("🚀 Starting API server at http://0.0.0.0:8000")
-    app.run(debug=True, host="0.0.0.0", port=8000)
+    app.run(debug=debug, host="0.0.0.0", port=8000)
 
-def analyze_user(username, user, password):
+def analyze_user(username, user, password, concurrency=None):
     """Fetches the followers of an Instagram user and analyzes how many are bots."""
+    from api.pipeline import analyze_account
+
     print(f"Analyzing followers of {username}...")
-    followers = get_followers_data(username, user, password)
-    bot_percentage, df = analyze_followers(followers)
+    bot_percentage, results = analyze_account(username, user, password, **_given(concurrency=concurrency))
     print(f"Percentage of instagram bots in {username} followers: {bot_percentage:.2f}%")
-    print(df)
+    print(results.to_pandas())
+
+def analyze_user_incremental(username, user, password, concurrency=None, ttl=None):
+    """Re-analyzes an Instagram user's followers, scoring only the ones changed since the previous crawl."""
+    from api.incremental import analyze_account_incremental
+
+    print(f"Re-analyzing followers of {username}...")
+    report, results = analyze_account_incremental(username, user, password, **_given(ttl=ttl, concurrency=concurrency))
+    print(f"Percentage of instagram bots in {username} followers: {report['bot_percentage']:.2f}% "
+          f"(previously {report['previous_bot_percentage']:.2f}%)")
+    print(f"📊 {report['added']} followers added, {report['removed']} removed "
+          f"({report['churn_percentage']:.2f}% churn); {report['reused_scores']} stored scores reused, "
+          f"{report['rescored']} stale ones refreshed. Snapshot saved to {report['snapshot']}")
+    print(results.to_pandas())
+
+def sample_user(username, user, password, ci_width=None, confidence=None, max_sample=None, concurrency=None):
+    """Estimates the bot percentage of an Instagram user's followers from a random sample."""
+    from api.sampling import sample_account
+
+    print(f"Sampling followers of {username}...")
+    estimate, results = sample_account(username, user, password, **_given(ci_width=ci_width, confidence=confidence,
+                                                                          max_sample=max_sample, concurrency=concurrency))
+    print(f"Estimated percentage of instagram bots in {username} followers: {estimate['bot_percentage']:.2f}% "
+          f"({estimate['confidence']:.0%} CI {estimate['ci_low']:.2f}%-{estimate['ci_high']:.2f}%, "
+          f"{estimate['sample_size']} of {estimate['population']} followers analyzed)")
+    if not estimate["ci_width_reached"]:
+        print("⚠️ Sample exhausted before reaching the requested interval width; increase --max-sample.")
+    print(results.to_pandas())
+
+def analyze_target_file(path, user, password, concurrency=None, workers=None):
+    """Analyzes the followers of every account listed in `path`, scoring shared followers once."""
+    import pandas as pd
+    from api.batch import analyze_targets, read_targets
+
+    targets = read_targets(path)
+    print(f"Analyzing followers of {len(targets)} accounts...")
+    report, results = analyze_targets(targets, user, password, **_given(concurrency=concurrency, workers=workers))
+    print(pd.DataFrame.from_dict(report["targets"], orient="index"))
+    print(f"✅ {report['unique_followers']} unique followers across {report['memberships']} follows "
+          f"({report['memberships'] - report['unique_followers']} duplicates not fetched again), "
+          f"{report['analyzed']} analyzed, {report['bots']} bots.")
+
+def analyze_stored(path):
+    """Scores the follower records of a stored crawl session without scraping them again."""
+    from api.bot_detector import analyze_stored_followers
+
+    print(f"Analyzing the followers stored in {path}...")
+    bot_percentage, results = analyze_stored_followers(path)
+    print(f"Percentage of instagram bots among the stored followers: {bot_percentage:.2f}%")
+    print(results.to_pandas())
+
+def print_stage_timings():
+    """Prints the time spent in each timed stage of the scrape-and-score path."""
+    totals = stage_totals()
+    if not totals:
+        return
+    print("\n📊 Stage timings:")
+    for stage, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        print(f"   - {stage:<16} {seconds:>9.2f}s over {count:>8} calls ({seconds / count * 1000:.2f} ms each)")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Instagram Bot Detector")
     parser.add_argument("--api", action="store_true", help="Boots up the API server")
     parser.add_argument("--user", type=str, help="Instagram User to analyze")
+    parser.add_argument("--stored", type=str, metavar="FILE", help="Score the followers stored by a previous crawl session (no scraping)")
+    parser.add_argument("--targets", type=str, metavar="FILE", help="File of Instagram users to analyze together (one per line)")
     parser.add_argument("--insta_user", type=str, help="Your username for Instagram (for login)")
     parser.add_argument("--insta_pass", type=str, help="Your password for Instagram (for login)")
+    parser.add_argument("--concurrency", type=int, help="Number of concurrent profile fetches (default: PIPELINE_CONCURRENCY or 8)")
+    parser.add_argument("--workers", type=int, help="Number of scoring processes with --targets, 0 scores in-process (default: BATCH_SCORING_WORKERS or one per CPU)")
+    parser.add_argument("--incremental", action="store_true", help="Only analyze the followers changed since the previous crawl")
+    parser.add_argument("--score-ttl", type=float, help="Seconds a stored score is reused with --incremental (default: INCREMENTAL_SCORE_TTL or 7 days)")
+    parser.add_argument("--sample", action="store_true", help="Estimate the bot percentage from a random sample of followers")
+    parser.add_argument("--ci-width", type=float, help="Stop sampling once the confidence interval is this wide, as a fraction (default: 0.05)")
+    parser.add_argument("--confidence", type=float, help="Confidence level of the interval (default: 0.95)")
+    parser.add_argument("--max-sample", type=int, help="Maximum number of followers to analyze when sampling (default: 5000)")
+    parser.add_argument("--profile", nargs="?", metavar="PATH",
+                        const=os.path.join(PROFILE_DIR, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}"),
+                        help="Sample the run with the profiler and write PATH.txt (top functions) and "
+                             "PATH.folded (flame graph stacks); defaults to logs/profile-<time>")
     
     args = parser.parse_args()
 
-    if args.api:
-        run_api()
-    elif args.user and args.insta_user and args.insta_pass:
-        analyze_user(args.user, args.insta_user, args.insta_pass)
-    else:
-        print("Use --api to start the server or --user to analyze a user.")
+    profiler = SamplingProfiler() if args.profile else None
+    try:
+        with profiler or nullcontext():
+            if args.api:
+                run_api(debug=not args.profile)  # The profiler samples this process only
+            elif args.stored:
+                analyze_stored(args.stored)
+            elif args.targets and args.insta_user and args.insta_pass:
+                analyze_target_file(args.targets, args.insta_user, args.insta_pass, args.concurrency, args.workers)
+            elif args.user and args.insta_user and args.insta_pass and args.sample:
+                sample_user(args.user, args.insta_user, args.insta_pass, args.ci_width, args.confidence,
+                            args.max_sample, args.concurrency)
+            elif args.user and args.insta_user and args.insta_pass and args.incremental:
+                analyze_user_incremental(args.user, args.insta_user, args.insta_pass, args.concurrency, args.score_ttl)
+            elif args.user and args.insta_user and args.insta_pass:
+                analyze_user(args.user, args.insta_user, args.insta_pass, args.concurrency)
+            else:
+                print("Use --api to start the server, --user to analyze a user, --targets to analyze a list of users "
+                      "or --stored to score a stored crawl session.")
+    finally:
+        if profiler is not None:
+            print_stage_timings()
+            report_path, folded_path = profiler.write_report(args.profile)
+            print(f"✅ Profile written to `{report_path}` (flame graph stacks in `{folded_path}`)")
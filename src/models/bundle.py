@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+
+from models.compiled_trees import FOREST_ARRAYS, CompiledForest, compile_booster
+
+# Versioned model bundles live in <BUNDLE_DIR>/<feature_mode>/<version>/
+BUNDLE_DIR = os.environ.get("MODEL_BUNDLE_DIR", os.path.join(BASE_DIR, "src/models/model/bundles"))
+
+BUNDLE_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+BOOSTER_FILE = "booster.ubj"
+CURRENT_FILE = "CURRENT"  # Name of the active version of a feature pipeline
+
+# Fitted MinMaxScaler attributes stored as arrays
+SCALER_ARRAYS = ["scale_", "min_", "data_min_", "data_max_", "data_range_"]
+
+def bundle_root(feature_mode: str):
+    """Directory holding every bundle version of a feature pipeline."""
+    return os.path.join(BUNDLE_DIR, feature_mode)
+
+def _save_array(bundle_path: str, name: str, array):
+    np.save(os.path.join(bundle_path, f"{name}.npy"), np.ascontiguousarray(array))
+    return f"{name}.npy"
+
+def _load_array(bundle_path: str, file_name: str):
+    """Maps an `.npy` file read-only: processes loading the same bundle share its pages."""
+    return np.load(os.path.join(bundle_path, file_name), mmap_mode="r")
+
+def _vectorizer_params(vectorizer):
+    """JSON-serializable constructor parameters of a fitted TfidfVectorizer."""
+    params = vectorizer.get_params()
+    for name in ("analyzer", "preprocessor", "tokenizer"):
+        if callable(params[name]):
+            raise ValueError(f"Vectorizers with a custom {name} cannot be bundled.")
+    params.pop("vocabulary")
+    params["dtype"] = np.dtype(params["dtype"]).name
+    params["ngram_range"] = list(params["ngram_range"])
+    return params
+
+def _model_params(model):
+    """Hyperparameters of an XGBClassifier that survive JSON (the UBJSON booster does not keep them)."""
+    return {name: value for name, value in model.get_params().items()
+            if isinstance(value, (bool, int, float, str)) and not (isinstance(value, float) and np.isnan(value))}
+
+def write_bundle(model, vectorizer=None, scaler=None, feature_mode: str = "tfidf", root: str = None,
+                 activate: bool = True, metadata: dict = None):
+    """
+    Saves a trained model as a new bundle version.
+
+    The bundle is a directory with a `manifest.json`, the booster in XGBoost's
+    UBJSON format, the compiled tree arrays (see `compiled_trees.py`) and, for
+    the TF-IDF pipeline, the vocabulary, IDF weights and scaler as `.npy`
+    arrays that loaders memory-map. It is written to a temporary directory and
+    renamed into place, so a version is never visible half-written.
+
+    Args:
+        model (XGBClassifier): The trained model.
+        vectorizer (TfidfVectorizer): The fitted vectorizer (None for the dense pipeline).
+        scaler (MinMaxScaler): The fitted feature scaler (None for the dense pipeline).
+        feature_mode (str): Feature pipeline the model was trained on.
+        root (str): Bundle directory of the pipeline (defaults to `bundle_root(feature_mode)`).
+        activate (bool): Whether to make the new version the current one.
+        metadata (dict): Extra JSON-serializable training details stored in the manifest.
+
+    Returns:
+        str: The path of the new bundle.
+    """
+    root = root or bundle_root(feature_mode)
+    os.makedirs(root, exist_ok=True)
+
+    version = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    suffix = 1
+    while os.path.exists(os.path.join(root, version)):
+        version = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{suffix}"
+        suffix += 1
+
+    staging_path = os.path.join(root, f".staging-{version}-{os.getpid()}")
+    os.makedirs(staging_path)
+    try:
+        model.save_model(os.path.join(staging_path, BOOSTER_FILE))
+
+        forest = compile_booster(model)
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "feature_mode": feature_mode,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "booster": BOOSTER_FILE,
+            "params": _model_params(model),
+            "training": metadata or {},
+            "forest": {
+                "header": forest.header,
+                "arrays": {name: _save_array(staging_path, f"forest_{name}", getattr(forest, name))
+                           for name in FOREST_ARRAYS}
+            }
+        }
+
+        if vectorizer is not None:
+            # Terms ordered by their column index, so the vocabulary is a plain string array
+            terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+            manifest["vectorizer"] = {
+                "params": _vectorizer_params(vectorizer),
+                "vocabulary": _save_array(staging_path, "vocabulary", np.array(terms, dtype=str)),
+                "idf": _save_array(staging_path, "idf", vectorizer.idf_)
+            }
+
+        if scaler is not None:
+            manifest["scaler"] = {
+                "params": {"feature_range": list(scaler.feature_range), "clip": bool(scaler.clip),
+                           "n_features_in_": int(scaler.n_features_in_),
+                           "n_samples_seen_": int(scaler.n_samples_seen_)},
+                "arrays": {name: _save_array(staging_path, f"scaler_{name.rstrip('_')}", getattr(scaler, name))
+                           for name in SCALER_ARRAYS}
+            }
+
+        with open(os.path.join(staging_path, MANIFEST_FILE), "w") as file:
+            json.dump(manifest, file, indent=2)
+
+        bundle_path = os.path.join(root, version)
+        os.rename(staging_path, bundle_path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+
+    print(f"✅ Model bundle {version} saved to `{bundle_path}`")
+    if activate:
+        activate_bundle(root, version)
+    return bundle_path
+
+def activate_bundle(root: str, version: str):
+    """Atomically points the pipeline's `CURRENT` file at `version` (which must be one of `list_versions`)."""
+    # Only plain bundle names: a version is joined into paths under `root`
+    if not isinstance(version, str) or "/" in version or os.sep in version or (os.altsep and os.altsep in version):
+        raise ValueError(f"Invalid model bundle version {version!r}.")
+    if version not in list_versions(root):
+        raise ValueError(f"No model bundle {version} in `{root}`.")
+
+    temp_path = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(temp_path, "w") as file:
+        file.write(version)
+    os.replace(temp_path, os.path.join(root, CURRENT_FILE))
+    print(f"✅ Model bundle {version} is now current")
+
+def current_version(root: str):
+    """Returns the current bundle version of a pipeline, or None if it has no bundle."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_versions(root: str):
+    """Returns the bundle versions of a pipeline, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+
+def read_manifest(bundle_path: str):
+    with open(os.path.join(bundle_path, MANIFEST_FILE)) as file:
+        manifest = json.load(file)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported model bundle format {manifest.get('format')} in `{bundle_path}`.")
+    return manifest
+
+def _load_vectorizer(bundle_path: str, spec: dict):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(spec["params"], dtype=np.dtype(spec["params"]["dtype"]),
+                  ngram_range=tuple(spec["params"]["ngram_range"]))
+    terms = _load_array(bundle_path, spec["vocabulary"])
+    vectorizer = TfidfVectorizer(**params, vocabulary={str(term): index for index, term in enumerate(terms)})
+    vectorizer.idf_ = _load_array(bundle_path, spec["idf"])
+    return vectorizer
+
+def _load_scaler(bundle_path: str, spec: dict):
+    from sklearn.preprocessing import MinMaxScaler
+
+    params = spec["params"]
+    scaler = MinMaxScaler(feature_range=tuple(params["feature_range"]), clip=params["clip"])
+    scaler.n_features_in_ = params["n_features_in_"]
+    scaler.n_samples_seen_ = params["n_samples_seen_"]
+    for name, file_name in spec["arrays"].items():
+        setattr(scaler, name, _load_array(bundle_path, file_name))
+    return scaler
+
+def load_bundle(bundle_path: str, backend: str = "xgboost"):
+    """
+    Loads a model bundle.
+
+    Arrays are memory-mapped read-only, so worker processes loading the same
+    bundle share its pages through the OS page cache.
+
+    Args:
+        bundle_path (str): Directory of the bundle version.
+        backend (str): "xgboost" loads the UBJSON booster, "compiled" the compiled tree arrays.
+
+    Returns:
+        tuple: (model, vectorizer or None, scaler or None, manifest)
+    """
+    manifest = read_manifest(bundle_path)
+
+    if backend == "compiled":
+        arrays = {name: _load_array(bundle_path, file_name)
+                  for name, file_name in manifest["forest"]["arrays"].items()}
+        model = CompiledForest(**arrays, **manifest["forest"]["header"])
+    else:
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier(**manifest.get("params", {}))
+        model.load_model(os.path.join(bundle_path, manifest["booster"]))
+
+    vectorizer = _load_vectorizer(bundle_path, manifest["vectorizer"]) if "vectorizer" in manifest else None
+    scaler = _load_scaler(bundle_path, manifest["scaler"]) if "scaler" in manifest else None
+    return model, vectorizer, scaler, manifest
+
+if __name__ == "__main__":
+    import joblib
+    from models.model_loader import MODEL_ARTIFACTS
+
+    parser = argparse.ArgumentParser(description="Package trained models as versioned bundles")
+    parser.add_argument("--features", choices=sorted(MODEL_ARTIFACTS), default="tfidf",
+                        help="Feature pipeline of the bundle")
+    parser.add_argument("--activate", metavar="VERSION", help="Make an existing bundle version current")
+    parser.add_argument("--list", action="store_true", help="List the bundle versions")
+    args = parser.parse_args()
+
+    root = bundle_root(args.features)
+    if args.list:
+        current = current_version(root)
+        for version in list_versions(root):
+            print(f"{'*' if version == current else ' '} {version}")
+    elif args.activate:
+        activate_bundle(root, args.activate)
+    else:
+        # Package the pickled artifacts written by xgboost_trainer.py
+        model_file, vectorizer_file, scaler_file = MODEL_ARTIFACTS[args.features]
+        write_bundle(joblib.load(model_file),
+                     joblib.load(vectorizer_file) if vectorizer_file else None,
+                     joblib.load(scaler_file) if scaler_file and os.path.exists(scaler_file) else None,
+                     feature_mode=args.features)
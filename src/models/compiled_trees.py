@@ -0,0 +1,254 @@
+import argparse
+import json
+import math
+import os
+import sys
+import numpy as np
+from scipy import sparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+# Flat arrays of a compiled forest, as stored in the `.npz` export
+FOREST_ARRAYS = ["roots", "column", "threshold", "left", "default_right", "value", "features"]
+
+SUPPORTED_OBJECTIVES = ("binary:logistic", "binary:logitraw")
+
+# Rows scored per traversal block
+CHUNK_ROWS = int(os.getenv("COMPILED_CHUNK_ROWS", 256))
+
+def compiled_path_for(model_path: str):
+    """Returns the path of the compiled export of a pickled model (`<model>.compiled.npz`)."""
+    return os.path.splitext(model_path)[0] + ".compiled.npz"
+
+class CompiledForest:
+    """
+    Array-based XGBoost forest for a binary classifier.
+
+    Every node of every tree lives in flat NumPy arrays: the input column it
+    splits on, its threshold, its left child (global node index; nodes are
+    numbered breadth-first so the right child is always `left + 1`), whether
+    missing values go right, and its leaf value. Leaves point to themselves
+    with an infinite threshold, so a whole batch is scored by `max_depth`
+    vectorized gather/compare steps over all (row, tree) pairs, without the
+    sklearn wrapper or a DMatrix.
+
+    Only the input columns used by some split are read (`features` maps each
+    compact column back to its input feature index). Like XGBoost, a value is
+    missing when it is NaN or, for sparse input, not stored in the matrix.
+
+    Exposes `predict_proba` / `predict` like `XGBClassifier`, so it can stand in for the model.
+    """
+
+    def __init__(self, roots, column, threshold, left, default_right, value, features,
+                 base_margin: float, max_depth: int, n_features: int, objective: str = "binary:logistic"):
+        self.roots = roots
+        self.column = column
+        self.threshold = threshold
+        self.left = left
+        self.default_right = default_right
+        self.value = value
+        self.features = features
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.objective = objective
+        self._column_of = None  # Input feature index -> compact column (-1 if unused), built on first sparse input
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.column)
+
+    def _used_columns(self, X):
+        """Dense float32 (n, len(features)) matrix of the used columns, NaN where a value is missing."""
+        if sparse.issparse(X):
+            X = X.tocsr()
+            if self._column_of is None or len(self._column_of) < X.shape[1]:
+                self._column_of = np.full(max(X.shape[1], self.features.max() + 1), -1, dtype=np.int64)
+                self._column_of[self.features] = np.arange(len(self.features))
+
+            # Scatter the stored entries of used columns; absent ones stay missing
+            columns = self._column_of[X.indices]
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            used = columns >= 0
+            dense = np.full((X.shape[0], len(self.features)), np.nan, dtype=np.float32)
+            dense[rows[used], columns[used]] = X.data[used]
+            return dense
+        return np.asarray(X, dtype=np.float32)[:, self.features]
+
+    def predict_margin(self, X):
+        """Returns the raw margin (sum of leaf values plus the base margin) of each row."""
+        values = self._used_columns(X)
+        if len(values) <= CHUNK_ROWS:
+            return self._margin(values)
+        # Blocks of rows keep the (row, tree) index arrays cache-sized
+        return np.concatenate([self._margin(values[start:start + CHUNK_ROWS])
+                               for start in range(0, len(values), CHUNK_ROWS)])
+
+    def _margin(self, values):
+        n_rows, n_columns = values.shape
+        has_missing = bool(np.isnan(values).any())
+        flat_values = values.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_columns)[:, None]
+        nodes = np.tile(self.roots, (n_rows, 1))
+
+        # One step down every (row, tree) pair per level; `take` on flat arrays is the fastest gather
+        for _ in range(self.max_depth):
+            x = flat_values.take(row_offsets + self.column.take(nodes))
+            go_right = x >= self.threshold.take(nodes)
+            if has_missing:
+                go_right |= np.isnan(x) & self.default_right.take(nodes)
+            nodes = self.left.take(nodes) + go_right
+
+        return self.value.take(nodes).sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def predict_proba(self, X):
+        """Returns an (n, 2) array of class probabilities, like `XGBClassifier.predict_proba`."""
+        margin = self.predict_margin(X)
+        positive = margin if self.objective == "binary:logitraw" else 1.0 / (1.0 + np.exp(-margin))
+        return np.column_stack([1.0 - positive, positive]).astype(np.float32)
+
+    def predict(self, X):
+        """Returns the predicted class of each row (margin > 0, i.e. probability > 0.5)."""
+        return (self.predict_margin(X) > 0).astype(np.int64)
+
+    @property
+    def header(self):
+        """The scalar parameters of the forest (everything but `FOREST_ARRAYS`), JSON-serializable."""
+        return {"base_margin": self.base_margin, "max_depth": self.max_depth,
+                "n_features": self.n_features, "objective": self.objective}
+
+    def save(self, path: str):
+        """Saves the forest as an uncompressed `.npz` (arrays plus a JSON header)."""
+        np.savez(path, header=np.array(json.dumps(self.header)),
+                 **{name: getattr(self, name) for name in FOREST_ARRAYS})
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            return cls(**{name: data[name] for name in FOREST_ARRAYS}, **header)
+
+def compile_booster(model):
+    """
+    Compiles a trained binary XGBoost model into a `CompiledForest`.
+
+    Reads XGBoost's JSON model, so thresholds and leaf values are the exact
+    float32 values the booster uses. If the model was trained with early
+    stopping, only the trees up to its best iteration are kept (like `predict_proba`).
+
+    Args:
+        model (XGBClassifier | xgboost.Booster): The trained model.
+
+    Returns:
+        CompiledForest: The compiled forest.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective not in SUPPORTED_OBJECTIVES or int(learner["learner_model_param"]["num_class"]) > 1:
+        raise ValueError(f"Only binary classifiers can be compiled (got {objective}).")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Only gbtree boosters can be compiled.")
+
+    forest = learner["gradient_booster"]["model"]
+    trees = forest["trees"]
+    try:
+        # Early stopping: predict_proba only uses the trees up to the best iteration
+        trees = trees[:forest["iteration_indptr"][model.best_iteration + 1]]
+    except (AttributeError, IndexError, KeyError):
+        pass
+
+    base_score = float(learner["learner_model_param"]["base_score"])
+    if objective == "binary:logistic":
+        base_score = min(max(base_score, 1e-16), 1 - 1e-16)
+        base_margin = math.log(base_score / (1 - base_score))
+    else:
+        base_margin = base_score
+
+    roots, split_index, threshold, left, default_right, value = [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported.")
+
+        tree_left = tree["left_children"]
+        tree_right = tree["right_children"]
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+
+        # Renumber breadth-first: the children of a split get consecutive ids (right = left + 1)
+        order, depth = [0], {0: 0}
+        for node in order:
+            if tree_left[node] != -1:
+                order += [tree_left[node], tree_right[node]]
+                depth[tree_left[node]] = depth[tree_right[node]] = depth[node] + 1
+        new_id = {node: i for i, node in enumerate(order)}
+
+        for node in order:
+            if tree_left[node] == -1:
+                # Leaves point to themselves and never go right
+                split_index.append(-1)
+                threshold.append(np.inf)
+                left.append(offset + new_id[node])
+                default_right.append(False)
+                value.append(conditions[node])  # Leaf values are stored as conditions
+            else:
+                split_index.append(tree["split_indices"][node])
+                threshold.append(conditions[node])
+                left.append(offset + new_id[tree_left[node]])
+                default_right.append(not tree["default_left"][node])
+                value.append(0.0)
+
+        roots.append(offset)
+        max_depth = max(max_depth, max(depth.values()))
+        offset += len(order)
+
+    split_index = np.asarray(split_index, dtype=np.int64)
+    features, column = np.unique(np.where(split_index < 0, 0, split_index), return_inverse=True)
+    if not features.size:
+        features = np.zeros(1, dtype=np.int64)
+
+    return CompiledForest(
+        roots=np.asarray(roots, dtype=np.int32),
+        column=column.astype(np.int32),
+        threshold=np.asarray(threshold, dtype=np.float32),
+        left=np.asarray(left, dtype=np.int32),
+        default_right=np.asarray(default_right, dtype=bool),
+        value=np.asarray(value, dtype=np.float32),
+        features=features.astype(np.int32),
+        base_margin=base_margin,
+        max_depth=max_depth,
+        n_features=int(learner["learner_model_param"]["num_feature"]),
+        objective=objective
+    )
+
+def export_compiled(model, model_path: str):
+    """Compiles `model` and saves it next to its pickle (see `compiled_path_for`). Returns the path."""
+    forest = compile_booster(model)
+    path = forest.save(compiled_path_for(model_path))
+    print(f"✅ Compiled {forest.n_trees} trees ({forest.n_nodes} nodes, depth {forest.max_depth}) to `{path}`")
+    return path
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(BASE_DIR, "src"))
+    import joblib
+    from models.model_loader import MODEL_ARTIFACTS
+
+    parser = argparse.ArgumentParser(description="Compile trained XGBoost models into flat tree arrays")
+    parser.add_argument("--features", choices=sorted(MODEL_ARTIFACTS), action="append",
+                        help="Feature pipeline(s) whose model to compile (default: every trained one)")
+    args = parser.parse_args()
+
+    for feature_mode in args.features or sorted(MODEL_ARTIFACTS):
+        model_path = MODEL_ARTIFACTS[feature_mode][0]
+        if not os.path.exists(model_path):
+            print(f"⚠️ No trained {feature_mode} model at `{model_path}`, skipping.")
+            continue
+        export_compiled(joblib.load(model_path), model_path)
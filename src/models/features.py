@@ -0,0 +1,92 @@
+import os
+import numpy as np
+from scipy.sparse import hstack
+from sklearn.preprocessing import MinMaxScaler
+
+# Feature pipelines: "tfidf" renders each profile into a sentence for the TF-IDF vectorizer
+# (plus the scaled numeric columns), "dense" maps the profile numbers straight to a float32 matrix
+FEATURE_MODES = ("tfidf", "dense")
+DEFAULT_FEATURE_MODE = os.environ.get("MODEL_FEATURES", "tfidf")
+
+# Raw profile fields, in the same order as the trainer's numerical columns
+RAW_FEATURE_KEYS = [
+    "followers", "following", "bio_length", "posts",
+    "has_profile_pic", "is_private", "digit_count", "username_length"
+]
+DERIVED_FEATURE_KEYS = ["follower_following_ratio", "has_numbers_in_username", "engagement_score"]
+DENSE_FEATURE_NAMES = RAW_FEATURE_KEYS + DERIVED_FEATURE_KEYS
+
+def check_feature_mode(feature_mode: str):
+    """Returns `feature_mode` if it is a known feature pipeline, raises ValueError otherwise."""
+    if feature_mode not in FEATURE_MODES:
+        raise ValueError(f"Unknown feature mode {feature_mode!r}, expected one of {FEATURE_MODES}.")
+    return feature_mode
+
+def raw_matrix(records):
+    """Stacks the raw fields of profile records into an (n, 8) float64 array (exact for any follower count)."""
+    values = np.fromiter((record[key] for record in records for key in RAW_FEATURE_KEYS),
+                         dtype=np.float64, count=len(records) * len(RAW_FEATURE_KEYS))
+    return values.reshape(-1, len(RAW_FEATURE_KEYS))
+
+def dense_matrix(raw):
+    """
+    Builds the dense feature matrix from raw profile fields, column-wise.
+
+    Args:
+        raw (np.ndarray): Array of shape (n, 8), columns ordered like RAW_FEATURE_KEYS.
+
+    Returns:
+        np.ndarray: float32 array of shape (n, 11), columns ordered like DENSE_FEATURE_NAMES.
+    """
+    raw = np.asarray(raw, dtype=np.float64).reshape(-1, len(RAW_FEATURE_KEYS))
+    followers, following, posts, digit_count = raw[:, 0], raw[:, 1], raw[:, 3], raw[:, 6]
+
+    features = np.empty((raw.shape[0], len(DENSE_FEATURE_NAMES)), dtype=np.float32)
+    features[:, :len(RAW_FEATURE_KEYS)] = raw
+    features[:, 8] = followers / (following + 1)  # Follower-to-Following Ratio
+    features[:, 9] = digit_count > 0  # Has numbers in username
+    features[:, 10] = (posts + 1) / (followers + 1)  # Engagement Score
+    return features
+
+def records_to_dense(records):
+    """Dense feature matrix for a block of profile records (no text rendering, no tokenization)."""
+    return dense_matrix(raw_matrix(records))
+
+def fit_scaler(features):
+    """Fits the MinMax scaler of the numeric columns on the training features (saved with the model)."""
+    return MinMaxScaler().fit(features)
+
+def scale(features, scaler: MinMaxScaler = None):
+    """Applies a fitted scaler column-wise; returns the features unchanged if there is none."""
+    if scaler is None:
+        return features
+    return scaler.transform(features).astype(np.float32, copy=False)
+
+def render_text(followers, following, bio_length, posts, has_profile_pic, is_private, digit_count, username_length):
+    """Renders one profile into the structured sentence used for TF-IDF."""
+    return f"User has {followers} followers, follows {following} accounts, " \
+           f"has a biography of {bio_length} characters, posted {posts} media items, " \
+           f"{'has' if has_profile_pic else 'does not have'} a profile picture, " \
+           f"{'has' if is_private else 'does not have'} a private account, " \
+           f"username contains {digit_count} digits and has {username_length} characters."
+
+def render_texts(raw):
+    """Renders raw profile rows (columns ordered like RAW_FEATURE_KEYS) into TF-IDF sentences."""
+    return [render_text(*row) for row in np.asarray(raw).astype(np.int64).tolist()]
+
+def build_model_input(raw, vectorizer=None, scaler: MinMaxScaler = None):
+    """
+    Builds the model input for a block of raw profile rows; used by both training and inference.
+
+    Args:
+        raw (np.ndarray): Array of shape (n, 8), columns ordered like RAW_FEATURE_KEYS.
+        vectorizer (TfidfVectorizer): Fitted vectorizer of the "tfidf" pipeline, None for "dense".
+        scaler (MinMaxScaler): Fitted scaler of the numeric columns, if the model was trained with one.
+
+    Returns:
+        Dense float32 array (no vectorizer) or CSR matrix of TF-IDF columns followed by the numeric columns.
+    """
+    numeric = scale(dense_matrix(raw), scaler)
+    if vectorizer is None:
+        return numeric
+    return hstack([vectorizer.transform(render_texts(raw)), numeric]).tocsr()
@@ -0,0 +1,128 @@
+import math
+import time
+from collections import namedtuple
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, ParameterGrid, train_test_split
+from xgboost import XGBClassifier
+
+SEARCH_MODES = ("grid", "halving")
+
+# Successive halving defaults
+HALVING_ETA = 3                 # Keep the best 1/eta candidates per rung, give them eta times more trees
+HALVING_MIN_TREES = 10          # Trees per candidate on the first rung (at least)
+EARLY_STOPPING_ROUNDS = 20      # Rounds without validation improvement before a fit stops
+VALIDATION_FRACTION = 0.2       # Share of the (pre-SMOTE) training rows held out for early stopping
+
+# Outcome of a search: the model refit on all training rows, its hyperparameters, the search's own
+# score of them, the wall time of the search (refit included) and the number of model fits
+SearchResult = namedtuple("SearchResult", ["model", "params", "score", "seconds", "fits"])
+
+def grid_search(X_train, y_train, param_grid: dict):
+    """
+    Exhaustive 5-fold cross-validated grid search (GridSearchCV refits the best model on all rows).
+
+    Returns:
+        SearchResult: `score` is the mean cross-validated accuracy of the best parameters.
+    """
+    start = time.perf_counter()
+    print("\n🔍 Running Grid Search for best hyperparameters...")
+    search = GridSearchCV(
+        XGBClassifier(objective="binary:logistic"),
+        param_grid,
+        cv=5,
+        scoring='accuracy',
+        n_jobs=-1
+    )
+    search.fit(X_train, y_train)
+    print(f"\n✅ Best Hyperparameters: {search.best_params_}")
+    fits = len(search.cv_results_["params"]) * 5 + 1
+    return SearchResult(search.best_estimator_, search.best_params_, search.best_score_,
+                        time.perf_counter() - start, fits)
+
+def successive_halving(X_train, y_train, param_grid: dict, resample=None, max_trees: int = None,
+                       min_trees: int = HALVING_MIN_TREES, eta: int = HALVING_ETA, max_seconds: float = None,
+                       early_stopping_rounds: int = EARLY_STOPPING_ROUNDS, refit_data=None):
+    """
+    Successive halving over the number of boosting rounds, with early stopping on a validation split.
+
+    The number of trees is the resource: every candidate of `param_grid`
+    (without `n_estimators`) is trained with a small tree budget, the best
+    1/eta by validation log loss move on to eta times more trees, and so on
+    until one remains at `max_trees`. Every fit uses `tree_method="hist"` and
+    stops early once the validation loss stops improving, so the winner's tree
+    count is chosen by early stopping rather than searched.
+
+    Args:
+        X_train, y_train: Training rows before resampling (the validation split must stay real rows).
+        param_grid (dict): Hyperparameter grid; its `n_estimators` values only set the default `max_trees`.
+        resample (callable): `(X, y) -> (X, y)` applied to the fitting split (e.g. SMOTE).
+        max_trees (int): Tree budget of the last rung (default: the largest `n_estimators` in the grid, or 300).
+        min_trees (int): Minimum tree budget of the first rung.
+        eta (int): Halving rate.
+        max_seconds (float): Wall-time budget; when exceeded, the best candidate scored so far wins.
+        early_stopping_rounds (int): Rounds without validation improvement before a fit stops.
+        refit_data (tuple): (X, y) the winner is refit on (default: the resampled training rows).
+
+    Returns:
+        SearchResult: `score` is the winner's validation accuracy; `params` include its `n_estimators`.
+    """
+    start = time.perf_counter()
+    grid = dict(param_grid)
+    grid_trees = grid.pop("n_estimators", [300])
+    max_trees = max_trees or max(grid_trees)
+    candidates = list(ParameterGrid(grid))
+
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=VALIDATION_FRACTION,
+                                                  stratify=y_train, random_state=42)
+    if resample is not None:
+        X_fit, y_fit = resample(X_fit, y_fit)
+
+    n_rungs = int(math.log(len(candidates), eta) + 1e-9) + 1 if len(candidates) > 1 else 1
+    print(f"\n🔍 Successive halving: {len(candidates)} candidates, {n_rungs} rungs, up to {max_trees} trees...")
+
+    fits = 0
+    best = None  # (log loss, accuracy, params, trees) of the best fit of the last completed rung
+    stopped = {}  # Candidates that stopped early: a bigger tree budget would not change their fit
+    for rung in range(n_rungs):
+        trees = max(min_trees, round(max_trees / eta ** (n_rungs - 1 - rung)))
+        scored = []
+        for params in candidates:
+            candidate = tuple(sorted(params.items()))
+            if candidate in stopped:
+                scored.append(stopped[candidate])
+                continue
+            if max_seconds and time.perf_counter() - start > max_seconds:
+                break
+            model = XGBClassifier(objective="binary:logistic", tree_method="hist", eval_metric="logloss",
+                                  n_estimators=trees, early_stopping_rounds=early_stopping_rounds, **params)
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            fits += 1
+            accuracy = accuracy_score(y_val, model.predict(X_val))
+            scored.append((model.best_score, -accuracy, params, model.best_iteration + 1))
+            if model.best_iteration + 1 + early_stopping_rounds <= trees:
+                stopped[candidate] = scored[-1]
+
+        if not scored:
+            break
+        scored.sort(key=lambda entry: (entry[0], entry[1]))
+        best = scored[0]
+        print(f"   - rung {rung + 1}: {len(scored)} candidates x {trees} trees, "
+              f"best log loss {best[0]:.4f} ({best[3]} trees)")
+        if len(scored) < len(candidates):
+            print(f"⚠️ Search time budget of {max_seconds}s reached, stopping early.")
+            break
+        candidates = [params for _, _, params, _ in scored[:max(1, len(scored) // eta)]]
+
+    if best is None:
+        raise TimeoutError(f"The search time budget of {max_seconds}s ended before any model was trained.")
+
+    _, negative_accuracy, params, trees = best
+    params = dict(params, n_estimators=trees)
+    print(f"\n✅ Best Hyperparameters: {params}")
+
+    # Refit the winner on all training rows with the tree count early stopping found
+    X_refit, y_refit = refit_data if refit_data is not None else (
+        resample(X_train, y_train) if resample is not None else (X_train, y_train))
+    model = XGBClassifier(objective="binary:logistic", tree_method="hist", **params)
+    model.fit(X_refit, y_refit)
+    return SearchResult(model, params, -negative_accuracy, time.perf_counter() - start, fits + 1)
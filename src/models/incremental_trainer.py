@@ -0,0 +1,147 @@
+import argparse
+import os
+import sys
+import time
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_sample_weight
+from xgboost import XGBClassifier
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+
+from data.dataset_loader import load_labeled_records
+from models.bundle import bundle_root, current_version
+from models.features import DEFAULT_FEATURE_MODE, FEATURE_MODES, build_model_input
+from models.model_loader import MODEL_ARTIFACTS, ModelRegistry
+from models.training_cache import StageCache
+from models.xgboost_trainer import dataset_stage, save_model
+
+INCREMENTAL_ROUNDS = 50         # Trees added per update
+HOLDOUT_FRACTION = 0.2          # Share of the new labeled rows held out for the regression check
+MAX_ACCURACY_DROP = 0.005       # Largest accuracy drop on any holdout set that still publishes
+MAX_LOG_LOSS_INCREASE = 0.05    # Largest log loss increase on any holdout set that still publishes
+
+def _evaluate(model, X, y):
+    probabilities = model.predict_proba(X)[:, 1]
+    return {"rows": int(len(y)), "accuracy": accuracy_score(y, probabilities >= 0.5),
+            "log_loss": log_loss(y, probabilities, labels=[0, 1])}
+
+def holdout_check(old_model, new_model, holdouts: dict, max_accuracy_drop: float = MAX_ACCURACY_DROP,
+                  max_log_loss_increase: float = MAX_LOG_LOSS_INCREASE):
+    """
+    Compares the current and updated models on every holdout set.
+
+    The updated model regresses if, on any set, its accuracy drops by more
+    than `max_accuracy_drop` or its log loss grows by more than
+    `max_log_loss_increase` (probabilities can degrade long before labels flip).
+
+    Args:
+        old_model, new_model: The current and the updated classifier.
+        holdouts (dict): Holdout name -> (X, y).
+        max_accuracy_drop (float): Largest tolerated accuracy drop on any holdout set.
+        max_log_loss_increase (float): Largest tolerated log loss increase on any holdout set.
+
+    Returns:
+        tuple: (passed, report) where report maps holdout name -> {"old": metrics, "new": metrics}.
+    """
+    report = {name: {"old": _evaluate(old_model, X, y), "new": _evaluate(new_model, X, y)}
+              for name, (X, y) in holdouts.items()}
+
+    print("\n📊 Holdout check:")
+    passed = True
+    for name, metrics in report.items():
+        regressed = (metrics["old"]["accuracy"] - metrics["new"]["accuracy"] > max_accuracy_drop or
+                     metrics["new"]["log_loss"] - metrics["old"]["log_loss"] > max_log_loss_increase)
+        passed = passed and not regressed
+        print(f"   - {name:<9} ({metrics['old']['rows']} rows): accuracy "
+              f"{metrics['old']['accuracy'] * 100:.2f}% -> {metrics['new']['accuracy'] * 100:.2f}%, log loss "
+              f"{metrics['old']['log_loss']:.4f} -> {metrics['new']['log_loss']:.4f}{'  ❌ regressed' if regressed else ''}")
+    return passed, report
+
+def update_model(paths, feature_mode: str = DEFAULT_FEATURE_MODE, rounds: int = INCREMENTAL_ROUNDS,
+                 max_accuracy_drop: float = MAX_ACCURACY_DROP, max_log_loss_increase: float = MAX_LOG_LOSS_INCREASE,
+                 publish: bool = True):
+    """
+    Continues boosting the current model on newly labeled follower records.
+
+    The current booster (from the current bundle, or the pickles) gets
+    `rounds` more trees fitted on the new rows only, featurized with the
+    frozen vectorizer and scaler, so an update costs time proportional to the
+    new data. Classes are balanced with sample weights (SMOTE is left to full
+    retrains). The updated model is published as a new bundle version only if
+    it passes `holdout_check` on the original test split and on a holdout of
+    the new rows.
+
+    Args:
+        paths (list): NDJSON files of labeled follower records (see `load_labeled_records`).
+        feature_mode (str): Feature pipeline of the model to update.
+        rounds (int): Boosting rounds to add.
+        max_accuracy_drop (float): Largest tolerated accuracy drop on any holdout set.
+        max_log_loss_increase (float): Largest tolerated log loss increase on any holdout set.
+        publish (bool): Whether to save and publish the updated model when the check passes.
+
+    Returns:
+        tuple: (updated model, whether it passed the holdout check, holdout report)
+    """
+    start = time.perf_counter()
+    bundle_dir = bundle_root(feature_mode)
+    registry = ModelRegistry(*MODEL_ARTIFACTS[feature_mode], feature_mode=feature_mode, backend="xgboost",
+                             bundle_dir=bundle_dir)
+    old_model, vectorizer, scaler = registry.get()
+    parent_version = current_version(bundle_dir)
+
+    raw_new, y_new = load_labeled_records(paths)
+    if len(y_new) < 10:
+        raise ValueError(f"❌ Only {len(y_new)} labeled records, at least 10 are needed for an update.")
+    stratify = y_new if min((y_new == 0).sum(), (y_new == 1).sum()) >= 2 else None
+    raw_fit, raw_holdout, y_fit, y_holdout = train_test_split(raw_new, y_new, test_size=HOLDOUT_FRACTION,
+                                                              stratify=stratify, random_state=42)
+    print(f"\n✅ {len(y_new)} labeled records: {len(y_fit)} to train on, {len(y_holdout)} held out")
+
+    # 🚀 Featurize with the frozen vectorizer and scaler (no refit: the feature space must not change)
+    X_fit = build_model_input(raw_fit, vectorizer, scaler)
+    holdouts = {"new": (build_model_input(raw_holdout, vectorizer, scaler), y_holdout)}
+    try:
+        dataset, _ = dataset_stage(StageCache())
+        holdouts["reference"] = (build_model_input(dataset["raw_test"], vectorizer, scaler), dataset["y_test"])
+    except FileNotFoundError:
+        print("⚠️ Training datasets not found, checking the new holdout only.")
+
+    # 🚀 Continue boosting from the current booster with its hyperparameters
+    params = dict(old_model.get_params(), n_estimators=rounds, early_stopping_rounds=None)
+    new_model = XGBClassifier(**params)
+    new_model.fit(X_fit, y_fit, sample_weight=compute_sample_weight("balanced", y_fit),
+                  xgb_model=old_model.get_booster())
+    print(f"✅ Added {rounds} trees ({new_model.get_booster().num_boosted_rounds()} in total) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    passed, report = holdout_check(old_model, new_model, holdouts, max_accuracy_drop, max_log_loss_increase)
+    if not passed:
+        print("❌ The updated model regressed on a holdout set, not publishing it.")
+    elif publish:
+        save_model(new_model, vectorizer, scaler, feature_mode, metadata={
+            "incremental": True, "parent_version": parent_version, "rows": int(len(y_fit)),
+            "rounds": rounds, "holdout": report})
+    return new_model, passed, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the XGBoost bot classifier with newly labeled followers")
+    parser.add_argument("paths", nargs="+", help="NDJSON files of labeled follower records (`is_bot` field)")
+    parser.add_argument("--features", choices=FEATURE_MODES, default=DEFAULT_FEATURE_MODE,
+                        help="Feature pipeline of the model to update")
+    parser.add_argument("--rounds", type=int, default=INCREMENTAL_ROUNDS, help="Boosting rounds to add")
+    parser.add_argument("--max-accuracy-drop", type=float, default=MAX_ACCURACY_DROP,
+                        help="Largest tolerated accuracy drop on any holdout set (fraction)")
+    parser.add_argument("--max-log-loss-increase", type=float, default=MAX_LOG_LOSS_INCREASE,
+                        help="Largest tolerated log loss increase on any holdout set")
+    parser.add_argument("--dry-run", action="store_true", help="Run the update and the check without publishing")
+    args = parser.parse_args()
+
+    _, passed, _ = update_model(args.paths, args.features, rounds=args.rounds,
+                                max_accuracy_drop=args.max_accuracy_drop,
+                                max_log_loss_increase=args.max_log_loss_increase, publish=not args.dry_run)
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
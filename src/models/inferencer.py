@@ -1,9 +1,34 @@
 import numpy as np
 from scipy.sparse import hstack
-from model_loader import load_model
+from models.features import RAW_FEATURE_KEYS, build_model_input, dense_matrix, raw_matrix, render_text, scale
+from models.model_loader import get_registry, load_model
+from monitoring.metrics import increment, stage_timer
 
-# Load the trained model and vectorizer
-model, vectorizer = load_model()
+# Bot probability at or above which a follower is labelled "Bot Detected"
+BOT_THRESHOLD = 0.5
+
+def build_text_features(follower_data):
+    """Render a scraped profile record into the structured text used for TF-IDF."""
+    return render_text(*(follower_data[key] for key in RAW_FEATURE_KEYS))
+
+def build_numerical_matrix(records):
+    """
+    Build the (unscaled) numerical feature matrix for a block of profile records.
+
+    Columns follow the trainer layout: the raw profile fields followed by the
+    follower/following ratio, the has-numbers flag and the engagement score.
+
+    Args:
+        records (list): Profile records as returned by `get_instagram_data`.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(records), 11).
+    """
+    return dense_matrix(raw_matrix(records))
+
+def build_numerical_features(follower_data):
+    """Numerical feature vector for a single profile record (see `build_numerical_matrix`)."""
+    return build_numerical_matrix([follower_data])[0].tolist()
 
 def predict_user(text, numerical_features):
     """
@@ -16,12 +41,14 @@ def predict_user(text, numerical_features):
     Returns:
         str: "Bot Detected" if the prediction is 1, otherwise "Real User".
     """
+    # Shared model, vectorizer and scaler (loaded on first use)
+    model, vectorizer, scaler = load_model("tfidf")
 
     # Convert text to TF-IDF vector
     text_vectorized = vectorizer.transform([text])
 
-    # Convert numerical features to a NumPy array
-    num_features = np.array(numerical_features).reshape(1, -1)
+    # Scale the numerical features like at training time
+    num_features = scale(np.array(numerical_features, dtype=np.float32).reshape(1, -1), scaler)
 
     # Combine TF-IDF with numerical features
     input_data = hstack([text_vectorized, num_features])
@@ -31,3 +58,36 @@ def predict_user(text, numerical_features):
 
     return "Bot Detected" if prediction == 1 else "Real User"
 
+def predict_batch(records, feature_mode: str = None):
+    """
+    Predict a whole block of profile records with a single model call.
+
+    The records are stacked into one raw array and featurized column-wise by
+    `build_model_input` (the same function the trainer uses, with the persisted
+    scaler), then scored with one `predict_proba` call.
+
+    Args:
+        records (list): Profile records as returned by `get_instagram_data`.
+        feature_mode (str): "tfidf" or "dense"; defaults to the MODEL_FEATURES environment variable.
+
+    Returns:
+        tuple: (list of "Bot Detected"/"Real User" labels, np.ndarray of bot probabilities)
+    """
+    if not records:
+        return [], np.empty(0, dtype=np.float32)
+
+    # Shared model, vectorizer and scaler (loaded on first use)
+    model, vectorizer, scaler = get_registry(feature_mode).get()
+
+    with stage_timer("featurize"):
+        input_data = build_model_input(raw_matrix(records), vectorizer, scaler)
+
+    # Score every row with one call
+    with stage_timer("score"):
+        probabilities = model.predict_proba(input_data)[:, 1].astype(np.float32)
+    labels = ["Bot Detected" if probability >= BOT_THRESHOLD else "Real User" for probability in probabilities]
+
+    increment("followers_scored_total", len(records))
+    increment("bots_detected_total", int((probabilities >= BOT_THRESHOLD).sum()))
+
+    return labels, probabilities
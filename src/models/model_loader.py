@@ -1,16 +1,261 @@
+import gc
 import os
+import resource
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import joblib
+from models.bundle import activate_bundle, bundle_root, current_version, load_bundle
+from models.compiled_trees import CompiledForest, compiled_path_for
+from models.features import DEFAULT_FEATURE_MODE, check_feature_mode
+from monitoring.metrics import observe
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 
 # Rutas de los archivos del modelo
 model_path = os.path.join(BASE_DIR, "src/models/model/xgboost_model.pkl")
 vectorizer_path = os.path.join(BASE_DIR, "src/models/model/tfidf_vectorizer.pkl")
+scaler_path = os.path.join(BASE_DIR, "src/models/model/feature_scaler.pkl")
+dense_model_path = os.path.join(BASE_DIR, "src/models/model/xgboost_dense_model.pkl")
+
+# Artifacts (model, vectorizer, scaler) of each feature pipeline; the dense pipeline has neither
+MODEL_ARTIFACTS = {
+    "tfidf": (model_path, vectorizer_path, scaler_path),
+    "dense": (dense_model_path, None, None)
+}
+
+# Model backend: "xgboost" unpickles the XGBClassifier, "compiled" loads the flat tree arrays
+# exported by `compiled_trees.py` (falls back to XGBoost if there is no export)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "xgboost")
+
+# Seconds between checks for a newer current bundle version (0 disables the check)
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", 5))
+
+LoadedModel = namedtuple("LoadedModel", ["model", "vectorizer", "scaler"])
+
+def _current_rss_bytes():
+    """Returns the resident set size of this process (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _timed_load(path):
+    """Loads a joblib artifact (or a compiled forest) and returns it along with the seconds it took."""
+    start = time.perf_counter()
+    artifact = CompiledForest.load(path) if path.endswith(".npz") else joblib.load(path)
+    return artifact, time.perf_counter() - start
+
+class ModelRegistry:
+    """
+    Process-wide registry holding the XGBoost model, TF-IDF vectorizer and
+    fitted feature scaler (neither for the dense feature pipeline).
+
+    Artifacts are loaded lazily on the first `get()` and then shared by every
+    caller. Call `preload()` in the parent process before forking workers
+    (e.g. `gunicorn --preload`) so the children share the loaded pages
+    copy-on-write instead of each holding a private copy.
+
+    If the pipeline has a model bundle (see `bundle.py`), its current version
+    is loaded instead of the pickles, with arrays memory-mapped read-only. A
+    newer current version is picked up by `reload()` or, every
+    MODEL_RELOAD_INTERVAL seconds, by `get()`: it is loaded next to the old one
+    and swapped in with a single assignment, so in-flight predictions finish on
+    the model they started with.
+    """
+
+    def __init__(self, model_path: str, vectorizer_path: str = None, scaler_path: str = None,
+                 feature_mode: str = "tfidf", backend: str = MODEL_BACKEND, bundle_dir: str = None):
+        self.backend = backend
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.scaler_path = scaler_path
+        self.feature_mode = feature_mode
+        self.bundle_dir = bundle_dir
+        self.version = None
+        self._loaded = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._next_reload_check = 0.0
+        self._stats = {"loaded": False}
+
+    def is_loaded(self):
+        return self._loaded is not None
+
+    def get(self):
+        """Returns the shared `LoadedModel`, loading it on first use."""
+        loaded = self._loaded
+        if loaded is not None:
+            if self.version is not None and MODEL_RELOAD_INTERVAL and time.monotonic() >= self._next_reload_check:
+                self._check_for_update()
+            return self._loaded
+
+        with self._lock:
+            if self._loaded is None:
+                version = current_version(self.bundle_dir) if self.bundle_dir else None
+                self._loaded = self._load_bundle(version) if version else self._load()
+                self.version = version
+            return self._loaded
+
+    def _check_for_update(self):
+        """Swaps to the current bundle version if another process activated a new one."""
+        self._next_reload_check = time.monotonic() + MODEL_RELOAD_INTERVAL
+        version = current_version(self.bundle_dir)
+        # Only one thread reloads; the others keep serving the loaded version meanwhile
+        if version and version != self.version and self._reload_lock.acquire(blocking=False):
+            try:
+                self._swap(version)
+            except Exception as e:
+                print(f"⚠️ Could not load model bundle {version}, still serving {self.version}: {e}")
+            finally:
+                self._reload_lock.release()
+
+    def reload(self, version: str = None):
+        """
+        Hot-swaps to a bundle version.
+
+        Args:
+            version (str): Version to activate for every process first (default: reload the current one).
+
+        Returns:
+            dict: The registry statistics after the swap.
+        """
+        if not self.bundle_dir:
+            raise FileNotFoundError(f"The {self.feature_mode} pipeline has no model bundles.")
+
+        with self._reload_lock:
+            if version:
+                activate_bundle(self.bundle_dir, version)
+            version = current_version(self.bundle_dir)
+            if version is None:
+                raise FileNotFoundError(f"No current model bundle in `{self.bundle_dir}`.")
+            self._swap(version)
+        return self.stats()
+
+    def _swap(self, version):
+        loaded = self._load_bundle(version)
+        with self._lock:
+            self._loaded, self.version = loaded, version
+
+    def _load_bundle(self, version):
+        print(f"🔄 Loading model bundle {version} ({self.feature_mode} features, {self.backend} backend)...")
+        bundle_path = os.path.join(self.bundle_dir, version)
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+
+        model, vectorizer, scaler, manifest = load_bundle(bundle_path, backend=self.backend)
+
+        elapsed = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+        observe("model_load_seconds", elapsed, source="bundle", feature_mode=self.feature_mode)
+
+        self._stats = {
+            "loaded": True,
+            "pid": os.getpid(),
+            "feature_mode": self.feature_mode,
+            "backend": self.backend,
+            "bundle_version": version,
+            "bundle_created_at": manifest["created_at"],
+            "scaled_features": scaler is not None,
+            "load_time_seconds": round(elapsed, 4),
+            "bundle_bytes": sum(entry.stat().st_size for entry in os.scandir(bundle_path)),
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_after,
+            "rss_delta_bytes": rss_after - rss_before
+        }
+        print(f"✅ Model bundle {version} loaded in {elapsed:.2f}s "
+              f"(+{(rss_after - rss_before) / 1024 ** 2:.1f} MB RSS)")
+        return LoadedModel(model, vectorizer, scaler)
+
+    def _load(self):
+        """Loads the pickled artifacts written by `xgboost_trainer.py` (pipelines without a bundle)."""
+        print(f"🔄 Loading trained XGBoost model ({self.feature_mode} features)...")
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+
+        model_path, backend = self.model_path, self.backend
+        if backend == "compiled":
+            if os.path.exists(compiled_path_for(model_path)):
+                model_path = compiled_path_for(model_path)
+            else:
+                print(f"⚠️ No compiled export of `{model_path}`, using XGBoost (run compiled_trees.py).")
+                backend = "xgboost"
+
+        if self.scaler_path and not os.path.exists(self.scaler_path):
+            # Artifacts trained before the scaler was persisted: numeric features are served unscaled
+            print(f"⚠️ No feature scaler at {self.scaler_path}, retrain the model to fix train/serve skew.")
+            self.scaler_path = None
+
+        # Unpickle the booster, the vectorizer and the scaler in parallel
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            model_future = executor.submit(_timed_load, model_path)
+            vectorizer_future = executor.submit(_timed_load, self.vectorizer_path) if self.vectorizer_path else None
+            scaler_future = executor.submit(_timed_load, self.scaler_path) if self.scaler_path else None
+            model, model_seconds = model_future.result()
+            vectorizer, vectorizer_seconds = vectorizer_future.result() if vectorizer_future else (None, 0.0)
+            scaler, _ = scaler_future.result() if scaler_future else (None, 0.0)
+
+        elapsed = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+        observe("model_load_seconds", elapsed, source="pickle", feature_mode=self.feature_mode)
+
+        self._stats = {
+            "loaded": True,
+            "pid": os.getpid(),
+            "feature_mode": self.feature_mode,
+            "backend": backend,
+            "scaled_features": scaler is not None,
+            "load_time_seconds": round(elapsed, 4),
+            "model_load_seconds": round(model_seconds, 4),
+            "vectorizer_load_seconds": round(vectorizer_seconds, 4),
+            "model_file_bytes": os.path.getsize(model_path),
+            "vectorizer_file_bytes": os.path.getsize(self.vectorizer_path) if self.vectorizer_path else 0,
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_after,
+            "rss_delta_bytes": rss_after - rss_before
+        }
+        print(f"✅ Model loaded in {elapsed:.2f}s "
+              f"(+{(rss_after - rss_before) / 1024 ** 2:.1f} MB RSS)")
+        return LoadedModel(model, vectorizer, scaler)
+
+    def preload(self):
+        """
+        Loads the artifacts eagerly and freezes them out of the garbage collector.
+
+        `gc.freeze()` moves every live object to the permanent generation, so
+        collections in forked workers do not write to (and thereby un-share)
+        the pages holding the model.
+        """
+        loaded = self.get()
+        gc.freeze()
+        return loaded
+
+    def stats(self):
+        """Returns load-time and memory statistics for the registry."""
+        return dict(self._stats, current_rss_bytes=_current_rss_bytes())
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_registry(feature_mode: str = None):
+    """
+    Returns the process-wide model registry of a feature pipeline.
+
+    Args:
+        feature_mode (str): "tfidf" or "dense"; defaults to the MODEL_FEATURES environment variable.
+    """
+    feature_mode = check_feature_mode(feature_mode or DEFAULT_FEATURE_MODE)
+    with _registries_lock:
+        registry = _registries.get(feature_mode)
+        if registry is None:
+            registry = ModelRegistry(*MODEL_ARTIFACTS[feature_mode], feature_mode=feature_mode,
+                                     bundle_dir=bundle_root(feature_mode))
+            _registries[feature_mode] = registry
+        return registry
 
 # Cargar modelo y vectorizador
-def load_model():
-    print("🔄 Loading trained XGBoost model...")
-    model = joblib.load(model_path)
-    vectorizer = joblib.load(vectorizer_path)
-    print("✅ Model and vectorizer loaded successfully!")
-    return model, vectorizer
+def load_model(feature_mode: str = None):
+    """Returns the shared (model, vectorizer, scaler) artifacts, loading them on first use."""
+    return get_registry(feature_mode).get()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import joblib
+import numpy as np
+from scipy import sparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+# Outputs of the training stages, one directory per stage and input fingerprint
+TRAINING_CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", os.path.join(BASE_DIR, "src/data/cache/training"))
+
+def file_digest(path: str):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint(*parts):
+    """
+    Content hash of a stage's inputs.
+
+    Args:
+        *parts: JSON-serializable values (upstream fingerprints, parameters, file digests).
+
+    Returns:
+        str: Hex digest that changes whenever any part changes.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def _save_output(directory: str, name: str, value):
+    if sparse.issparse(value):
+        sparse.save_npz(os.path.join(directory, f"{name}.sparse.npz"), value.tocsr(), compressed=False)
+    elif isinstance(value, np.ndarray):
+        np.savez(os.path.join(directory, f"{name}.npz"), value=value)
+    else:
+        joblib.dump(value, os.path.join(directory, f"{name}.joblib"))
+
+def _load_output(directory: str, file_name: str):
+    path = os.path.join(directory, file_name)
+    if file_name.endswith(".sparse.npz"):
+        return file_name[:-len(".sparse.npz")], sparse.load_npz(path)
+    if file_name.endswith(".npz"):
+        with np.load(path) as data:
+            return file_name[:-len(".npz")], data["value"]
+    return file_name[:-len(".joblib")], joblib.load(path)
+
+class StageCache:
+    """
+    Content-addressed cache of training stage outputs.
+
+    Each stage's outputs are stored in `<cache_dir>/<stage>-<fingerprint>/`:
+    sparse matrices as `.sparse.npz`, arrays as `.npz` and anything else (a
+    fitted vectorizer or scaler) with joblib. The fingerprint hashes the
+    stage's inputs, so a stage is recomputed only when its inputs, parameters
+    or upstream stages change. Every stage's wall time is recorded.
+    """
+
+    def __init__(self, cache_dir: str = TRAINING_CACHE_DIR, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.timings = []
+
+    def run(self, stage: str, key: str, compute):
+        """
+        Returns the outputs of a stage, from the cache if `key` was computed before.
+
+        Args:
+            stage (str): Stage name.
+            key (str): Fingerprint of the stage's inputs (see `fingerprint`).
+            compute (callable): Computes the stage; returns a dict of named outputs.
+
+        Returns:
+            dict: The stage outputs.
+        """
+        start = time.perf_counter()
+        directory = os.path.join(self.cache_dir, f"{stage}-{key[:16]}")
+
+        if self.enabled and os.path.isdir(directory):
+            outputs = dict(_load_output(directory, file_name) for file_name in os.listdir(directory))
+            cached = True
+        else:
+            outputs = compute()
+            cached = False
+            if self.enabled:
+                self._store(directory, outputs)
+
+        elapsed = time.perf_counter() - start
+        self.timings.append((stage, elapsed, cached))
+        print(f"⏱️ Stage `{stage}`: {elapsed:.2f}s{' (cached)' if cached else ''}")
+        return outputs
+
+    def time(self, stage: str, compute):
+        """Runs an uncached stage and records its wall time. Returns its result."""
+        start = time.perf_counter()
+        result = compute()
+        elapsed = time.perf_counter() - start
+        self.timings.append((stage, elapsed, False))
+        print(f"⏱️ Stage `{stage}`: {elapsed:.2f}s")
+        return result
+
+    def _store(self, directory: str, outputs: dict):
+        # Write next to the final directory and rename, so a stage is never cached half-written
+        staging = f"{directory}.staging-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        try:
+            for name, value in outputs.items():
+                _save_output(staging, name, value)
+            os.rename(staging, directory)
+        except OSError:
+            # Another run cached the same stage first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def report(self):
+        """Prints the per-stage timings of this run."""
+        print("\n📊 Stage timings:")
+        for stage, elapsed, cached in self.timings:
+            print(f"   - {stage:<12} {elapsed:>8.2f}s{'  (cached)' if cached else ''}")
+        print(f"   - {'total':<12} {sum(elapsed for _, elapsed, _ in self.timings):>8.2f}s")
@@ -1,96 +1,229 @@
+import argparse
+import inspect
+import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import joblib
-from scipy.sparse import hstack
 from sklearn.metrics import accuracy_score, classification_report
-from sklearn.model_selection import GridSearchCV
 from sklearn.feature_extraction.text import TfidfVectorizer
 from imblearn.over_sampling import SMOTE
-from xgboost import XGBClassifier
 
 # Ensure dataset_loader.py can be imported correctly
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.append(os.path.join(BASE_DIR, "src"))
 
-from data.dataset_loader import load_dataset
-
-# 🚀 Load dataset (Both text & numerical features)
-X_train_text, X_test_text, X_train_num, X_test_num, y_train, y_test = load_dataset()
-
-# 🚀 Debug: Check dataset structure
-print("\n🔍 Dataset Type Check:")
-print(f"   - X_train_text type: {type(X_train_text)}, shape: {X_train_text.shape}")
-print(f"   - X_train_num type: {type(X_train_num)}, shape: {X_train_num.shape}")
-print(f"   - y_train type: {type(y_train)}, shape: {y_train.shape}")
-
-# 🚀 Convert text to numerical features using TF-IDF
-vectorizer = TfidfVectorizer(max_features=10000)  # 🔹 Increase TF-IDF features for better accuracy
-X_train_text_tfidf = vectorizer.fit_transform(X_train_text)
-X_test_text_tfidf = vectorizer.transform(X_test_text)
-
-# 🚀 Combine TF-IDF features with numerical features
-X_train_combined = hstack([X_train_text_tfidf, X_train_num])  # Combine sparse TF-IDF and dense numerical features
-X_test_combined = hstack([X_test_text_tfidf, X_test_num])
-
-# 🚀 Debug: Print dataset shape before applying SMOTE
-print("\n✅ Dataset before SMOTE balancing:")
-print(f"   - X_train_combined shape: {X_train_combined.shape}")
-print(f"   - y_train shape: {y_train.shape}")
-
-# Apply SMOTE to balance the dataset
-smote = SMOTE(sampling_strategy='auto', random_state=42)
-X_train_resampled, y_train_resampled = smote.fit_resample(X_train_combined, y_train)
-
-# 🚀 Debug: Print dataset shape after SMOTE
-print("\n✅ Dataset balanced using SMOTE.")
-print(f"   - Original dataset: {X_train_combined.shape[0]} samples")
-print(f"   - Resampled dataset: {X_train_resampled.shape[0]} samples")
-
-# 🚀 Define Hyperparameter Grid for GridSearch
-param_grid = {
-    'n_estimators': [100, 200, 300],  
-    'max_depth': [3, 6, 9],  
-    'learning_rate': [0.01, 0.1, 0.2],  
-    'subsample': [0.8, 1.0],  
-    'colsample_bytree': [0.8, 1.0]  
+from data.dataset_loader import FAKE_DATA_PATH, REAL_DATA_PATH, load_dataset
+from models.bundle import write_bundle
+from models.compiled_trees import export_compiled
+from models.features import DEFAULT_FEATURE_MODE, FEATURE_MODES, build_model_input, dense_matrix, fit_scaler, render_texts
+from models.hyperparameter_search import (EARLY_STOPPING_ROUNDS, HALVING_ETA, HALVING_MIN_TREES, SEARCH_MODES,
+                                         grid_search, successive_halving)
+from models.training_cache import TRAINING_CACHE_DIR, StageCache, file_digest, fingerprint
+
+MODEL_DIR = os.path.join(BASE_DIR, "src/models/model")
+
+TFIDF_PARAMS = {"max_features": 10000}  # 🔹 Increase TF-IDF features for better accuracy
+SMOTE_PARAMS = {"sampling_strategy": "auto", "random_state": 42}
+
+# 🚀 Hyperparameter Grid for GridSearch
+PARAM_GRID = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [3, 6, 9],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0]
 }
 
-# 🚀 Perform Grid Search to find the best hyperparameters
-print("\n🔍 Running Grid Search for best hyperparameters...")
-grid_search = GridSearchCV(
-    XGBClassifier(objective="binary:logistic"),
-    param_grid,
-    cv=5, 
-    scoring='accuracy', 
-    n_jobs=-1
-)
-grid_search.fit(X_train_resampled, y_train_resampled)
-
-# 🚀 Use best model from Grid Search
-model = grid_search.best_estimator_
-print(f"\n✅ Best Hyperparameters: {grid_search.best_params_}")
-
-# 🚀 Train XGBoost Classifier with Best Hyperparameters
-print("\n🚀 Training XGBoost Classifier...")
-model.fit(X_train_resampled, y_train_resampled)
-
-# 🚀 Evaluate Model
-y_pred = model.predict(X_test_combined)
-accuracy = accuracy_score(y_test, y_pred)
-
-print(f"\n✅ Model Training Completed. Accuracy: {accuracy * 100:.2f}%")
-print("\n🔍 Classification Report:\n", classification_report(y_test, y_pred))
-
-# 🚀 Ensure the model directory exists before saving
-model_dir = os.path.join(BASE_DIR, "src/models/model")
-os.makedirs(model_dir, exist_ok=True)
-
-# 🚀 Save the Model and Vectorizer
-model_save_path = os.path.join(model_dir, "xgboost_model.pkl")
-vectorizer_save_path = os.path.join(model_dir, "tfidf_vectorizer.pkl")
-
-joblib.dump(model, model_save_path)
-joblib.dump(vectorizer, vectorizer_save_path)
-
-print(f"\n✅ Model saved to `{model_save_path}`")
-print(f"✅ Vectorizer saved to `{vectorizer_save_path}`")
+def dataset_stage(cache: StageCache):
+    """Parses the labeled datasets into raw train/test rows. Cached on the dataset files and loader code."""
+    key = fingerprint("dataset", file_digest(FAKE_DATA_PATH), file_digest(REAL_DATA_PATH),
+                      file_digest(inspect.getsourcefile(load_dataset)))
+
+    def compute():
+        raw_train, raw_test, y_train, y_test = load_dataset()
+        return {"raw_train": raw_train, "raw_test": raw_test, "y_train": y_train, "y_test": y_test}
+
+    return cache.run("dataset", key, compute), key
+
+def features_stage(cache: StageCache, dataset: dict, dataset_key: str, feature_mode: str):
+    """
+    Builds the train/test model input matrices (and fits the scaler and TF-IDF vectorizer).
+
+    Cached on the dataset, the feature pipeline, its parameters and the feature code.
+    """
+    key = fingerprint("features", dataset_key, feature_mode, TFIDF_PARAMS,
+                      file_digest(inspect.getsourcefile(build_model_input)))
+
+    def compute():
+        raw_train, raw_test = dataset["raw_train"], dataset["raw_test"]
+        if feature_mode == "dense":
+            # 🚀 Dense float32 matrix (no text rendering, no TF-IDF, trees need no scaling)
+            vectorizer, scaler = None, None
+        else:
+            # 🚀 Fit the numeric scaler and the TF-IDF vectorizer on the training rows only
+            scaler = fit_scaler(dense_matrix(raw_train))
+            vectorizer = TfidfVectorizer(**TFIDF_PARAMS).fit(render_texts(raw_train))
+
+        # 🚀 Combine TF-IDF features with (scaled) numerical features, train and test in parallel
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            train_future = executor.submit(build_model_input, raw_train, vectorizer, scaler)
+            test_future = executor.submit(build_model_input, raw_test, vectorizer, scaler)
+            outputs = {"X_train": train_future.result(), "X_test": test_future.result()}
+
+        if vectorizer is not None:
+            outputs.update(vectorizer=vectorizer, scaler=scaler)
+        return outputs
+
+    features = cache.run("features", key, compute)
+    features.setdefault("vectorizer", None)
+    features.setdefault("scaler", None)
+    return features, key
+
+def resample_stage(cache: StageCache, features: dict, y_train, features_key: str):
+    """Balances the training matrix with SMOTE. Cached on the features and the SMOTE parameters."""
+    key = fingerprint("resample", features_key, SMOTE_PARAMS)
+
+    def compute():
+        X_resampled, y_resampled = SMOTE(**SMOTE_PARAMS).fit_resample(features["X_train"], y_train)
+        return {"X_resampled": X_resampled, "y_resampled": y_resampled}
+
+    resampled = cache.run("resample", key, compute)
+
+    print("\n✅ Dataset balanced using SMOTE.")
+    print(f"   - Original dataset: {features['X_train'].shape[0]} samples")
+    print(f"   - Resampled dataset: {resampled['X_resampled'].shape[0]} samples")
+    return resampled
+
+def search_stage(cache: StageCache, search: str, features: dict, y_train, resampled: dict, param_grid: dict,
+                 search_options: dict = None):
+    """
+    Searches hyperparameters and returns the `SearchResult` (model refit on the resampled training rows).
+
+    "grid" cross-validates every combination on the resampled rows; "halving"
+    runs successive halving with early stopping on a validation split of the
+    real training rows (see `hyperparameter_search.py`).
+    """
+    if search == "halving":
+        return cache.time("search", lambda: successive_halving(
+            features["X_train"], y_train, param_grid,
+            resample=lambda X, y: SMOTE(**SMOTE_PARAMS).fit_resample(X, y),
+            refit_data=(resampled["X_resampled"], resampled["y_resampled"]),
+            **(search_options or {})))
+    return cache.time("search", lambda: grid_search(resampled["X_resampled"], resampled["y_resampled"], param_grid))
+
+def save_model(model, vectorizer, scaler, feature_mode: str, metadata: dict = None):
+    """Saves the pickled artifacts and the compiled export, then publishes a new model bundle (with `metadata`)."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+
+    # 🚀 Save the Model, Vectorizer and Scaler (the dense model is saved next to the TF-IDF one)
+    if feature_mode == "dense":
+        model_save_path = os.path.join(MODEL_DIR, "xgboost_dense_model.pkl")
+        joblib.dump(model, model_save_path)
+        print(f"\n✅ Model saved to `{model_save_path}`")
+    else:
+        model_save_path = os.path.join(MODEL_DIR, "xgboost_model.pkl")
+        vectorizer_save_path = os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl")
+        scaler_save_path = os.path.join(MODEL_DIR, "feature_scaler.pkl")
+
+        joblib.dump(model, model_save_path)
+        joblib.dump(vectorizer, vectorizer_save_path)
+        joblib.dump(scaler, scaler_save_path)
+
+        print(f"\n✅ Model saved to `{model_save_path}`")
+        print(f"✅ Vectorizer saved to `{vectorizer_save_path}`")
+        print(f"✅ Feature scaler saved to `{scaler_save_path}`")
+    export_compiled(model, model_save_path)
+
+    # 🚀 Publish a new model bundle version (picked up by running APIs without a restart)
+    write_bundle(model, vectorizer, scaler, feature_mode=feature_mode, metadata=metadata)
+
+def train(feature_mode: str = DEFAULT_FEATURE_MODE, param_grid: dict = None, cache: StageCache = None,
+          save: bool = True, search: str = "grid", search_options: dict = None, compare: bool = False):
+    """
+    Runs the training pipeline: dataset -> features -> SMOTE -> search -> evaluation -> save.
+
+    The dataset, feature and resampling stages are cached by content hash (see
+    `StageCache`), so re-running with different hyperparameters skips them.
+
+    Args:
+        feature_mode (str): "tfidf" or "dense".
+        param_grid (dict): Hyperparameter grid (defaults to `PARAM_GRID`).
+        cache (StageCache): Stage cache (defaults to one in TRAINING_CACHE_DIR).
+        save (bool): Whether to save the model artifacts and publish a bundle.
+        search (str): "grid" (GridSearchCV) or "halving" (successive halving with early stopping).
+        search_options (dict): Budgets of the halving search (`max_trees`, `min_trees`, `eta`,
+            `max_seconds`, `early_stopping_rounds`).
+        compare (bool): Also run the other search mode and report both side by side (the `search` model is kept).
+
+    Returns:
+        tuple: (model, vectorizer, scaler, test accuracy)
+    """
+    cache = cache or StageCache()
+
+    # 🚀 Load dataset (raw profile rows, featurized below exactly as at inference)
+    dataset, dataset_key = dataset_stage(cache)
+    features, features_key = features_stage(cache, dataset, dataset_key, feature_mode)
+
+    # 🚀 Debug: Print dataset shape before applying SMOTE
+    print("\n✅ Dataset before SMOTE balancing:")
+    print(f"   - X_train_combined shape: {features['X_train'].shape}")
+    print(f"   - y_train shape: {dataset['y_train'].shape}")
+
+    resampled = resample_stage(cache, features, dataset["y_train"], features_key)
+
+    # 🚀 Search hyperparameters (the search refits the best model on the whole resampled set)
+    modes = [search] + [mode for mode in SEARCH_MODES if compare and mode != search]
+    results = {mode: search_stage(cache, mode, features, dataset["y_train"], resampled, param_grid or PARAM_GRID,
+                                  search_options)
+               for mode in modes}
+    model = results[search].model
+
+    if compare:
+        print("\n📊 Search comparison:")
+        for mode, result in results.items():
+            test_accuracy = accuracy_score(dataset["y_test"], result.model.predict(features["X_test"]))
+            print(f"   - {mode:<8} {result.seconds:>8.1f}s, {result.fits:>4} fits, "
+                  f"best score {result.score:.4f}, test accuracy {test_accuracy * 100:.2f}%")
+
+    # 🚀 Evaluate Model
+    y_pred = model.predict(features["X_test"])
+    accuracy = accuracy_score(dataset["y_test"], y_pred)
+
+    print(f"\n✅ Model Training Completed. Accuracy: {accuracy * 100:.2f}%")
+    print("\n🔍 Classification Report:\n", classification_report(dataset["y_test"], y_pred))
+
+    if save:
+        cache.time("save", lambda: save_model(model, features["vectorizer"], features["scaler"], feature_mode))
+
+    cache.report()
+    return model, features["vectorizer"], features["scaler"], accuracy
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the XGBoost bot classifier")
+    parser.add_argument("--features", choices=FEATURE_MODES, default=DEFAULT_FEATURE_MODE,
+                        help="Feature pipeline: TF-IDF over rendered text, or dense numeric features")
+    parser.add_argument("--param-grid", type=json.loads,
+                        help="Hyperparameter grid as JSON, e.g. '{\"max_depth\": [3, 6]}' (default: PARAM_GRID)")
+    parser.add_argument("--cache-dir", default=TRAINING_CACHE_DIR, help="Directory of cached stage outputs")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+    parser.add_argument("--search", choices=SEARCH_MODES, default="grid",
+                        help="Hyperparameter search: exhaustive grid search, or successive halving with early stopping")
+    parser.add_argument("--compare-search", action="store_true",
+                        help="Also run the other search mode and report time and scores side by side")
+    parser.add_argument("--max-trees", type=int, help="Halving: tree budget of the last rung (default: grid maximum)")
+    parser.add_argument("--min-trees", type=int, default=HALVING_MIN_TREES, help="Halving: minimum trees on the first rung")
+    parser.add_argument("--eta", type=int, default=HALVING_ETA, help="Halving: keep the best 1/eta candidates per rung")
+    parser.add_argument("--max-search-seconds", type=float, help="Halving: wall-time budget of the search")
+    parser.add_argument("--early-stopping-rounds", type=int, default=EARLY_STOPPING_ROUNDS,
+                        help="Halving: rounds without validation improvement before a fit stops")
+    args = parser.parse_args()
+
+    search_options = {"max_trees": args.max_trees, "min_trees": args.min_trees, "eta": args.eta,
+                      "max_seconds": args.max_search_seconds, "early_stopping_rounds": args.early_stopping_rounds}
+    train(args.features, param_grid=args.param_grid,
+          cache=StageCache(args.cache_dir, enabled=not args.no_cache),
+          search=args.search, search_options=search_options, compare=args.compare_search)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# src/monitoring/__init__.py
+"""
+Monitoring package initialization for Instagram Bot Detector.
+"""
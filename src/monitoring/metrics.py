@@ -0,0 +1,214 @@
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Set METRICS_ENABLED=0 to turn every timer and counter into a no-op
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+METRIC_PREFIX = "botdetector_"
+
+# Histogram bucket upper bounds (seconds), from single featurization calls to whole page fetches with backoff
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Every metric: name -> (type, help)
+METRICS = {
+    "stage_seconds": ("histogram", "Wall time of one unit of work of a scrape-and-score stage."),
+    "stage_errors_total": ("counter", "Units of work of a stage that raised."),
+    "model_load_seconds": ("histogram", "Wall time of loading the model artifacts."),
+    "followers_scored_total": ("counter", "Followers scored by the model."),
+    "bots_detected_total": ("counter", "Followers scored as bots."),
+    "http_requests_total": ("counter", "HTTP requests answered by the API, by endpoint and status."),
+    "http_request_seconds": ("histogram", "Wall time of answering an API request, by endpoint.")
+}
+
+# Stages timed on the scrape-and-score path (label `stage` of `stage_seconds`)
+STAGES = ("pagination", "profile_fetch", "avatar_download", "image_hash", "featurize", "score")
+
+class _Histogram:
+    """Cumulative-bucket histogram of one label set (Prometheus semantics)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """
+    In-process store of counters and histograms, rendered in the Prometheus text format.
+
+    Metrics are keyed by name and a sorted tuple of label pairs. Every update
+    takes one lock, so recording from the pipeline's worker threads is safe;
+    the values are per process (scrape each worker of a multi-process server).
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Returns {name: {labels: value}} for counters and {name: {labels: (counts, sum, count)}} for histograms."""
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[labels] = value
+            for (name, labels), histogram in self._histograms.items():
+                histograms.setdefault(name, {})[labels] = (list(histogram.counts), histogram.sum, histogram.count)
+            return counters, histograms
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self, collected: dict = None):
+        """
+        Renders every metric (and `collected` ones) in the Prometheus text exposition format.
+
+        Args:
+            collected (dict): Values read from other components at scrape time (cache counters,
+                scheduler state...): name -> (type, help, {label pairs tuple: value}).
+
+        Returns:
+            str: The exposition text.
+        """
+        counters, histograms = self.snapshot()
+        lines = []
+
+        for name, (kind, help_text) in METRICS.items():
+            samples = counters.get(name) if kind == "counter" else histograms.get(name)
+            if not samples:
+                continue
+            full_name = METRIC_PREFIX + name
+            lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {kind}"]
+            for labels in sorted(samples):
+                if kind == "counter":
+                    lines.append(f"{full_name}{_labels(labels)} {_number(samples[labels])}")
+                    continue
+                counts, total, count = samples[labels]
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f"{full_name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{full_name}_count{_labels(labels)} {count}")
+
+        for name, (kind, help_text, samples) in (collected or {}).items():
+            full_name = METRIC_PREFIX + name
+            lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {kind}"]
+            for labels, value in samples.items():
+                lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: tuple):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_registry = MetricsRegistry()
+
+def get_metrics():
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+class _StageTimer:
+    """Context manager recording its wall time in `stage_seconds` (and errors in `stage_errors_total`)."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _registry.observe("stage_seconds", time.perf_counter() - self.start, stage=self.stage)
+        if exc_type is not None:
+            _registry.increment("stage_errors_total", stage=self.stage)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def stage_timer(stage: str):
+    """
+    Times one unit of work of a pipeline stage: `with stage_timer("profile_fetch"): ...`.
+
+    Returns a shared no-op context manager when metrics are disabled.
+    """
+    return _StageTimer(stage) if METRICS_ENABLED else _NULL_TIMER
+
+def timed_iter(iterable, stage: str):
+    """Yields from `iterable`, timing every `next()` as one unit of work of `stage` (e.g. pagination)."""
+    if not METRICS_ENABLED:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        except Exception:
+            _registry.increment("stage_errors_total", stage=stage)
+            raise
+        _registry.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+        yield item
+
+def stage_totals():
+    """Returns {stage: (units of work, total seconds)} of every timed stage so far."""
+    _, histograms = _registry.snapshot()
+    return {dict(labels)["stage"]: (count, total) for labels, (_, total, count) in histograms.get("stage_seconds", {}).items()}
+
+def increment(name: str, amount: float = 1, **labels):
+    """Adds `amount` to a counter (no-op when metrics are disabled)."""
+    if METRICS_ENABLED:
+        _registry.increment(name, amount, **labels)
+
+def observe(name: str, value: float, **labels):
+    """Records a histogram observation (no-op when metrics are disabled)."""
+    if METRICS_ENABLED:
+        _registry.observe(name, value, **labels)
@@ -0,0 +1,111 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Seconds between two stack samples
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.005))
+
+# Functions listed in the text report
+PROFILE_TOP = 30
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread from a background thread.
+
+    Every `interval` seconds the current frame of each other thread is walked
+    and its stack counted, so the overhead does not depend on how many
+    functions run (unlike `cProfile`) and time spent waiting on the network
+    shows up where the thread is blocked. `write_report()` writes:
+    - `<path>.txt`: the functions with the most samples, by self and total time.
+    - `<path>.folded`: one `thread;frame;frame count` line per distinct stack, the
+      collapsed format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._elapsed = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            # Worker threads of one pool (`pipeline-enrich-3`, `image-hash_0`) are merged under one name
+            names = {thread.ident: re.sub(r"[-_]\d+$", "", thread.name) for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self._stacks[(names.get(thread_id, str(thread_id)), tuple(reversed(stack)))] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _label(frame):
+        filename, line, name = frame
+        # Paths relative to their import root (`data/scraper.py`, `requests/sessions.py`)
+        roots = [root for root in sys.path if root and filename.startswith(os.path.join(root, ""))]
+        if roots:
+            filename = os.path.relpath(filename, max(roots, key=len))
+        return f"{name} ({filename}:{line})"
+
+    def write_report(self, path: str, top: int = PROFILE_TOP):
+        """
+        Writes the text report and the collapsed stacks next to `path` (extension replaced).
+
+        Returns:
+            tuple: (text report path, collapsed stacks path)
+        """
+        base = os.path.splitext(path)[0]
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+
+        own, total = Counter(), Counter()
+        for (_, stack), count in self._stacks.items():
+            if not stack:
+                continue
+            own[stack[-1]] += count
+            for frame in set(stack):
+                total[frame] += count
+        stack_samples = sum(self._stacks.values()) or 1
+
+        with open(base + ".txt", "w", encoding="utf-8") as report:
+            report.write(f"Sampling profile: {self.samples} samples every {self.interval * 1000:.1f} ms "
+                         f"over {self._elapsed:.1f}s, {stack_samples} thread stacks\n")
+            for title, counter in (("Self time", own), ("Total time (including callees)", total)):
+                report.write(f"\n{title}:\n")
+                for frame, count in counter.most_common(top):
+                    report.write(f"{count / stack_samples * 100:6.1f}%  {count:>7}  {self._label(frame)}\n")
+
+        with open(base + ".folded", "w", encoding="utf-8") as folded:
+            for (thread_name, stack), count in self._stacks.most_common():
+                frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack)
+                folded.write(f"{thread_name};{frames} {count}\n")
+
+        return base + ".txt", base + ".folded"
@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+sys.path.append(os.path.join(BASE_DIR, "benchmarks"))
+
+# Crawl state, sessions and caches of the tests live in a scratch directory (read when the modules are imported),
+# and requests are not paced: they go to the offline stand-in
+WORK_DIR = tempfile.mkdtemp(prefix="bot-detector-tests-")
+os.environ.update({
+    "PROFILE_CACHE_PATH": os.path.join(WORK_DIR, "profiles.db"),
+    "CRAWL_STATE_PATH": os.path.join(WORK_DIR, "crawl_state.db"),
+    "FOLLOWER_STORE_DIR": os.path.join(WORK_DIR, "datasets"),
+    "SCHEDULER_INSTALOADER_PACING": "0",
+    "SCHEDULER_RATE_PER_HOUR": "1e9",
+    "SCHEDULER_MAX_RATE_PER_HOUR": "1e9"
+})
+
+INSTA_USER, INSTA_PASS = "viewer", "password"
+
+@pytest.fixture(scope="session")
+def instagram():
+    """Routes every Instagram request to the offline stand-in (`bench_<N>` targets have N followers)."""
+    from fake_instagram import FakeInstagramServer, redirect_instagram
+
+    with FakeInstagramServer("127.0.0.1", rate_limit=0) as server, redirect_instagram(server.url):
+        yield server
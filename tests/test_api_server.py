@@ -0,0 +1,38 @@
+import pytest
+
+import api.api_server as api_server
+
+CREDENTIALS = {"insta_user": "viewer", "insta_pass": "password"}
+
+@pytest.fixture
+def client():
+    return api_server.app.test_client()
+
+@pytest.mark.parametrize("username", [["x"], {"a": 1}, 42, "../../x", "a/b", "user name", "a" * 31, "ünïcode"])
+def test_jobs_reject_invalid_usernames(client, username):
+    response = client.post("/jobs", json=dict(CREDENTIALS, username=username))
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid target username."}
+
+def test_jobs_accept_instagram_usernames(client, monkeypatch):
+    submitted = []
+
+    class Job:
+        id = "job"
+
+        def to_dict(self):
+            return {"job_id": self.id}
+
+    def submit(username, *args, key):
+        submitted.append((username, key))
+        return Job(), True
+
+    monkeypatch.setattr(api_server.job_manager, "submit", submit)
+    response = client.post("/jobs", json=dict(CREDENTIALS, username="Some.User_1"))
+    assert response.status_code == 202
+    assert submitted == [("Some.User_1", "some.user_1")]
+
+@pytest.mark.parametrize("route", ["/analyze/{}", "/analyze/{}/stream"])
+def test_analyze_rejects_invalid_usernames(client, route):
+    response = client.get(route.format("bad-name"), query_string=CREDENTIALS)
+    assert response.status_code == 400
@@ -0,0 +1,41 @@
+import pytest
+from conftest import INSTA_PASS, INSTA_USER
+
+from api.batch import analyze_targets, read_targets
+from api.pipeline import analyze_account
+
+def test_read_targets(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text("# Accounts\n@first\nsecond  # note\n\nfirst\n", encoding="utf-8")
+    assert read_targets(str(path)) == ["first", "second"]
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_followers_shared_by_targets_are_scored_once(instagram, workers):
+    # bench_N follows the first N followers of the stand-in, so the audiences overlap
+    report, results = analyze_targets(["bench_50", "bench_85", "bench_30", "bench_50"], INSTA_USER, INSTA_PASS,
+                                      workers=workers)
+    targets = report["targets"]
+
+    assert list(targets) == ["bench_50", "bench_85", "bench_30"]
+    assert [targets[name]["followers"] for name in targets] == [50, 85, 30]
+    assert report["memberships"] == 165
+    assert report["unique_followers"] == report["analyzed"] == len(results) == len(set(results.usernames)) == 85
+
+    # The superset target sees every unique follower
+    assert targets["bench_85"]["analyzed"] == 85
+    assert targets["bench_85"]["bots"] == report["bots"] == results.bot_count()
+    assert targets["bench_30"]["bots"] <= targets["bench_50"]["bots"] <= targets["bench_85"]["bots"]
+
+def test_per_target_results_match_single_target_runs(instagram):
+    report, _ = analyze_targets(["bench_40", "bench_65"], INSTA_USER, INSTA_PASS, workers=0)
+    for target in ("bench_40", "bench_65"):
+        bot_percentage, results = analyze_account(target, INSTA_USER, INSTA_PASS)
+        assert report["targets"][target]["bots"] == results.bot_count()
+        assert report["targets"][target]["bot_percentage"] == pytest.approx(bot_percentage)
+
+def test_a_failing_target_does_not_stop_the_others(instagram):
+    report, results = analyze_targets(["no_such_account", "bench_20"], INSTA_USER, INSTA_PASS, workers=0)
+    assert report["targets"]["no_such_account"]["error"]
+    assert report["targets"]["no_such_account"]["followers"] == 0
+    assert report["targets"]["bench_20"]["error"] is None
+    assert report["unique_followers"] == len(results) == 20
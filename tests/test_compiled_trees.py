@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy import sparse
+from xgboost import XGBClassifier
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(os.path.join(BASE_DIR, "src"))
+
+from models.compiled_trees import CompiledForest, compile_booster
+
+TOLERANCE = 1e-5
+
+def make_data(n_rows=2000, n_features=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    y = ((X[:, 0] + X[:, 1] * X[:, 2] - 0.5 * X[:, 3]) > 0).astype(int)
+    return X, y
+
+@pytest.fixture(scope="module")
+def trained():
+    X, y = make_data()
+    X[::7, 1] = np.nan  # Exercise the default (missing) branches
+    model = XGBClassifier(n_estimators=60, max_depth=5, learning_rate=0.2, objective="binary:logistic")
+    model.fit(X, y)
+    return model, X
+
+def test_dense_predictions_match_xgboost(trained):
+    model, X = trained
+    forest = compile_booster(model)
+
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=TOLERANCE)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+@pytest.mark.parametrize("batch_size", [1, 64, 4096])
+def test_batch_sizes(trained, batch_size):
+    model, _ = trained
+    X, _ = make_data(n_rows=batch_size, seed=batch_size)
+    forest = compile_booster(model)
+
+    np.testing.assert_allclose(forest.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=TOLERANCE)
+
+def test_sparse_absent_entries_are_missing():
+    X, y = make_data(seed=1)
+    X[np.abs(X) < 0.5] = 0  # Sparsify: XGBoost treats entries absent from a CSR matrix as missing
+    X_sparse = sparse.csr_matrix(X)
+    model = XGBClassifier(n_estimators=40, max_depth=4, objective="binary:logistic")
+    model.fit(X_sparse, y)
+    forest = compile_booster(model)
+
+    np.testing.assert_allclose(forest.predict_proba(X_sparse), model.predict_proba(X_sparse), atol=TOLERANCE)
+
+def test_save_and_load_roundtrip(trained, tmp_path):
+    model, X = trained
+    forest = compile_booster(model)
+    loaded = CompiledForest.load(forest.save(str(tmp_path / "forest.npz")))
+
+    np.testing.assert_array_equal(loaded.predict_proba(X), forest.predict_proba(X))
+    assert loaded.max_depth == forest.max_depth
+
+def test_early_stopping_uses_best_iteration():
+    X, y = make_data(seed=2)
+    model = XGBClassifier(n_estimators=200, max_depth=6, learning_rate=0.3, early_stopping_rounds=5)
+    model.fit(X[:1500], y[:1500], eval_set=[(X[1500:], y[1500:])], verbose=False)
+    forest = compile_booster(model)
+
+    assert forest.n_trees == model.best_iteration + 1
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=TOLERANCE)
+
+def test_rejects_multiclass():
+    X, _ = make_data(n_rows=300)
+    y = np.arange(300) % 3
+    model = XGBClassifier(n_estimators=5).fit(X, y)
+
+    with pytest.raises(ValueError):
+        compile_booster(model)
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+from conftest import INSTA_PASS, INSTA_USER
+
+from api.pipeline import analyze_account
+from data.crawl_state import CrawlState
+from data.scraper import get_followers_data
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "crawl_state.db")
+
+def test_concurrent_crawls_keep_separate_state(state_path):
+    first, second = CrawlState("Target", state_path), CrawlState("target", state_path)
+    assert first.crawl_id != second.crawl_id
+
+    assert first.mark_seen(1, "a")
+    assert second.mark_seen(1, "a")  # Not deduped against the other crawl
+    assert not first.mark_seen(1, "a")
+
+    second.clear()  # Leaves the other crawl's progress alone
+    assert list(first.iter_usernames()) == ["a"]
+    first.close()
+    second.close()
+
+def test_a_new_crawl_resumes_the_abandoned_one(state_path):
+    crawl = CrawlState("target", state_path)
+    crawl.mark_seen(1, "a")
+    crawl.mark_seen(2, "b")
+    crawl.close()  # Interrupted: the pending followers are written, the crawl released
+
+    resumed = CrawlState("target", state_path)
+    assert resumed.crawl_id == crawl.crawl_id
+    assert resumed.seen_count() == 2
+    assert not resumed.mark_seen(2, "b")
+    assert resumed.mark_seen(3, "c")
+    assert sorted(resumed.iter_usernames()) == ["a", "b", "c"]
+
+    resumed.clear()
+    resumed.close()
+    fresh = CrawlState("target", state_path)
+    assert fresh.seen_count() == 0
+    fresh.close()
+
+def test_interrupted_crawl_is_resumed_and_fully_scored(instagram):
+    delivered = []
+
+    def interrupt(follower):
+        delivered.append(follower.username)
+        if len(delivered) == 70:  # After the cursor checkpoint at 50 followers
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        get_followers_data("bench_110", INSTA_USER, INSTA_PASS, follower_callback=interrupt)
+
+    _, results = analyze_account("bench_110", INSTA_USER, INSTA_PASS)
+    assert len(results) == len(set(results.usernames)) == 110
+
+def test_two_concurrent_crawls_of_the_same_target(instagram):
+    outcomes = []
+
+    def crawl():
+        try:
+            outcomes.append(len(get_followers_data("bench_120", INSTA_USER, INSTA_PASS,
+                                                   follower_callback=lambda follower: None)))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=crawl) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == [120, 120]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import scipy.sparse
+
+import models.inferencer as inferencer
+from models.features import RAW_FEATURE_KEYS
+from models.inferencer import predict_batch
+from models.model_loader import LoadedModel
+from models.training_cache import StageCache
+from models.xgboost_trainer import features_stage
+
+class RecordingModel:
+    """Model stand-in keeping the input matrix it is asked to score."""
+
+    def predict_proba(self, input_data):
+        self.input_data = input_data
+        return np.full((input_data.shape[0], 2), 0.5)
+
+class StaticRegistry:
+    def __init__(self, loaded):
+        self.loaded = loaded
+
+    def get(self):
+        return self.loaded
+
+def make_raw(count, seed):
+    rng = np.random.default_rng(seed)
+    columns = [rng.integers(0, 100000, count), rng.integers(0, 7500, count), rng.integers(0, 150, count),
+               rng.integers(0, 2000, count), rng.integers(0, 2, count), rng.integers(0, 2, count),
+               rng.integers(0, 10, count), rng.integers(1, 30, count)]
+    return np.column_stack(columns).astype(np.float64)
+
+@pytest.mark.parametrize("feature_mode", ["tfidf", "dense"])
+def test_serving_builds_the_training_matrix(feature_mode, tmp_path, monkeypatch):
+    dataset = {"raw_train": make_raw(400, seed=0), "raw_test": make_raw(100, seed=1)}
+    features, _ = features_stage(StageCache(str(tmp_path), enabled=False), dataset, "synthetic", feature_mode)
+
+    model = RecordingModel()
+    registry = StaticRegistry(LoadedModel(model, features["vectorizer"], features["scaler"]))
+    monkeypatch.setattr(inferencer, "get_registry", lambda feature_mode=None: registry)
+
+    # The test rows as the scraper hands them to the API (plain ints, extra fields)
+    records = [dict(zip(RAW_FEATURE_KEYS, map(int, row)), username=f"user{index}")
+               for index, row in enumerate(dataset["raw_test"])]
+    predict_batch(records, feature_mode)
+
+    expected, served = features["X_test"], model.input_data
+    assert scipy.sparse.issparse(served) == scipy.sparse.issparse(expected) == (feature_mode == "tfidf")
+    if feature_mode == "tfidf":
+        expected, served = expected.toarray(), served.toarray()
+    assert served.shape == expected.shape
+    assert served.dtype == expected.dtype
+    np.testing.assert_array_equal(served, expected)
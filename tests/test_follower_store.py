@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from data.follower_store import (FollowerStoreWriter, find_latest_session, iter_follower_records, new_session_path,
+                                 read_session_footer)
+
+@pytest.mark.parametrize("username", ["../../../tmp/x", "a/b", "..", ".", ""])
+def test_session_paths_stay_in_the_store_directory(tmp_path, username):
+    with pytest.raises(ValueError):
+        new_session_path(username, str(tmp_path))
+    with pytest.raises(ValueError):
+        find_latest_session(username, str(tmp_path))
+
+def test_new_session_paths_are_unique(tmp_path):
+    first = new_session_path("someone", str(tmp_path))
+    assert os.path.dirname(first) == str(tmp_path)
+    open(first, "w").close()
+    assert new_session_path("someone", str(tmp_path)) != first
+
+def test_only_complete_sessions_are_found(tmp_path):
+    directory = str(tmp_path)
+    with FollowerStoreWriter(new_session_path("someone", directory)) as store:
+        store.write({"username": "a", "followers": 1})
+        store.write({"username": "b", "followers": 2})
+        store.complete()
+    complete = store.path
+
+    assert read_session_footer(complete)["records"] == 2
+    assert [record["username"] for record in iter_follower_records(complete)] == ["a", "b"]
+    assert find_latest_session("someone", directory)[0] == complete
+
+    # A newer unfinished session and a newer empty complete one are skipped
+    with FollowerStoreWriter(new_session_path("someone", directory)) as store:
+        store.write({"username": "a", "followers": 1})
+    with FollowerStoreWriter(new_session_path("someone", directory)) as store:
+        store.complete()
+    assert find_latest_session("someone", directory)[0] == complete
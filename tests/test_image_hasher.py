@@ -0,0 +1,39 @@
+from io import BytesIO
+
+import imagehash
+import pytest
+from fake_instagram import DEFAULT_AVATAR_HASH, _render_avatars
+from PIL import Image
+
+from data.image_hasher import decode_image_hash, image_cache_key
+from data.scraper import DEFAULT_PROFILE_PIC_HASHES, is_custom_profile_pic_hash
+
+@pytest.fixture(scope="module")
+def avatars():
+    return _render_avatars(seed=42)
+
+def test_default_avatar_hash_is_pinned(avatars):
+    _, default_avatar = avatars
+    assert DEFAULT_AVATAR_HASH == DEFAULT_PROFILE_PIC_HASHES["instagram_light"]
+    assert decode_image_hash(default_avatar) == "ffffc3c3e7e78181"
+    assert not is_custom_profile_pic_hash(decode_image_hash(default_avatar))
+
+@pytest.mark.parametrize("size", [150, 320, 1080])
+def test_default_avatar_hash_at_served_sizes(avatars, size):
+    _, default_avatar = avatars
+    buffer = BytesIO()
+    Image.open(BytesIO(default_avatar)).resize((size, size), Image.NEAREST).save(buffer, "JPEG", quality=90)
+    assert not is_custom_profile_pic_hash(decode_image_hash(buffer.getvalue()))
+
+def test_hashes_match_a_full_decode(avatars):
+    images, _ = avatars
+    for content in images:
+        expected = str(imagehash.average_hash(Image.open(BytesIO(content)).convert("L"), hash_size=8))
+        assert decode_image_hash(content) == expected
+        assert is_custom_profile_pic_hash(decode_image_hash(content))
+
+def test_cdn_urls_are_keyed_by_asset():
+    first = "https://scontent-a.cdninstagram.com/v/t51/123_456_789_n.jpg?sig=1"
+    second = "https://scontent-b.cdninstagram.com/other/123_456_789_n.jpg?sig=2"
+    assert image_cache_key(first) == image_cache_key(second) == "ig:123_456_789_n.jpg"
+    assert image_cache_key("https://example.com/a.jpg?x=1") == "https://example.com/a.jpg"
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+
+# Cumulative import time allowed per entry point (seconds), on top of the interpreter's own startup.
+# Scale them with IMPORT_TIME_BUDGET_SCALE on slow machines.
+BUDGET_SCALE = float(os.environ.get("IMPORT_TIME_BUDGET_SCALE", 1))
+HELP_BUDGET = 0.15
+API_BUDGET = 0.8
+SCORING_BUDGET = 4.0
+
+# Modules that cost hundreds of milliseconds (or the scraping stack) and must stay off light paths
+HEAVY_MODULES = {"flask", "instaloader", "requests", "PIL", "imagehash", "tqdm",
+                 "numpy", "pandas", "scipy", "sklearn", "xgboost", "joblib", "pyarrow"}
+SCRAPER_MODULES = {"instaloader", "requests", "PIL", "imagehash", "tqdm", "flask"}
+
+# Cold starts are noisy: the fastest of a few runs is compared with the budget
+RUNS = 3
+
+def import_times(*args):
+    """
+    Runs `python -X importtime *args` in src/.
+
+    Returns:
+        dict: Top-level module -> cumulative import seconds, for every module imported.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=SRC_DIR,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Header
+        # Nested imports are indented below the module importing them; their time is in its cumulative
+        depth = len(name) - len(name.lstrip())
+        modules[name.strip()] = (depth, int(cumulative) / 1e6)
+    return modules
+
+def measure(*args):
+    """Returns (fastest cumulative seconds of the entry point's own imports, every module it imported)."""
+    startup = set(import_times("-c", "pass"))
+    totals = []
+    for _ in range(RUNS):
+        modules = import_times(*args)
+        shallowest = min(depth for depth, _ in modules.values())
+        totals.append(sum(seconds for name, (depth, seconds) in modules.items()
+                          if depth == shallowest and name not in startup))
+    return min(totals), set(modules)
+
+def test_help_loads_nothing():
+    seconds, modules = measure("main.py", "--help")
+    assert not modules & HEAVY_MODULES, f"`main.py --help` imports {sorted(modules & HEAVY_MODULES)}"
+    assert not any(name.startswith(("api.", "data.", "models.")) for name in modules)
+    assert seconds <= HELP_BUDGET * BUDGET_SCALE, f"`main.py --help` imports took {seconds:.3f}s"
+
+def test_api_server_imports_only_flask():
+    seconds, modules = measure("-c", "import api.api_server")
+    assert not modules & (HEAVY_MODULES - {"flask"}), \
+        f"`api.api_server` imports {sorted(modules & (HEAVY_MODULES - {'flask'}))}"
+    assert seconds <= API_BUDGET * BUDGET_SCALE, f"`api.api_server` imports took {seconds:.3f}s"
+
+@pytest.mark.parametrize("module", ["api.bot_detector", "models.inferencer"])
+def test_scoring_skips_the_scraper(module):
+    seconds, modules = measure("-c", f"import {module}")
+    assert not modules & SCRAPER_MODULES, f"`{module}` imports {sorted(modules & SCRAPER_MODULES)}"
+    assert seconds <= SCORING_BUDGET * BUDGET_SCALE, f"`{module}` imports took {seconds:.3f}s"
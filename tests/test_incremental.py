@@ -0,0 +1,65 @@
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from conftest import INSTA_PASS, INSTA_USER
+
+from api.incremental import analyze_account_incremental
+from api.pipeline import analyze_account, iter_account_analysis
+from api.sampling import sample_account
+from data.follower_store import DATASETS_DIR, SESSION_TIME_FORMAT, find_latest_session, read_session_footer
+
+def copy_snapshot(path: str, username: str):
+    """Stores a session file as an older snapshot of another target."""
+    started = datetime.now() - timedelta(days=1)
+    copy = os.path.join(DATASETS_DIR, f"{username}-{started.strftime(SESSION_TIME_FORMAT)}.ndjson")
+    shutil.copyfile(path, copy)
+    return copy
+
+def test_full_analysis_marks_its_session_complete(instagram):
+    analyze_account("bench_60", INSTA_USER, INSTA_PASS)
+
+    path, _ = find_latest_session("bench_60")
+    assert read_session_footer(path)["records"] == 60
+
+def test_incremental_after_sampling_analyzes_everything(instagram):
+    sample_account("bench_70", INSTA_USER, INSTA_PASS, ci_width=1.0, max_sample=10, seed=0)
+    assert find_latest_session("bench_70") == (None, None)
+
+    report, results = analyze_account_incremental("bench_70", INSTA_USER, INSTA_PASS)
+    assert report["previous_snapshot"] is None
+    assert report["added"] == report["followers"] == len(results) == 70
+
+def test_incremental_skips_an_aborted_crawl(instagram):
+    analyze_account("bench_80", INSTA_USER, INSTA_PASS)
+    complete, _ = find_latest_session("bench_80")
+
+    # Stop consuming after the first scored batch: the crawl is cancelled and its session left unfinished
+    batches = iter_account_analysis("bench_80", INSTA_USER, INSTA_PASS, batch_size=10)
+    next(batches)
+    batches.close()
+
+    report, results = analyze_account_incremental("bench_80", INSTA_USER, INSTA_PASS)
+    assert report["previous_snapshot"] == complete
+    assert (report["added"], report["removed"], report["retained"]) == (0, 0, 80)
+    assert report["reused_scores"] == len(results) == 80
+
+def test_incremental_churn_counts(instagram):
+    analyze_account("bench_90", INSTA_USER, INSTA_PASS)
+    snapshot, _ = find_latest_session("bench_90")
+
+    # bench_N follows the first N followers of the stand-in: a 90-follower snapshot diffed against 100 and 75 followers
+    copy_snapshot(snapshot, "bench_100")
+    report, results = analyze_account_incremental("bench_100", INSTA_USER, INSTA_PASS)
+    assert (report["added"], report["removed"], report["retained"]) == (10, 0, 90)
+    assert (report["reused_scores"], report["rescored"]) == (90, 0)
+    assert report["followers"] == len(results) == 100
+
+    copy_snapshot(snapshot, "bench_75")
+    report, results = analyze_account_incremental("bench_75", INSTA_USER, INSTA_PASS)
+    assert (report["added"], report["removed"], report["retained"]) == (0, 15, 75)
+    assert report["followers"] == len(results) == 75
+
+    # Stored scores older than the TTL are refreshed
+    report, _ = analyze_account_incremental("bench_75", INSTA_USER, INSTA_PASS, ttl=0)
+    assert (report["retained"], report["rescored"], report["reused_scores"]) == (75, 75, 0)
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+import api.jobs as jobs
+from api.jobs import COMPLETED, FAILED, QUEUED, RUNNING, FINISHED_JOB_TTL, Job, JobManager, QueueFullError
+
+def wait_until(condition, seconds=10):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+@pytest.fixture
+def release():
+    """Event the blocking runner waits on; set at teardown so no worker is left hanging."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+@pytest.fixture
+def manager(release):
+    def runner(job, result="done"):
+        release.wait(10)
+        if result is None:
+            raise RuntimeError("crawl failed")
+        return result
+
+    return JobManager(runner, max_workers=1, max_queue_depth=1)
+
+def test_submissions_for_the_same_key_share_one_job(manager, release):
+    job, created = manager.submit("Target")
+    same_job, same_created = manager.submit("target")
+    sampled_job, sampled_created = manager.submit("target", key="target:sample")
+
+    assert created and not same_created and sampled_created
+    assert same_job is job
+    assert sampled_job is not job
+
+    release.set()
+    wait_until(lambda: job.finished and sampled_job.finished)
+    assert job.status == COMPLETED and job.result == "done"
+
+    # Finished jobs no longer absorb submissions
+    new_job, new_created = manager.submit("target")
+    assert new_created and new_job is not job
+
+def test_queue_full(manager, release):
+    running, _ = manager.submit("first")
+    queued, _ = manager.submit("second")
+    wait_until(lambda: running.status == RUNNING)
+    assert queued.status == QUEUED
+    assert manager.queue_depth() == 1
+
+    with pytest.raises(QueueFullError):
+        manager.submit("third")
+    # Attaching to an in-flight job is still allowed
+    assert manager.submit("second") == (queued, False)
+
+    release.set()
+    wait_until(lambda: queued.finished)
+    assert manager.submit("third")[1]
+
+def test_failed_jobs_record_the_error(manager, release):
+    release.set()
+    job, _ = manager.submit("target", None)
+    wait_until(lambda: job.finished)
+
+    assert job.status == FAILED
+    assert job.error == "crawl failed"
+    assert job.progress["stage"] == FAILED
+
+def test_finished_jobs_expire(manager, release):
+    release.set()
+    old, _ = manager.submit("old")
+    recent, _ = manager.submit("recent")
+    wait_until(lambda: old.finished and recent.finished)
+
+    old.finished_at = time.time() - FINISHED_JOB_TTL - 1
+    manager.submit("another")  # Submissions evict expired jobs
+
+    assert manager.get(old.id) is None
+    assert manager.get(recent.id) is recent
+
+def test_eviction_skips_finished_jobs_without_a_finish_time(manager):
+    job = Job("target")
+    job.status = COMPLETED
+    manager._jobs[job.id] = job
+
+    manager.submit("another")
+    assert manager.get(job.id) is job
+
+def test_finish_time_is_set_before_the_terminal_status(monkeypatch):
+    finish_times = []
+
+    class RecordingJob(Job):
+        @property
+        def status(self):
+            return self._status
+
+        @status.setter
+        def status(self, value):
+            if value in (COMPLETED, FAILED):
+                finish_times.append(self.finished_at)
+            self._status = value
+
+    def runner(job, fail):
+        if fail:
+            raise RuntimeError("crawl failed")
+        return "done"
+
+    monkeypatch.setattr(jobs, "Job", RecordingJob)
+    manager = JobManager(runner)
+    completed, _ = manager.submit("completed", False)
+    failed, _ = manager.submit("failed", True)
+    wait_until(lambda: completed.finished and failed.finished)
+
+    assert len(finish_times) == 2
+    assert None not in finish_times
@@ -0,0 +1,88 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from xgboost import XGBClassifier
+
+import models.inferencer as inferencer
+from models.bundle import activate_bundle, current_version, write_bundle
+from models.features import RAW_FEATURE_KEYS, build_model_input, dense_matrix, fit_scaler, raw_matrix, render_texts
+from models.inferencer import predict_batch
+from models.model_loader import ModelRegistry
+
+def make_records(count, seed):
+    rng = np.random.default_rng(seed)
+    return [dict(zip(RAW_FEATURE_KEYS, map(int, (
+        rng.integers(0, 5000), rng.integers(0, 3000), rng.integers(0, 150), rng.integers(0, 500),
+        rng.integers(0, 2), rng.integers(0, 2), rng.integers(0, 6), rng.integers(3, 30)
+    )))) for _ in range(count)]
+
+def train(records, seed, n_estimators):
+    """Fits a small TF-IDF pipeline on synthetic labels (bots: few followers, digits in the username)."""
+    raw = raw_matrix(records)
+    labels = ((raw[:, 0] < 1500) & (raw[:, 6] > 1)).astype(int)
+    scaler = fit_scaler(dense_matrix(raw))
+    vectorizer = TfidfVectorizer(max_features=200).fit(render_texts(raw))
+    model = XGBClassifier(n_estimators=n_estimators, max_depth=3, random_state=seed)
+    model.fit(build_model_input(raw, vectorizer, scaler), labels)
+    return model, vectorizer, scaler
+
+@pytest.fixture
+def bundles(tmp_path):
+    """Two bundle versions of the TF-IDF pipeline (the first one current) and the pickles of the second."""
+    records = make_records(300, seed=0)
+    root = str(tmp_path / "bundles")
+
+    first = write_bundle(*train(records, seed=1, n_estimators=5), root=root)
+    second_artifacts = train(records, seed=2, n_estimators=20)
+    second = write_bundle(*second_artifacts, root=root, activate=False)
+
+    pickle_path = str(tmp_path / "second.pkl")
+    joblib.dump(second_artifacts, pickle_path)
+    return root, os.path.basename(first), os.path.basename(second), pickle_path
+
+def test_registry_picks_up_the_activated_bundle(bundles, monkeypatch):
+    root, first, second, pickle_path = bundles
+    registry = ModelRegistry(None, feature_mode="tfidf", backend="xgboost", bundle_dir=root)
+    monkeypatch.setattr(inferencer, "get_registry", lambda feature_mode=None: registry)
+    records = make_records(50, seed=3)
+
+    registry.get()
+    assert registry.version == first
+    first_labels, first_probabilities = predict_batch(records)
+
+    # Another process activates the second version: the next check swaps it in
+    activate_bundle(root, second)
+    assert current_version(root) == second
+    registry._check_for_update()
+    assert registry.version == registry.stats()["bundle_version"] == second
+
+    # Bundle arrays are memory-mapped, not copied into the process
+    _, vectorizer, scaler = registry.get()
+    assert isinstance(vectorizer.idf_, np.memmap)
+    assert isinstance(scaler.scale_, np.memmap)
+
+    # Predictions match the pickled model the bundle was written from
+    model, pickled_vectorizer, pickled_scaler = joblib.load(pickle_path)
+    expected = model.predict_proba(build_model_input(raw_matrix(records), pickled_vectorizer, pickled_scaler))[:, 1]
+    labels, probabilities = predict_batch(records)
+    np.testing.assert_allclose(probabilities, expected, rtol=1e-6)
+    assert labels == ["Bot Detected" if p >= inferencer.BOT_THRESHOLD else "Real User" for p in expected]
+    assert not np.allclose(probabilities, first_probabilities)
+
+    # Reloading an older version rolls back
+    registry.reload(first)
+    assert registry.version == current_version(root) == first
+    np.testing.assert_allclose(predict_batch(records)[1], first_probabilities, rtol=1e-6)
+
+def test_a_broken_bundle_keeps_the_loaded_version(bundles, tmp_path):
+    root, first, second, _ = bundles
+    registry = ModelRegistry(None, feature_mode="tfidf", backend="xgboost", bundle_dir=root)
+    registry.get()
+
+    (tmp_path / "bundles" / second / "booster.ubj").write_bytes(b"not a booster")
+    activate_bundle(root, second)
+    registry._check_for_update()
+    assert registry.version == first
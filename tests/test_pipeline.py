@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+import api.pipeline as pipeline
+from api.pipeline import iter_enriched, iter_pipeline
+
+class BrokenCache:
+    """Profile cache whose reads fail like a locked SQLite database."""
+
+    def get(self, username):
+        raise RuntimeError("database is locked")
+
+    def put(self, username, record):
+        raise RuntimeError("database is locked")
+
+def run_with_deadline(function, seconds=30):
+    """Runs `function` in a thread and fails the test if it does not return in time."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = function()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "the pipeline hung"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+def produce_usernames(names):
+    def produce(put):
+        for name in names:
+            put(name)
+    return produce
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_failing_enrichment_counts_as_a_failed_retrieval(monkeypatch, concurrency):
+    monkeypatch.setattr(pipeline, "get_profile_cache", lambda: BrokenCache())
+    names = [f"user_{i}" for i in range(25)]
+
+    items = run_with_deadline(lambda: list(iter_enriched(produce_usernames(names), concurrency)))
+    assert sorted(items) == sorted((name, None) for name in names)
+
+def test_failing_enrichment_does_not_stall_scoring(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_profile_cache", lambda: BrokenCache())
+
+    batches = run_with_deadline(lambda: list(iter_pipeline(produce_usernames(["a", "b", "c"]), concurrency=2)))
+    _, progress = batches[-1]
+    assert (progress["enumerated"], progress["processed"], progress["analyzed"]) == (3, 3, 0)
+
+def test_producer_errors_reach_the_consumer():
+    def produce(put):
+        raise ValueError("enumeration failed")
+
+    with pytest.raises(ValueError, match="enumeration failed"):
+        run_with_deadline(lambda: list(iter_enriched(produce, 2)))
@@ -0,0 +1,110 @@
+import time
+
+import instaloader
+import pytest
+
+from data.request_scheduler import (
+    BASE_COOLDOWN, BURST_SIZE, CLEAN_STREAK_FOR_INCREASE, MAX_COOLDOWN, MAX_RATE_PER_HOUR, MIN_RATE_PER_HOUR,
+    RATE_DECREASE_FACTOR, RATE_INCREASE_STEP, RequestScheduler, TokenBucket
+)
+
+RATE_PER_HOUR = 3600.0  # One request per second
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(RATE_PER_HOUR)
+
+@pytest.fixture
+def session(scheduler):
+    return scheduler.add_session()  # Anonymous: no login request
+
+def throttled_error(cause: Exception = None):
+    """A connection error as raised by instaloader, optionally caused by `cause`."""
+    try:
+        raise instaloader.exceptions.ConnectionException("request failed") from cause
+    except instaloader.exceptions.ConnectionException as e:
+        return e
+
+def test_token_bucket_spends_its_burst_then_asks_to_wait():
+    bucket = TokenBucket(rate=10.0, capacity=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each further reservation waits for its own token: 1/10 s, then 2/10 s
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+    assert bucket.available() < 0
+
+def test_token_bucket_refills_up_to_its_capacity():
+    bucket = TokenBucket(rate=1000.0, capacity=2)
+    bucket.reserve()
+    bucket.reserve()
+
+    time.sleep(0.05)  # 50 tokens worth of time
+    assert bucket.available() == 2
+
+def test_throttle_cooldown_doubles_and_is_clamped(scheduler, session):
+    cooldowns = [scheduler.record_throttle(session.name) for _ in range(12)]
+
+    expected = [min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** i) for i in range(12)]
+    assert cooldowns == expected
+    assert cooldowns[-1] == MAX_COOLDOWN
+    assert session.cooldown_until - time.monotonic() == pytest.approx(MAX_COOLDOWN, abs=1)
+
+def test_throttle_halves_the_rate_down_to_the_floor(scheduler, session):
+    scheduler.record_throttle(session.name)
+    assert session.rate_per_hour == RATE_PER_HOUR * RATE_DECREASE_FACTOR
+    assert session.bucket.rate == pytest.approx(session.rate_per_hour / 3600)
+
+    for _ in range(20):
+        scheduler.record_throttle(session.name)
+    assert session.rate_per_hour == MIN_RATE_PER_HOUR
+
+def test_clean_streak_raises_the_rate(scheduler, session):
+    scheduler.record_throttle(session.name)
+    session.cooldown_until = 0.0
+    throttled_rate = session.rate_per_hour
+
+    # A full bucket, so the streak runs without waiting for tokens
+    session.bucket = TokenBucket(session.bucket.rate, CLEAN_STREAK_FOR_INCREASE + BURST_SIZE)
+    for _ in range(CLEAN_STREAK_FOR_INCREASE - 1):
+        scheduler.before_request(session.name)
+    assert session.rate_per_hour == throttled_rate
+
+    scheduler.before_request(session.name)
+    assert session.rate_per_hour == throttled_rate + RATE_INCREASE_STEP
+    assert session.consecutive_throttles == 0
+    assert session.clean_streak == 0
+
+    # The backoff starts over after a clean streak
+    assert scheduler.record_throttle(session.name) == BASE_COOLDOWN
+
+def test_rate_increase_is_clamped_to_the_ceiling(scheduler, session):
+    scheduler._set_rate(session, MAX_RATE_PER_HOUR)
+    session.bucket = TokenBucket(session.bucket.rate, CLEAN_STREAK_FOR_INCREASE + BURST_SIZE)
+
+    for _ in range(CLEAN_STREAK_FOR_INCREASE):
+        scheduler.before_request(session.name)
+    assert session.rate_per_hour == MAX_RATE_PER_HOUR
+
+def test_record_error_backs_off_on_connection_errors(scheduler, session):
+    assert scheduler.record_error(session.name, throttled_error()) == BASE_COOLDOWN
+    assert session.throttles == 1
+    assert scheduler.metrics()["throttle_events"] == 1
+
+def test_record_error_does_not_count_a_429_twice(scheduler, session):
+    # Instaloader reports every 429 through `handle_429` before giving up with a ConnectionException
+    scheduler.record_throttle(session.name)
+    scheduler.record_throttle(session.name)
+    rate = session.rate_per_hour
+
+    error = throttled_error(instaloader.exceptions.TooManyRequestsException("429 Too Many Requests"))
+    assert scheduler.record_error(session.name, error) == BASE_COOLDOWN * 2
+    assert session.throttles == 2
+    assert session.consecutive_throttles == 2
+    assert session.rate_per_hour == rate
+    assert scheduler.metrics()["throttle_events"] == 2
+
+def test_record_error_on_a_fresh_session_returns_the_base_cooldown(scheduler, session):
+    error = throttled_error(instaloader.exceptions.TooManyRequestsException("429 Too Many Requests"))
+    assert scheduler.record_error(session.name, error) == BASE_COOLDOWN
+    assert session.throttles == 0
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from api.results import BOT_LABEL, PROFILE_COLUMN_TYPES, REAL_LABEL, FollowerResults
+
+def record(followers=10, **fields):
+    return dict(dict.fromkeys(PROFILE_COLUMN_TYPES, 1), followers=followers, **fields)
+
+def scored(usernames, probabilities, **fields):
+    results = FollowerResults()
+    bots = results.append_batch(usernames, [record(**fields) for _ in usernames], probabilities, threshold=0.5)
+    return results, bots
+
+def test_append_batch_counts_bots_at_the_threshold():
+    results, bots = scored(["a", "b", "c"], [0.2, 0.5, 0.9])
+    assert bots == results.bot_count() == 2
+    assert results.column("is_bot").tolist() == [False, True, True]
+    assert results.column("bot_probability").dtype == np.float32
+
+def test_empty_batches_are_ignored():
+    results = FollowerResults()
+    assert results.append_batch([], [], []) == 0
+    assert results.empty and len(results) == 0
+    assert results.column("followers").dtype == PROFILE_COLUMN_TYPES["followers"]
+    assert results.bot_count() == 0
+
+def test_columns_clip_instead_of_overflowing():
+    results, _ = scored(["a"], [0.1], followers=2 ** 40, bio_length=-5, digit_count=1000)
+    assert results.column("followers")[0] == np.iinfo(np.uint32).max
+    assert results.column("bio_length")[0] == 0
+    assert results.column("digit_count")[0] == 255
+
+def test_extend_and_take_keep_rows_aligned():
+    first, _ = scored(["a", "b"], [0.1, 0.9], followers=1)
+    second, _ = scored(["c"], [0.7], followers=3)
+    first.extend(second)
+    assert len(first) == 3
+    assert first.column("followers").tolist() == [1, 1, 3]
+
+    taken = first.take([2, 0])
+    assert taken.usernames == ["c", "a"]
+    assert taken.column("followers").tolist() == [3, 1]
+    assert taken.column("is_bot").tolist() == [True, False]
+    assert len(first.take([])) == 0
+
+def test_records_and_dataframe():
+    results, _ = scored(["a", "b"], [0.25, 0.75])
+    records = results.to_records()
+    assert [r["username"] for r in records] == ["a", "b"]
+    assert [r["prediction"] for r in records] == [REAL_LABEL, BOT_LABEL]
+    assert records[1]["bot_probability"] == pytest.approx(0.75)
+    assert records[0]["profile_data"] == record()
+
+    df = results.to_pandas()
+    assert df["username"].tolist() == ["a", "b"]
+    assert df["prediction"].tolist() == [REAL_LABEL, BOT_LABEL]
+    assert df["followers"].dtype == PROFILE_COLUMN_TYPES["followers"]
+
+def test_arrow_export():
+    pa = pytest.importorskip("pyarrow")
+    results, _ = scored(["a", "b"], [0.25, 0.75])
+    more, _ = scored(["c"], [0.6])
+    results.extend(more)
+
+    table = results.to_arrow()
+    assert table.num_rows == 3
+    assert table.column("username").to_pylist() == ["a", "b", "c"]
+    assert table.column("is_bot").type == pa.bool_()
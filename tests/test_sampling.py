@@ -0,0 +1,73 @@
+import glob
+import os
+import random
+
+import pytest
+from conftest import INSTA_PASS, INSTA_USER
+
+from api.sampling import Reservoir, reservoir_sample, sample_account, wilson_interval
+from data.follower_store import DATASETS_DIR
+from data.scraper import get_followers_data
+
+def test_reservoir_counts_every_item():
+    reservoir = Reservoir(50, random.Random(0))
+    for item in range(1000):
+        reservoir.add(item)
+
+    sample = reservoir.sample()
+    assert reservoir.seen == 1000
+    assert len(sample) == len(set(sample)) == 50
+    assert set(sample) <= set(range(1000))
+
+def test_reservoir_keeps_short_streams_whole():
+    assert sorted(reservoir_sample(range(7), 10, random.Random(0))) == list(range(7))
+
+def test_reservoir_is_uniform():
+    rng = random.Random(1)
+    counts = [0] * 20
+    for _ in range(4000):
+        for item in reservoir_sample(range(20), 5, rng):
+            counts[item] += 1
+    # Each item is kept with probability 5/20: 1000 times expected, sd ~27
+    assert all(850 < count < 1150 for count in counts)
+
+@pytest.mark.parametrize("successes, n", [(0, 10), (3, 10), (10, 10), (1, 1000), (500, 1000)])
+def test_wilson_interval_bounds(successes, n):
+    estimate, low, high = wilson_interval(successes, n, 0.95)
+    assert estimate == successes / n
+    assert 0.0 <= low <= estimate <= high <= 1.0
+
+def test_wilson_interval_edges():
+    assert wilson_interval(0, 0) == (0.0, 0.0, 1.0)
+    assert wilson_interval(0, 10)[1] == 0.0
+    assert wilson_interval(10, 10)[2] == 1.0
+
+def test_wilson_interval_narrows_with_confidence_and_population():
+    _, low_90, high_90 = wilson_interval(30, 100, 0.90)
+    _, low_99, high_99 = wilson_interval(30, 100, 0.99)
+    assert high_90 - low_90 < high_99 - low_99
+
+    _, low, high = wilson_interval(30, 100, 0.95)
+    _, low_finite, high_finite = wilson_interval(30, 100, 0.95, population=200)
+    assert high_finite - low_finite < high - low
+
+    assert wilson_interval(30, 100, 0.95, population=100) == (0.3, 0.3, 0.3)  # The whole population was scored
+
+def test_sample_counts_the_followers_of_a_resumed_crawl(instagram):
+    delivered = []
+
+    def interrupt(follower):
+        delivered.append(follower.username)
+        if len(delivered) == 90:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        get_followers_data("bench_140", INSTA_USER, INSTA_PASS, follower_callback=interrupt)
+
+    result, results = sample_account("bench_140", INSTA_USER, INSTA_PASS, ci_width=1.0, max_sample=20, seed=0)
+    assert result["population"] == 140
+    assert 0 < result["sample_size"] == len(results) <= 20
+    assert result["ci_low"] <= result["bot_percentage"] <= result["ci_high"]
+
+    # Sampling stores nothing, so it leaves no session file behind
+    assert not glob.glob(os.path.join(DATASETS_DIR, "bench_140-*"))
@@ -0,0 +1,79 @@
+import instaloader
+import pytest
+from conftest import INSTA_PASS, INSTA_USER
+from fake_instagram import FakeInstagram
+
+from data.request_scheduler import get_scheduler
+from data.scraper import (
+    PROFILE_NODE_FIELDS, extract_profile_fields, fetch_stats_since, get_followers_data, profile_fetch_stats
+)
+
+@pytest.fixture
+def context(instagram):
+    return get_scheduler().add_session(INSTA_USER, INSTA_PASS).loader.context
+
+@pytest.fixture
+def node():
+    return FakeInstagram().follower(7)
+
+def expected_fields(node):
+    return {
+        "followers": node["edge_followed_by"]["count"],
+        "following": node["edge_follow"]["count"],
+        "biography": node["biography"],
+        "posts": node["edge_owner_to_timeline_media"]["count"],
+        "is_private": node["is_private"],
+        "profile_pic_url": node["profile_pic_url"]
+    }
+
+def test_full_nodes_are_reused_without_a_request(context, node):
+    before = dict(profile_fetch_stats)
+    fields = extract_profile_fields(instaloader.Profile(context, dict(node)))
+
+    assert fields == expected_fields(node)
+    assert fetch_stats_since(before) == {"profiles_reused": 1, "requests_saved": 1, "full_fetches": 0}
+
+def test_partial_nodes_cost_one_full_fetch(context, node):
+    # What `get_followers()` yields from the live site: no follower, followee or post counts
+    partial = {key: node[key] for key in ("id", "username", "full_name", "is_private", "profile_pic_url")}
+    before = dict(profile_fetch_stats)
+    fields = extract_profile_fields(instaloader.Profile(context, partial))
+
+    assert fields == expected_fields(node)
+    assert fetch_stats_since(before) == {"profiles_reused": 0, "requests_saved": 0, "full_fetches": 1}
+
+def test_fetched_profiles_are_not_counted_as_reused(context, node):
+    profile = instaloader.Profile.from_username(context, node["username"])
+    before = dict(profile_fetch_stats)
+
+    assert extract_profile_fields(profile) == expected_fields(node)
+    assert fetch_stats_since(before) == {"profiles_reused": 0, "requests_saved": 0, "full_fetches": 0}
+
+def test_public_properties_are_the_fallback(node):
+    class PublicOnlyProfile:
+        """A profile without instaloader's private node attributes."""
+        _has_full_metadata = True
+        followers = node["edge_followed_by"]["count"]
+        followees = node["edge_follow"]["count"]
+        biography = node["biography"]
+        mediacount = node["edge_owner_to_timeline_media"]["count"]
+        is_private = node["is_private"]
+        profile_pic_url = node["profile_pic_url"]
+
+    fields = extract_profile_fields(PublicOnlyProfile())
+    assert fields == expected_fields(node)
+    assert set(fields) == set(PROFILE_NODE_FIELDS)
+
+def test_resumed_followers_are_replayed_to_the_callback(instagram):
+    def interrupt(follower):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        get_followers_data("bench_30", INSTA_USER, INSTA_PASS, follower_callback=interrupt)
+
+    delivered = []
+    count = get_followers_data("bench_30", INSTA_USER, INSTA_PASS, follower_callback=delivered.append,
+                               replay_resumed=True)
+
+    usernames = [follower if isinstance(follower, str) else follower.username for follower in delivered]
+    assert count == len(usernames) == len(set(usernames)) == 30